@@ -0,0 +1,4 @@
+# Load environment variables from .env before any app module reads its configuration at import
+from dotenv import load_dotenv
+
+load_dotenv()
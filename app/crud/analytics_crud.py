@@ -0,0 +1,256 @@
+"""
+Pre-aggregated approval counts over loanApplications, for dashboards.
+
+One rollup document per (dimension, value) in loanRollups, e.g.
+    {"_id": "intent|medical", "dimension": "intent", "value": "medical",
+     "total": 812, "approved": 190, "rejected": 530, "pending": 92, "updatedAt": ...}
+
+The mongo_crud writers (and the outbox dispatcher) keep the counts current with $inc upserts.
+rebuild_rollups recomputes everything from loanApplications (and loanApplicationBuckets), for
+recovery or after bulk loads that bypass mongo_crud, in one $merge pipeline on the server. Its
+keys are built by _category_expression(), the aggregation form of dimension_value(), which
+keys the $inc path.
+
+Run from the project root:
+    python -m app.crud.analytics_crud rebuild
+"""
+import argparse
+import os
+from collections import defaultdict
+from datetime import datetime
+from pymongo import MongoClient, UpdateOne
+
+from app.crud import document_layout, lookup_cache
+from app.ml.feature_encoder import CATEGORY_ALIASES, normalize_category
+
+# --- Configuration ---
+ROLLUPS_ENABLED = os.getenv("ANALYTICS_ROLLUPS", "on") == "on"
+ROLLUP_COLLECTION = 'loanRollups'
+# Upper bounds of the income buckets; incomes above the last one fall in "250000+"
+INCOME_BUCKETS = [25000, 50000, 75000, 100000, 150000, 250000]
+
+# Document field each dimension groups on (incomeBucket is derived from the income)
+DIMENSIONS = {
+    "intent": "loanDetails.intent",
+    "education": "personDetails.education",
+    "homeOwnership": "personDetails.homeOwnership",
+    "incomeBucket": "personDetails.income",
+}
+# normalize_category field of each categorical dimension
+CATEGORY_FIELDS = {"intent": "loan_intent", "education": "education", "homeOwnership": "home_ownership"}
+# Fields a writer must read back to move a document between status counts
+ROLLUP_PROJECTION = {"_id": 0, "sql_loan_id": 1, "loanStatus": 1, **{field: 1 for field in DIMENSIONS.values()}}
+# The CSV loader stores loan_status as 1/0, the API as "Approved"/"Rejected"/"Pending"
+APPROVED_STATUSES = ["Approved", 1]
+REJECTED_STATUSES = ["Rejected", 0]
+
+
+def _rollups(client: MongoClient):
+    return client['loan_prediction_db'][ROLLUP_COLLECTION]
+
+
+# --- Document -> rollup keys ---
+def income_bucket(income) -> str:
+    income = income or 0
+    lower = 0
+    for upper in INCOME_BUCKETS:
+        if income < upper:
+            return f"{lower}-{upper}"
+        lower = upper
+    return f"{lower}+"
+
+def status_field(status) -> str:
+    if status in APPROVED_STATUSES:
+        return "approved"
+    if status in REJECTED_STATUSES:
+        return "rejected"
+    return "pending"
+
+def _field(document: dict, path: str):
+    value = document
+    for part in path.split("."):
+        value = value.get(part) if isinstance(value, dict) else None
+    return value
+
+def dimension_value(dimension: str, value) -> str:
+    """
+    The rollup key of a document value. Categories are normalized as everywhere else, so the
+    API's "Master's" and the CSV's "master" count together, and a home ownership id ("2", as the
+    API stores it) counts under its lookup-table name.
+    """
+    if dimension == "incomeBucket":
+        return income_bucket(value)
+    if value is None:
+        return ""
+    if dimension == "homeOwnership" and str(value).strip().isdigit():
+        value = lookup_cache.name("home_ownership", int(value), str(value).strip())
+    return normalize_category(CATEGORY_FIELDS[dimension], value)
+
+def dimension_values(document: dict) -> list:
+    """
+    The (dimension, value) pairs a loanApplications document is counted under.
+    """
+    return [(dimension, dimension_value(dimension, _field(document, path))) for dimension, path in DIMENSIONS.items()]
+
+
+class RollupDelta:
+    """
+    Count changes accumulated in memory and sent as one bulk_write of $inc upserts.
+    """
+
+    def __init__(self):
+        self.counts = defaultdict(int)  # (dimension, value, field) -> increment
+
+    def add(self, document: dict, sign: int = 1):
+        field = status_field(document.get("loanStatus"))
+        for dimension, value in dimension_values(document):
+            self.counts[(dimension, value, "total")] += sign
+            self.counts[(dimension, value, field)] += sign
+
+    def change_status(self, document: dict, new_status):
+        old_field, new_field = status_field(document.get("loanStatus")), status_field(new_status)
+        if old_field == new_field:
+            return
+        for dimension, value in dimension_values(document):
+            self.counts[(dimension, value, old_field)] -= 1
+            self.counts[(dimension, value, new_field)] += 1
+
+    def operations(self) -> list:
+        increments = defaultdict(dict)
+        for (dimension, value, field), count in self.counts.items():
+            if count:
+                increments[(dimension, value)][field] = count
+        now = datetime.now()
+        return [
+            UpdateOne(
+                {"_id": f"{dimension}|{value}"},
+                {"$inc": fields, "$set": {"updatedAt": now}, "$setOnInsert": {"dimension": dimension, "value": value}},
+                upsert=True,
+            )
+            for (dimension, value), fields in increments.items()
+        ]
+
+
+def apply_delta(mongo_client: MongoClient, delta: RollupDelta):
+    operations = delta.operations()
+    if operations:
+        _rollups(mongo_client).bulk_write(operations, ordered=False)
+
+
+# --- Full rebuild ---
+def _switch(value, cases: dict, default):
+    branches = [{"case": {"$eq": [value, match]}, "then": then} for match, then in cases.items()]
+    return {"$switch": {"branches": branches, "default": default}} if branches else default
+
+def _category_expression(dimension: str, value):
+    """
+    dimension_value() as an aggregation expression, so the rebuild keys values on the server
+    exactly as the $inc path keys them in Python.
+    """
+    field = CATEGORY_FIELDS[dimension]
+    value = {"$ifNull": [value, ""]}
+    if dimension == "homeOwnership":
+        # A lookup id (as the API stores it) counts under its name
+        ids = {str(row_id): name for row_id, name in lookup_cache.names("home_ownership").items()}
+        value = _switch({"$trim": {"input": {"$toString": value}}}, ids, value)
+    # normalize_category
+    text = {"$toLower": {"$trim": {"input": {"$toString": value}}}}
+    for find in ("’s", "'s", *(("_", " ") if field == "loan_intent" else ())):
+        text = {"$replaceAll": {"input": text, "find": find, "replacement": ""}}
+    aliases = CATEGORY_ALIASES.get(field)
+    if aliases:
+        text = {"$let": {"vars": {"name": text}, "in": _switch("$$name", aliases, "$$name")}}
+    return text
+
+def _value_expression(dimension: str, path: str):
+    if dimension == "incomeBucket":
+        income = {"$ifNull": [f"${path}", 0]}
+        branches, lower = [], 0
+        for upper in INCOME_BUCKETS:
+            branches.append({"case": {"$lt": [income, upper]}, "then": f"{lower}-{upper}"})
+            lower = upper
+        return {"$switch": {"branches": branches, "default": f"{lower}+"}}
+    return _category_expression(dimension, f"${path}")
+
+def rebuild_pipeline(rebuilt_at: datetime) -> list:
+    status = {"$switch": {
+        "branches": [
+            {"case": {"$in": ["$loanStatus", APPROVED_STATUSES]}, "then": "approved"},
+            {"case": {"$in": ["$loanStatus", REJECTED_STATUSES]}, "then": "rejected"},
+        ],
+        "default": "pending",
+    }}
+    counts = {field: {"$sum": {"$cond": [{"$eq": ["$status", field]}, 1, 0]}} for field in ("approved", "rejected", "pending")}
+    # Stored documents (and bulk-loaded buckets, unpacked) in the readable shape
+    readable = document_layout.readable_stages(["loanStatus", *DIMENSIONS.values()])
+    return [
+        {"$unionWith": {"coll": document_layout.BUCKET_COLLECTION, "pipeline": document_layout.unbucket_stages()}},
+        *readable,
+        {"$project": {
+            "_id": 0,
+            "status": status,
+            "keys": {dimension: _value_expression(dimension, path) for dimension, path in DIMENSIONS.items()},
+        }},
+        # One {k: dimension, v: value} entry per dimension, then one row per document and dimension
+        {"$project": {"status": 1, "keys": {"$objectToArray": "$keys"}}},
+        {"$unwind": "$keys"},
+        {"$group": {
+            "_id": {"$concat": ["$keys.k", "|", "$keys.v"]},
+            "dimension": {"$first": "$keys.k"},
+            "value": {"$first": "$keys.v"},
+            "total": {"$sum": 1},
+            **counts,
+        }},
+        {"$set": {"updatedAt": rebuilt_at}},
+        {"$merge": {"into": ROLLUP_COLLECTION, "on": "_id", "whenMatched": "replace", "whenNotMatched": "insert"}},
+    ]
+
+def rebuild_rollups(mongo_client: MongoClient) -> int:
+    """
+    Recomputes every rollup from loanApplications on the server and deletes rollups for values
+    that no longer occur. Writes made while it runs may be counted twice or lost, so run it
+    when ingestion is quiet. Returns the number of rollup documents.
+    """
+    # BSON dates keep milliseconds: a finer timestamp would be later than the merged documents' own
+    now = datetime.now()
+    rebuilt_at = now.replace(microsecond=now.microsecond // 1000 * 1000)
+    mongo_client['loan_prediction_db']['loanApplications'].aggregate(rebuild_pipeline(rebuilt_at))
+    rollups = _rollups(mongo_client)
+    # Rollups the rebuild did not write, and no $inc touched since it started
+    rollups.delete_many({"updatedAt": {"$lt": rebuilt_at}})
+    return rollups.count_documents({})
+
+
+# --- Reads ---
+def get_rollups(mongo_client: MongoClient, dimension: str = None) -> list:
+    """
+    Returns the rollups (all, or for one dimension) with their approval rate over decided loans.
+    """
+    query = {"dimension": dimension} if dimension else {}
+    rows = []
+    for rollup in _rollups(mongo_client).find(query, {"_id": 0}).sort([("dimension", 1), ("value", 1)]):
+        decided = rollup.get("approved", 0) + rollup.get("rejected", 0)
+        rollup["approval_rate"] = rollup.get("approved", 0) / decided if decided else None
+        rows.append(rollup)
+    return rows
+
+
+def main():
+    from app.db.database import get_mongo_client
+
+    parser = argparse.ArgumentParser(description="Maintain the loanRollups analytics collection.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("rebuild", help="Recompute all rollups from loanApplications.")
+    commands.add_parser("show", help="Print the current rollups.")
+    args = parser.parse_args()
+
+    if args.command == "rebuild":
+        print(f"Rebuilt {rebuild_rollups(get_mongo_client())} rollup documents.")
+    elif args.command == "show":
+        for rollup in get_rollups(get_mongo_client()):
+            rate = "n/a" if rollup["approval_rate"] is None else f"{rollup['approval_rate']:.1%}"
+            print(f"{rollup['dimension']:>14} {rollup['value']:<16} total={rollup.get('total', 0):<8} approval_rate={rate}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+from pymongo import AsyncMongoClient, ReturnDocument
+from datetime import datetime
+from app.models import pydantic_schemas
+from app.crud import analytics_crud, document_layout
+from app.crud.mongo_crud import _build_application_document
+
+# Async versions of the functions in mongo_crud.py
+
+async def _apply_rollup_delta(mongo_client: AsyncMongoClient, delta: analytics_crud.RollupDelta):
+    operations = delta.operations()
+    if operations:
+        await mongo_client['loan_prediction_db'][analytics_crud.ROLLUP_COLLECTION].bulk_write(operations, ordered=False)
+
+async def create_application_document(mongo_client: AsyncMongoClient, application_data: pydantic_schemas.ApplicationCreate, predicted_status: str, sql_loan_id: int):
+    """
+    Formats the application data and inserts it as a new document into MongoDB.
+    """
+    collection = mongo_client['loan_prediction_db']['loanApplications']
+    document = _build_application_document(application_data, predicted_status, sql_loan_id, datetime.now())
+    await collection.insert_one(dict(document_layout.to_stored(document)))
+    if analytics_crud.ROLLUPS_ENABLED:
+        delta = analytics_crud.RollupDelta()
+        delta.add(document_layout.normalized(document))
+        await _apply_rollup_delta(mongo_client, delta)
+
+async def create_application_documents(mongo_client: AsyncMongoClient, applications: list, predicted_status: str, sql_loan_ids: list):
+    """
+    Inserts one document per application with a single unordered insert_many.
+    """
+    if not applications:
+        return
+    collection = mongo_client['loan_prediction_db']['loanApplications']
+    ingested_at = datetime.now()
+    documents = [
+        _build_application_document(application, predicted_status, loan_id, ingested_at)
+        for application, loan_id in zip(applications, sql_loan_ids)
+    ]
+    await collection.insert_many([dict(document_layout.to_stored(document)) for document in documents], ordered=False)
+    if analytics_crud.ROLLUPS_ENABLED:
+        delta = analytics_crud.RollupDelta()
+        for document in documents:
+            delta.add(document_layout.normalized(document))
+        await _apply_rollup_delta(mongo_client, delta)
+
+async def update_document_status(mongo_client: AsyncMongoClient, loan_id: int, status: str):
+    """
+    Finds a document by its SQL loan_id and updates its status.
+    """
+    collection = mongo_client['loan_prediction_db']['loanApplications']
+    update = {"$set": document_layout.stored_fields({"loanStatus": status})}
+    if not analytics_crud.ROLLUPS_ENABLED:
+        await collection.update_one({"sql_loan_id": loan_id}, update)
+        return
+    previous = await collection.find_one_and_update(
+        {"sql_loan_id": loan_id}, update,
+        projection=document_layout.projection(analytics_crud.ROLLUP_PROJECTION), return_document=ReturnDocument.BEFORE,
+    )
+    if previous is not None:
+        delta = analytics_crud.RollupDelta()
+        delta.change_status(document_layout.to_readable(previous), status)
+        await _apply_rollup_delta(mongo_client, delta)
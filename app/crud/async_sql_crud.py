@@ -0,0 +1,123 @@
+# app/crud/async_sql_crud.py
+
+import asyncio
+from sqlalchemy import select, insert, func
+from sqlalchemy.orm import selectinload
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.db import sql_models
+from app.models import pydantic_schemas
+from app.crud import lookup_cache, outbox_crud, person_cache
+from app.crud import sql_crud
+from app.crud.sql_crud import _person_and_loan_data
+
+# Async versions of the functions in sql_crud.py. Relationships cannot be lazy-loaded
+# on an AsyncSession, so everything the response needs is loaded up front.
+
+async def _lookup_ids(applications: list) -> list:
+    """
+    Category ids from lookup_cache; only a (re)load or a new category reaches the database, in a thread.
+    """
+    lookup_ids = lookup_cache.cached_application_ids(applications)
+    if lookup_ids is None:
+        lookup_ids = await asyncio.to_thread(lookup_cache.application_ids, applications)
+    return lookup_ids
+
+async def get_person(db: AsyncSession, person_id: int):
+    """
+    Reads a single person (with their loans) by ID from the SQL database.
+    """
+    result = await db.execute(
+        select(sql_models.Person)
+        .options(selectinload(sql_models.Person.loans))
+        .where(sql_models.Person.person_id == person_id)
+    )
+    return result.scalars().first()
+
+async def loan_changes(db: AsyncSession, after_log_id: int, loan_ids) -> tuple:
+    result = await db.execute(sql_crud.loan_changes_query(after_log_id, loan_ids))
+    last_log_id, changed = result.one()
+    return last_log_id, bool(changed)
+
+async def last_status_change_id(db: AsyncSession) -> int:
+    result = await db.execute(select(func.max(sql_models.LoanStatusLog.log_id)))
+    return result.scalar() or 0
+
+async def create_person_and_loan(db: AsyncSession, application_data: pydantic_schemas.ApplicationCreate, predicted_status: str, outbox: bool = False):
+    """
+    Creates a new person and a new loan record in one transaction
+    (plus the queued MongoDB document with outbox=True).
+    """
+    lookup_ids = (await _lookup_ids([application_data]))[0]
+    person_data, loan_data = _person_and_loan_data(application_data, predicted_status, lookup_ids)
+    db_loan = sql_models.Loan(**loan_data)
+    db_person = sql_models.Person(**person_data, loans=[db_loan])
+    db.add(db_person)
+    if outbox:
+        await db.flush()
+        db.add(sql_models.MongoOutbox(**outbox_crud.application_entry(application_data, predicted_status, db_loan.loan_id)))
+    await db.commit()
+    person_cache.invalidate(db_person.person_id)
+
+    return db_person
+
+async def create_persons_and_loans(db: AsyncSession, applications: list, predicted_status: str, outbox: bool = False):
+    """
+    Creates a person and a loan for every application in one transaction
+    (plus the queued MongoDB documents with outbox=True).
+    Returns a list of (person_id, loan_id) in the order of `applications`.
+    """
+    if not applications:
+        return []
+    lookup_ids = await _lookup_ids(applications)
+    rows = [_person_and_loan_data(application, predicted_status, ids) for application, ids in zip(applications, lookup_ids)]
+    Person, Loan = sql_models.Person, sql_models.Loan
+    try:
+        person_ids = list((await db.execute(
+            insert(Person.__table__).returning(Person.person_id, sort_by_parameter_order=True),
+            [person_data for person_data, _ in rows],
+        )).scalars())
+        loan_ids = list((await db.execute(
+            insert(Loan.__table__).returning(Loan.loan_id, sort_by_parameter_order=True),
+            [{**loan_data, "person_id": person_id} for (_, loan_data), person_id in zip(rows, person_ids)],
+        )).scalars())
+        if outbox:
+            await db.execute(
+                insert(sql_models.MongoOutbox.__table__),
+                [outbox_crud.application_entry(application, predicted_status, loan_id) for application, loan_id in zip(applications, loan_ids)],
+            )
+        await db.commit()
+    except Exception:
+        await db.rollback()
+        raise
+    person_cache.invalidate(*person_ids)
+    return list(zip(person_ids, loan_ids))
+
+async def update_loan_status(db: AsyncSession, loan_id: int, status: str, outbox: bool = False):
+    """
+    Updates the status of an existing loan in the SQL database
+    (and queues the MongoDB update with outbox=True).
+    """
+    db_loan = await db.get(sql_models.Loan, loan_id)
+    if not db_loan:
+        return None
+    db_loan.loan_status = status
+    if outbox:
+        db.add(sql_models.MongoOutbox(**outbox_crud.status_entry(loan_id, status)))
+    await db.commit()
+    person_cache.invalidate(db_loan.person_id)
+    return db_loan
+
+async def list_rows(db: AsyncSession, query) -> list:
+    """
+    Runs a list query built by sql_crud.loan_list_query/person_list_query and returns one page of dicts.
+    """
+    result = await db.execute(query)
+    return [dict(row) for row in result.mappings()]
+
+async def stream_rows(db: AsyncSession, query, chunk_size: int = 5000):
+    """
+    Yields the rows of a list query as lists of dicts, chunk_size rows at a time, from a server-side cursor.
+    """
+    result = await db.stream(query.execution_options(yield_per=chunk_size))
+    async for partition in result.mappings().partitions():
+        yield [dict(row) for row in partition]
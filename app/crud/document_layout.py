@@ -0,0 +1,277 @@
+# app/crud/document_layout.py
+"""
+How loanApplications documents are stored, and the mapping back to the readable shape.
+
+MONGO_DOCUMENT_LAYOUT=readable (default) stores the nested documents the app has always written:
+    {"sql_loan_id": 7, "personDetails": {"age": 30, "gender": "female", ...},
+     "loanDetails": {...}, "creditDetails": {...}, "loanStatus": "Approved", "ingestionTimestamp": ...}
+MONGO_DOCUMENT_LAYOUT=compact stores the same fields flat under one- or two-letter names, with
+categorical values as the ids of the SQL lookup tables (app/crud/lookup_cache.py) and the status
+as a small integer:
+    {"sql_loan_id": 7, "a": 30, "g": 2, ..., "s": 2, "t": ...}
+A category the lookup tables do not know yet is added to them when it is first stored, so one
+category is always stored as one id. Documents written before that (with the normalized string)
+still match filters: query() matches a known category by its id or its name.
+
+Code always works in the readable shape: writers convert with to_stored() / stored_fields(),
+readers with to_readable() or the readable_stages() of an aggregation, and filters, projections
+and sorts go through query() / projection() / path(). In readable mode these return their input.
+
+With MONGO_BUCKET_PERIOD=hour|day|month, bulk loads (populate_mongodb.py) write their documents
+into loanApplicationBuckets instead, up to BUCKET_SIZE per bucket document:
+    {"t": <period start>, "n": 1000, "apps": [<stored document without timestamp>, ...]}
+Only documents that are never updated belong there: the CSV imports have no sql_loan_id.
+"""
+import os
+from datetime import datetime
+
+from app.crud import lookup_cache
+from app.ml.feature_encoder import normalize_category
+
+# --- Configuration ---
+COMPACT = os.getenv("MONGO_DOCUMENT_LAYOUT", "readable") == "compact"
+BUCKET_PERIOD = os.getenv("MONGO_BUCKET_PERIOD", "")  # "", "hour", "day" or "month"
+BUCKET_SIZE = 1000  # applications per bucket document
+BUCKET_COLLECTION = 'loanApplicationBuckets'
+
+# Readable path -> compact field
+FIELDS = {
+    "sql_loan_id": "sql_loan_id",  # the link to SQL keeps its name (indexes, outbox, reconciliation)
+    "loanStatus": "s",
+    "ingestionTimestamp": "t",
+    "personDetails.age": "a",
+    "personDetails.gender": "g",
+    "personDetails.education": "e",
+    "personDetails.income": "i",
+    "personDetails.employmentExperienceYears": "x",
+    "personDetails.homeOwnership": "h",
+    "loanDetails.amount": "m",
+    "loanDetails.intent": "n",
+    "loanDetails.interestRate": "r",
+    "loanDetails.percentIncome": "pi",
+    "creditDetails.creditHistoryLengthYears": "ch",
+    "creditDetails.creditScore": "cs",
+    "creditDetails.previousLoanDefaults": "d",
+}
+READABLE_FIELDS = {compact: readable for readable, compact in FIELDS.items()}
+
+# Readable path -> lookup_cache field
+LOOKUP_FIELDS = {
+    "personDetails.gender": "gender",
+    "personDetails.education": "education",
+    "personDetails.homeOwnership": "home_ownership",
+    "loanDetails.intent": "loan_intent",
+}
+# Same codes as app/crud/reconcile_crud.py; the CSV stores 1/0 for Approved/Rejected
+STATUS_CODES = {"Pending": 1, "Approved": 2, "Rejected": 3, 1: 2, 0: 3}
+STATUS_NAMES = {1: "Pending", 2: "Approved", 3: "Rejected"}
+DEFAULTS_NAMES = {1: "Yes", 0: "No"}
+
+
+# --- Values ---
+def encode(path: str, value, create: bool = True):
+    """
+    The compact value of a readable field value. A category the lookup tables do not know is
+    created there (create=True, for writes) or kept as its normalized string (for filters).
+    """
+    if value is None:
+        return None
+    if path == "loanStatus":
+        return STATUS_CODES.get(value, value)
+    if path == "creditDetails.previousLoanDefaults":
+        return 1 if normalize_category("previous_loan_defaults", value) == "yes" else 0
+    if path in LOOKUP_FIELDS:
+        # The API stores the home ownership lookup id itself (as a string)
+        if path == "personDetails.homeOwnership" and str(value).isdigit():
+            return int(value)
+        field = LOOKUP_FIELDS[path]
+        name = normalize_category(field, value)
+        row_id = lookup_cache.ids(field).get(name)
+        if row_id is None and create:
+            row_id = lookup_cache.resolve({field: [value]})[field][value]
+        return name if row_id is None else row_id
+    return value
+
+def _stored_values(path: str, value) -> list:
+    """
+    Every stored form of a filter value: a category with an id may also be stored by its name.
+    """
+    encoded = encode(path, value, create=False)
+    if path in LOOKUP_FIELDS and isinstance(encoded, int) and not str(value).isdigit():
+        return [encoded, normalize_category(LOOKUP_FIELDS[path], value)]
+    return [encoded]
+
+def decode(path: str, value):
+    if path == "loanStatus":
+        return STATUS_NAMES.get(value, value)
+    if path == "creditDetails.previousLoanDefaults":
+        return DEFAULTS_NAMES.get(value, value)
+    if path in LOOKUP_FIELDS and isinstance(value, int):
+        return lookup_cache.names(LOOKUP_FIELDS[path]).get(value, value)
+    return value
+
+
+# --- Documents ---
+def path(readable_path: str) -> str:
+    return FIELDS.get(readable_path, readable_path) if COMPACT else readable_path
+
+def to_stored(document: dict) -> dict:
+    """
+    Converts a readable document into the configured layout (a new dict in compact mode).
+    """
+    if not COMPACT:
+        return document
+    stored = {}
+    for key, value in document.items():
+        if isinstance(value, dict) and key != "_id":
+            for name, inner in value.items():
+                readable_path = f"{key}.{name}"
+                stored[FIELDS.get(readable_path, readable_path)] = encode(readable_path, inner)
+        else:
+            stored[FIELDS.get(key, key)] = encode(key, value)
+    return stored
+
+def to_readable(document: dict) -> dict:
+    """
+    Converts a stored document (or a projection of one) back to the readable shape.
+    """
+    if not COMPACT or document is None:
+        return document
+    readable = {}
+    for key, value in document.items():
+        readable_path = READABLE_FIELDS.get(key, key)
+        value = decode(readable_path, value)
+        if "." in readable_path:
+            group, name = readable_path.split(".", 1)
+            readable.setdefault(group, {})[name] = value
+        else:
+            readable[readable_path] = value
+    return readable
+
+def normalized(document: dict) -> dict:
+    """
+    The readable document as it reads back after storing (e.g. "Bachelor's" -> "bachelor" in
+    compact mode), so rollup counts made at write time match the ones made from reads.
+    """
+    return to_readable(to_stored(document)) if COMPACT else document
+
+def stored_fields(fields: dict) -> dict:
+    """
+    Converts {readable path: value} (e.g. a $set) into stored paths and values.
+    """
+    if not COMPACT:
+        return fields
+    return {path(name): encode(name, value) for name, value in fields.items()}
+
+
+# --- Queries ---
+def _encode_condition(readable_path: str, condition):
+    if isinstance(condition, dict) and any(key.startswith("$") for key in condition):
+        encoded = {}
+        for operator, operand in condition.items():
+            if operator in ("$in", "$nin"):
+                encoded[operator] = [v for value in operand for v in _stored_values(readable_path, value)]
+            elif operator in ("$eq", "$ne"):
+                values = _stored_values(readable_path, operand)
+                if len(values) == 1:
+                    encoded[operator] = values[0]
+                else:
+                    encoded["$in" if operator == "$eq" else "$nin"] = values
+            else:
+                encoded[operator] = operand
+        return encoded
+    values = _stored_values(readable_path, condition)
+    return values[0] if len(values) == 1 else {"$in": values}
+
+def query(filter: dict) -> dict:
+    """
+    Translates a filter on readable paths and values into the stored layout.
+    """
+    if not COMPACT or not filter:
+        return filter
+    translated = {}
+    for key, condition in filter.items():
+        if key in ("$and", "$or", "$nor"):
+            translated[key] = [query(part) for part in condition]
+        elif key in FIELDS:
+            translated[FIELDS[key]] = _encode_condition(key, condition)
+        else:
+            translated[key] = condition
+    return translated
+
+def _expand(readable_path: str) -> list:
+    # A whole group such as "personDetails" stands for all of its fields
+    nested = [name for name in FIELDS if name.startswith(readable_path + ".")]
+    return nested or [readable_path]
+
+def projection(fields: dict) -> dict:
+    if not COMPACT or not fields:
+        return fields
+    return {path(name): value for key, value in fields.items() for name in _expand(key)}
+
+def sort(keys: list) -> list:
+    return [(path(name), direction) for name, direction in keys]
+
+def _decode_expression(readable_path: str, field: str):
+    if readable_path == "loanStatus":
+        names = STATUS_NAMES
+    elif readable_path == "creditDetails.previousLoanDefaults":
+        names = DEFAULTS_NAMES
+    elif readable_path in LOOKUP_FIELDS:
+        names = lookup_cache.names(LOOKUP_FIELDS[readable_path])
+    else:
+        return f"${field}"
+    branches = [{"case": {"$eq": [f"${field}", code]}, "then": name} for code, name in names.items()]
+    return {"$switch": {"branches": branches, "default": f"${field}"}} if branches else f"${field}"
+
+def readable_stages(paths: list = None) -> list:
+    """
+    Aggregation stages that turn stored documents into the readable shape (only `paths`, plus
+    _id and sql_loan_id, if given), so a pipeline written for the readable shape runs unchanged.
+    """
+    if not COMPACT:
+        return []
+    project = {}
+    for name in FIELDS:
+        if paths is None or name in paths or name == "sql_loan_id":
+            group, _, field = name.rpartition(".")
+            (project.setdefault(group, {}) if group else project)[field] = _decode_expression(name, FIELDS[name])
+    return [{"$project": project}]
+
+
+# --- Time buckets ---
+def bucket_start(timestamp: datetime, period: str = BUCKET_PERIOD) -> datetime:
+    if period == "hour":
+        return timestamp.replace(minute=0, second=0, microsecond=0)
+    if period == "day":
+        return timestamp.replace(hour=0, minute=0, second=0, microsecond=0)
+    if period == "month":
+        return timestamp.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    raise ValueError(f"Unknown bucket period: {period!r}")
+
+def bucket_documents(documents: list, period: str = BUCKET_PERIOD, size: int = BUCKET_SIZE) -> list:
+    """
+    Packs readable documents into bucket documents of up to `size` applications per period.
+    Each application keeps its ingestion time only to the bucket period.
+    """
+    timestamp = path("ingestionTimestamp")
+    by_period = {}
+    for document in documents:
+        stored = dict(to_stored(document))
+        start = bucket_start(stored.pop(timestamp), period)
+        by_period.setdefault(start, []).append(stored)
+    return [
+        {"t": start, "n": len(apps[i:i + size]), "apps": apps[i:i + size]}
+        for start, apps in by_period.items()
+        for i in range(0, len(apps), size)
+    ]
+
+def unbucket_stages() -> list:
+    """
+    Aggregation stages that turn bucket documents back into one stored document per application.
+    """
+    return [
+        {"$unwind": "$apps"},
+        {"$set": {f"apps.{path('ingestionTimestamp')}": "$t"}},
+        {"$replaceRoot": {"newRoot": "$apps"}},
+    ]
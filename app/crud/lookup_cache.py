@@ -0,0 +1,195 @@
+# app/crud/lookup_cache.py
+"""
+In-memory copy of the lookup tables (gender, education, home_ownership, loan_intent), so
+resolving the categories of an application costs dictionary lookups instead of a SELECT per field.
+
+Names are kept normalized (normalize_category) and interned:
+    ids("education")   -> {"high school": 1, "bachelor": 2, "master": 3}
+    names("education") -> {1: "high school", 2: "bachelor", 3: "master"}
+A name stored twice (e.g. 'Bachelor’s' and 'bachelor') resolves to its lowest id.
+
+The tables are read once (at startup, or on first use) and read again:
+    - after this process creates categories (resolve() with names it does not know),
+    - when resolve() meets a name it does not know, before creating it: another process may have,
+    - once the copy is older than LOOKUP_CACHE_TTL seconds, for renames made elsewhere.
+"""
+import json
+import os
+import sys
+import threading
+import time
+from sqlalchemy import text
+
+from app.ml.feature_encoder import normalize_category
+
+# --- Configuration ---
+CACHE_TTL = float(os.getenv("LOOKUP_CACHE_TTL", "300"))
+
+# normalize_category field -> (table, id column, name column)
+LOOKUPS = {
+    "gender": ("gender", "gender_id", "gender"),
+    "education": ("education", "education_id", "level"),
+    "home_ownership": ("home_ownership", "home_ownership_id", "type"),
+    "loan_intent": ("loan_intent", "intent_id", "purpose"),
+}
+# ApplicationCreate field -> (normalize_category field, person/loan column)
+APPLICATION_FIELDS = {
+    "gender": ("gender", "gender_id"),
+    "education": ("education", "education_id"),
+    "loan_intent": ("loan_intent", "loan_intent_id"),
+}
+
+# field -> ({normalized name: id}, {id: normalized name}); replaced as a whole on every load
+_tables = None
+_loaded_at = 0.0
+_lock = threading.Lock()
+
+
+def _engine():
+    from app.db.database import engine
+    return engine
+
+def _key(field: str, value) -> str:
+    return sys.intern(normalize_category(field, value))
+
+
+# --- Loading ---
+def load(connection=None) -> int:
+    """
+    Reads all lookup tables (one SELECT each) and swaps in the new copy. Returns the number of rows.
+    """
+    global _tables, _loaded_at
+    if connection is None:
+        with _engine().connect() as connection:
+            return load(connection)
+    tables, rows = {}, 0
+    for field, (table, id_column, name_column) in LOOKUPS.items():
+        ids, names = {}, {}
+        for row_id, name in connection.execute(text(f"SELECT {id_column}, {name_column} FROM {table} ORDER BY {id_column}")):
+            key = _key(field, name)
+            ids.setdefault(key, row_id)
+            names[row_id] = key
+            rows += 1
+        tables[field] = (ids, names)
+    _tables, _loaded_at = tables, time.monotonic()
+    return rows
+
+def _current():
+    """
+    The loaded tables, or None if they were never loaded or are older than CACHE_TTL.
+    """
+    tables = _tables
+    if tables is None or time.monotonic() - _loaded_at > CACHE_TTL:
+        return None
+    return tables
+
+def _ensure():
+    tables = _current()
+    if tables is None:
+        with _lock:
+            tables = _current()
+            if tables is None:
+                load()
+                tables = _tables
+    return tables
+
+def invalidate():
+    """
+    Forces a reload on next use, e.g. after editing the lookup tables by hand.
+    """
+    global _tables
+    _tables = None
+
+
+# --- Lookups ---
+def ids(field: str) -> dict:
+    return _ensure()[field][0]
+
+def names(field: str) -> dict:
+    return _ensure()[field][1]
+
+def name(field: str, row_id, default: str = "") -> str:
+    """
+    The normalized name of a lookup id, or `default` for an unknown (or NULL) id.
+    """
+    return _ensure()[field][1].get(row_id, default)
+
+
+# --- Resolution ---
+def _create(missing: dict):
+    """
+    Inserts the names no table has yet, in one transaction, then reloads.
+    `missing` is {field: {normalized name: value as given}}.
+    """
+    with _engine().begin() as connection:
+        load(connection)
+        for field, values in missing.items():
+            known = _tables[field][0]
+            new = [value for key, value in values.items() if key not in known]
+            if not new:
+                continue
+            table, _, name_column = LOOKUPS[field]
+            # One statement per table; the NOT IN guard skips names another process inserted meanwhile
+            connection.execute(
+                text(f"INSERT INTO {table} ({name_column}) SELECT value FROM json_each(:names) "
+                     f"WHERE value NOT IN (SELECT {name_column} FROM {table})"),
+                {"names": json.dumps(sorted(new), ensure_ascii=False)},
+            )
+        load(connection)
+
+def _missing(tables, values_by_field: dict) -> dict:
+    missing = {}
+    for field, values in values_by_field.items():
+        known = tables[field][0]
+        for value in values:
+            key = _key(field, value)
+            if key not in known:
+                missing.setdefault(field, {}).setdefault(key, value)
+    return missing
+
+def resolve(values_by_field: dict) -> dict:
+    """
+    Maps category strings to ids: {field: [values]} -> {field: {value: id}}.
+    Names no table has yet are created first, all in one transaction.
+    """
+    tables = _ensure()
+    missing = _missing(tables, values_by_field)
+    if missing:
+        with _lock:
+            _create(missing)
+        tables = _tables
+    return {
+        field: {value: tables[field][0][_key(field, value)] for value in values}
+        for field, values in values_by_field.items()
+    }
+
+def application_ids(applications: list) -> list:
+    """
+    The gender_id, education_id and loan_intent_id of every application, in order.
+    """
+    values_by_field = {field: {getattr(a, attribute) for a in applications} for attribute, (field, _) in APPLICATION_FIELDS.items()}
+    resolved = resolve(values_by_field)
+    return [
+        {column: resolved[field][getattr(a, attribute)] for attribute, (field, column) in APPLICATION_FIELDS.items()}
+        for a in applications
+    ]
+
+def cached_application_ids(applications: list):
+    """
+    Like application_ids(), but only from memory: None if that would need the database
+    (the tables are not loaded or too old, or a category is new), so async code can take
+    the database path in a thread.
+    """
+    tables = _current()
+    if tables is None:
+        return None
+    rows = []
+    for a in applications:
+        row = {}
+        for attribute, (field, column) in APPLICATION_FIELDS.items():
+            row_id = tables[field][0].get(_key(field, getattr(a, attribute)))
+            if row_id is None:
+                return None
+            row[column] = row_id
+        rows.append(row)
+    return rows
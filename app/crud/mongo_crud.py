@@ -1,24 +1,73 @@
-from pymongo import MongoClient
+from pymongo import MongoClient, ReturnDocument, UpdateOne
+from app.crud import analytics_crud, outbox_crud, document_layout
 from datetime import datetime
 from app.models import pydantic_schemas
 
-def create_application_document(mongo_client: MongoClient, application_data: pydantic_schemas.ApplicationCreate, predicted_status: str, sql_loan_id: int):
+def _build_application_document(application_data: pydantic_schemas.ApplicationCreate, predicted_status: str, sql_loan_id: int, ingested_at: datetime):
     """
-    Formats the application data and inserts it as a new document into MongoDB.
-    Now includes the SQL loan_id for future reference.
+    Formats the application data as a loanApplications document.
     """
-    db = mongo_client['loan_prediction_db']
-    collection = db['loanApplications']
-
-    document = {
+    return {
         "sql_loan_id": sql_loan_id, # Link to the SQL database record
         "personDetails": { "age": application_data.age, "gender": application_data.gender, "education": application_data.education, "income": application_data.income, "employmentExperienceYears": application_data.employment_experience, "homeOwnership": str(application_data.home_ownership_id) },
         "loanDetails": { "amount": application_data.loan_amount, "intent": application_data.loan_intent, "interestRate": application_data.loan_interest_rate, "percentIncome": application_data.loan_amount / application_data.income if application_data.income > 0 else 0 },
         "creditDetails": { "creditHistoryLengthYears": application_data.credit_history_length, "creditScore": application_data.credit_score, "previousLoanDefaults": "N" },
         "loanStatus": predicted_status,
-        "ingestionTimestamp": datetime.now()
+        "ingestionTimestamp": ingested_at
     }
-    collection.insert_one(document)
+
+def document_from_sql_record(record: dict, ingested_at: datetime):
+    """
+    Rebuilds the loanApplications document of a loan from its SQL row joined with its person
+    (with the gender, education and loan_intent names filled in).
+    """
+    fields = pydantic_schemas.ApplicationCreate.model_fields
+    application_data = pydantic_schemas.ApplicationCreate(**{name: record[name] for name in fields})
+    return _build_application_document(application_data, record["loan_status"], record["loan_id"], ingested_at)
+
+def create_application_document(mongo_client: MongoClient, application_data: pydantic_schemas.ApplicationCreate, predicted_status: str, sql_loan_id: int):
+    """
+    Formats the application data and inserts it as a new document into MongoDB.
+    Now includes the SQL loan_id for future reference.
+    """
+    db = mongo_client['loan_prediction_db']
+    collection = db['loanApplications']
+
+    document = _build_application_document(application_data, predicted_status, sql_loan_id, datetime.now())
+    collection.insert_one(dict(document_layout.to_stored(document)))
+    if analytics_crud.ROLLUPS_ENABLED:
+        delta = analytics_crud.RollupDelta()
+        delta.add(document_layout.normalized(document))
+        analytics_crud.apply_delta(mongo_client, delta)
+
+def create_application_documents(mongo_client: MongoClient, applications: list, predicted_status: str, sql_loan_ids: list):
+    """
+    Inserts one document per application with a single unordered insert_many.
+    `sql_loan_ids` must be in the same order as `applications`.
+    """
+    if not applications:
+        return
+    db = mongo_client['loan_prediction_db']
+    collection = db['loanApplications']
+
+    ingested_at = datetime.now()
+    documents = [
+        _build_application_document(application, predicted_status, loan_id, ingested_at)
+        for application, loan_id in zip(applications, sql_loan_ids)
+    ]
+    collection.insert_many([dict(document_layout.to_stored(document)) for document in documents], ordered=False)
+    if analytics_crud.ROLLUPS_ENABLED:
+        delta = analytics_crud.RollupDelta()
+        for document in documents:
+            delta.add(document_layout.normalized(document))
+        analytics_crud.apply_delta(mongo_client, delta)
+
+def _rollup_documents(collection, filter: dict) -> list:
+    """
+    The rollup-relevant fields of the matching documents, in the readable shape.
+    """
+    projection = document_layout.projection(analytics_crud.ROLLUP_PROJECTION)
+    return [document_layout.to_readable(document) for document in collection.find(filter, projection)]
 
 def update_document_status(mongo_client: MongoClient, loan_id: int, status: str):
     """
@@ -26,4 +75,162 @@ def update_document_status(mongo_client: MongoClient, loan_id: int, status: str)
     """
     db = mongo_client['loan_prediction_db']
     collection = db['loanApplications']
-    collection.update_one({"sql_loan_id": loan_id}, {"$set": {"loanStatus": status}})
\ No newline at end of file
+    update = {"$set": document_layout.stored_fields({"loanStatus": status})}
+    if not analytics_crud.ROLLUPS_ENABLED:
+        collection.update_one({"sql_loan_id": loan_id}, update)
+        return
+    # The previous status (returned by the same round trip) says which rollup counts to move
+    previous = collection.find_one_and_update(
+        {"sql_loan_id": loan_id}, update,
+        projection=document_layout.projection(analytics_crud.ROLLUP_PROJECTION), return_document=ReturnDocument.BEFORE,
+    )
+    if previous is not None:
+        delta = analytics_crud.RollupDelta()
+        delta.change_status(document_layout.to_readable(previous), status)
+        analytics_crud.apply_delta(mongo_client, delta)
+
+def bulk_update_document_statuses(mongo_client: MongoClient, updates: list):
+    """
+    Updates the status of many documents (matched by SQL loan_id) in one bulk_write.
+    `updates` is a list of {"loan_id": ..., "loan_status": ...}.
+    """
+    if not updates:
+        return
+    db = mongo_client['loan_prediction_db']
+    collection = db['loanApplications']
+    if analytics_crud.ROLLUPS_ENABLED:
+        previous = _rollup_documents(collection, {"sql_loan_id": {"$in": [u["loan_id"] for u in updates]}})
+    operations = [UpdateOne({"sql_loan_id": u["loan_id"]}, {"$set": document_layout.stored_fields({"loanStatus": u["loan_status"]})}) for u in updates]
+    collection.bulk_write(operations, ordered=False)
+    if analytics_crud.ROLLUPS_ENABLED:
+        status_by_loan = {u["loan_id"]: u["loan_status"] for u in updates}
+        delta = analytics_crud.RollupDelta()
+        for document in previous:
+            delta.change_status(document, status_by_loan[document["sql_loan_id"]])
+        analytics_crud.apply_delta(mongo_client, delta)
+
+def set_document_statuses(mongo_client: MongoClient, loan_ids: list, status: str, chunk_size: int = 10000):
+    """
+    Gives many documents (matched by SQL loan_id) the same status with one update_many per chunk.
+    """
+    collection = mongo_client['loan_prediction_db']['loanApplications']
+    for start in range(0, len(loan_ids), chunk_size):
+        chunk = loan_ids[start:start + chunk_size]
+        if analytics_crud.ROLLUPS_ENABLED:
+            previous = _rollup_documents(collection, {"sql_loan_id": {"$in": chunk}})
+        collection.update_many({"sql_loan_id": {"$in": chunk}}, {"$set": document_layout.stored_fields({"loanStatus": status})})
+        if analytics_crud.ROLLUPS_ENABLED:
+            delta = analytics_crud.RollupDelta()
+            for document in previous:
+                delta.change_status(document, status)
+            analytics_crud.apply_delta(mongo_client, delta)
+
+def get_sync_position(mongo_client: MongoClient, name: str) -> int:
+    """
+    The last source position (e.g. a loan_status_log log_id) a sync worker has applied, or 0.
+    It is stored in MongoDB with the data it describes, so a restored database replays from its own position.
+    """
+    state = mongo_client['loan_prediction_db']['syncState'].find_one({"_id": name})
+    return state["position"] if state else 0
+
+def set_sync_position(mongo_client: MongoClient, name: str, position: int):
+    mongo_client['loan_prediction_db']['syncState'].update_one(
+        {"_id": name}, {"$set": {"position": position, "updatedAt": datetime.now()}}, upsert=True
+    )
+
+
+def outbox_operation(operation: str, loan_id: int, payload: dict):
+    """
+    Turns a mongo_outbox entry into an idempotent bulk_write operation.
+    Documents are created with an upsert on sql_loan_id, so redelivering an entry never duplicates it.
+    """
+    if operation == outbox_crud.CREATE_DOCUMENT:
+        application_data = pydantic_schemas.ApplicationCreate(**payload["application"])
+        document = _build_application_document(application_data, payload["status"], loan_id, datetime.fromisoformat(payload["ingested_at"]))
+        return UpdateOne({"sql_loan_id": loan_id}, {"$setOnInsert": document_layout.to_stored(document)}, upsert=True)
+    if operation == outbox_crud.UPDATE_STATUS:
+        return UpdateOne({"sql_loan_id": loan_id}, {"$set": document_layout.stored_fields({"loanStatus": payload["status"]})})
+    raise ValueError(f"Unknown outbox operation: {operation}")
+
+def apply_operations(mongo_client: MongoClient, operations: list):
+    """
+    Sends outbox operations in one ordered bulk_write, so writes to the same loan keep their commit order.
+    """
+    db = mongo_client['loan_prediction_db']
+    collection = db['loanApplications']
+    return collection.bulk_write(operations, ordered=True)
+
+def rollup_state(mongo_client: MongoClient, loan_ids: list) -> dict:
+    """
+    Reads the rollup-relevant fields of the documents for the given loan_ids, keyed by loan_id.
+    """
+    collection = mongo_client['loan_prediction_db']['loanApplications']
+    return {
+        document["sql_loan_id"]: document
+        for document in _rollup_documents(collection, {"sql_loan_id": {"$in": list(set(loan_ids))}})
+    }
+
+def outbox_rollup_delta(state: dict, entries: list) -> analytics_crud.RollupDelta:
+    """
+    Replays delivered outbox entries, as (operation, loan_id, payload) in delivery order, over
+    the documents as they were before delivery (from rollup_state) and returns the count changes.
+    Redelivered creates find their document already present and are not counted twice.
+    """
+    delta = analytics_crud.RollupDelta()
+    for operation, loan_id, payload in entries:
+        if operation == outbox_crud.CREATE_DOCUMENT:
+            if loan_id not in state:
+                application_data = pydantic_schemas.ApplicationCreate(**payload["application"])
+                state[loan_id] = document_layout.normalized(_build_application_document(application_data, payload["status"], loan_id, None))
+                delta.add(state[loan_id])
+        elif operation == outbox_crud.UPDATE_STATUS and loan_id in state:
+            delta.change_status(state[loan_id], payload["status"])
+            state[loan_id]["loanStatus"] = payload["status"]
+    return delta
+
+
+# --- Reads ---
+def find_applications(mongo_client: MongoClient, filter: dict = None, projection: dict = None, sort: list = None, limit: int = 0) -> list:
+    """
+    Finds applications by readable field paths and values and returns readable documents,
+    whatever the storage layout, including bulk-loaded applications packed into time buckets.
+    `sort` is a list of (readable path, direction). In compact mode categorical fields sort by lookup id.
+    """
+    db = mongo_client['loan_prediction_db']
+    stored_filter = document_layout.query(filter or {})
+    stored_projection = document_layout.projection(projection)
+    cursor = db['loanApplications'].find(stored_filter, stored_projection)
+    if sort:
+        cursor = cursor.sort(document_layout.sort(sort))
+    if limit:
+        cursor = cursor.limit(limit)
+    results = [document_layout.to_readable(document) for document in cursor]
+
+    buckets = db[document_layout.BUCKET_COLLECTION]
+    if buckets.estimated_document_count():
+        pipeline = [*document_layout.unbucket_stages(), {"$match": stored_filter}]
+        if sort:
+            pipeline.append({"$sort": dict(document_layout.sort(sort))})
+        if limit:
+            pipeline.append({"$limit": limit})
+        if stored_projection:
+            pipeline.append({"$project": stored_projection})
+        results.extend(document_layout.to_readable(document) for document in buckets.aggregate(pipeline))
+        # Each list is sorted on its own; sort the combined one (stable, last key first)
+        for name, direction in reversed(sort or []):
+            results.sort(key=lambda document: _sort_key(document, name), reverse=direction < 0)
+    return results[:limit] if limit else results
+
+def count_applications(mongo_client: MongoClient) -> int:
+    """
+    Counts all applications, including the ones packed into time buckets.
+    """
+    db = mongo_client['loan_prediction_db']
+    bucketed = list(db[document_layout.BUCKET_COLLECTION].aggregate([{"$group": {"_id": None, "n": {"$sum": "$n"}}}]))
+    return db['loanApplications'].count_documents({}) + (bucketed[0]["n"] if bucketed else 0)
+
+def _sort_key(document: dict, path: str):
+    for part in path.split("."):
+        document = document.get(part) if isinstance(document, dict) else None
+    # Missing values sort first, as in MongoDB
+    return (document is not None, document if document is not None else 0)
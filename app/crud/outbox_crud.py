@@ -0,0 +1,68 @@
+# app/crud/outbox_crud.py
+
+import json
+from datetime import datetime
+from sqlalchemy import delete, exists, func, update
+from sqlalchemy.orm import Session, aliased
+from app.db import sql_models
+from app.models import pydantic_schemas
+
+CREATE_DOCUMENT = "create_document"
+UPDATE_STATUS = "update_status"
+
+def application_entry(application_data: pydantic_schemas.ApplicationCreate, predicted_status: str, sql_loan_id: int):
+    """
+    Outbox row values for creating the MongoDB document of a new application.
+    """
+    payload = {
+        "application": application_data.model_dump(),
+        "status": predicted_status,
+        "ingested_at": datetime.now().isoformat(),
+    }
+    return {"loan_id": sql_loan_id, "operation": CREATE_DOCUMENT, "payload": json.dumps(payload)}
+
+def status_entry(loan_id: int, status: str):
+    """
+    Outbox row values for mirroring a loan status change to MongoDB.
+    """
+    return {"loan_id": loan_id, "operation": UPDATE_STATUS, "payload": json.dumps({"status": status})}
+
+def get_batch(db: Session, limit: int, max_attempts: int):
+    """
+    Reads the oldest undelivered entries in commit order, skipping ones that keep failing.
+    Later entries for the loan of a skipped entry are held back as well, so a status update is
+    never delivered without the document it updates, or ahead of an older status.
+    """
+    Outbox = sql_models.MongoOutbox
+    Stuck = aliased(Outbox)
+    held_back = exists().where(Stuck.loan_id == Outbox.loan_id, Stuck.outbox_id < Outbox.outbox_id, Stuck.attempts >= max_attempts)
+    return (
+        db.query(Outbox)
+        .filter(Outbox.attempts < max_attempts, ~held_back)
+        .order_by(Outbox.outbox_id)
+        .limit(limit)
+        .all()
+    )
+
+def count_stuck(db: Session, max_attempts: int) -> int:
+    """
+    Entries that failed max_attempts times and wait for someone to look at them.
+    """
+    return db.query(func.count()).select_from(sql_models.MongoOutbox).filter(sql_models.MongoOutbox.attempts >= max_attempts).scalar()
+
+def delete_entries(db: Session, outbox_ids: list):
+    """
+    Removes delivered entries. The caller commits.
+    """
+    if outbox_ids:
+        db.execute(delete(sql_models.MongoOutbox).where(sql_models.MongoOutbox.outbox_id.in_(outbox_ids)))
+
+def record_failure(db: Session, outbox_id: int, error: str):
+    """
+    Counts a failed delivery attempt for an entry. The caller commits.
+    """
+    db.execute(
+        update(sql_models.MongoOutbox)
+        .where(sql_models.MongoOutbox.outbox_id == outbox_id)
+        .values(attempts=sql_models.MongoOutbox.attempts + 1, last_error=error[:500])
+    )
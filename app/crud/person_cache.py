@@ -0,0 +1,82 @@
+# app/crud/person_cache.py
+"""
+Serialized GET /persons/{person_id} responses, kept per process.
+
+A person never changes after it is created, only the status of their loans does, and every
+status change gets a row in loan_status_log (the trg_log_loan_status trigger), whichever
+process makes it: API workers, the batch workers or a script. So each entry remembers the
+last log_id when it was read, and a hit is only served after checking that no log row since
+then is about one of its loans (sql_crud.loan_changes: a range scan of the newer log rows
+instead of loading and serializing the person).
+"""
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import NamedTuple
+
+# --- Configuration ---
+CACHE_SIZE = int(os.getenv("PERSON_CACHE_SIZE", "10000"))  # entries; 0 disables the cache
+CACHE_TTL = float(os.getenv("PERSON_CACHE_TTL", "30"))      # seconds an unused entry is kept
+
+
+class Entry(NamedTuple):
+    body: bytes          # the JSON response
+    log_id: int          # last loan_status_log id when the person was read
+    loan_ids: tuple      # the person's loans
+    expires_at: float
+
+
+# person_id -> Entry, least recently used first
+_entries = OrderedDict()
+_lock = threading.Lock()
+
+
+def get(person_id: int):
+    """
+    The cached Entry for a person, or None. Check it with sql_crud.loan_changes before serving it.
+    """
+    if CACHE_SIZE <= 0:
+        return None
+    with _lock:
+        entry = _entries.get(person_id)
+        if entry is None:
+            return None
+        if entry.expires_at <= time.monotonic():
+            del _entries[person_id]
+            return None
+        _entries.move_to_end(person_id)
+        return entry
+
+def put(person_id: int, body: bytes, log_id: int, loan_ids):
+    """
+    Caches a response body read when `log_id` was the last loan_status_log id (read before the person).
+    """
+    if CACHE_SIZE <= 0:
+        return
+    with _lock:
+        _entries[person_id] = Entry(body, log_id, tuple(loan_ids), time.monotonic() + CACHE_TTL)
+        _entries.move_to_end(person_id)
+        while len(_entries) > CACHE_SIZE:
+            _entries.popitem(last=False)
+
+def confirm(person_id: int, entry: Entry, log_id: int):
+    """
+    Records that `entry` is still current at `log_id`, so the next check starts from there.
+    """
+    with _lock:
+        if _entries.get(person_id) is entry:
+            _entries[person_id] = entry._replace(log_id=log_id)
+
+def invalidate(*person_ids):
+    """
+    Drops the cached responses of the given persons (writes made by this process, so the
+    next read does not need the check to find out).
+    """
+    with _lock:
+        for person_id in person_ids:
+            _entries.pop(person_id, None)
+
+def clear():
+    with _lock:
+        _entries.clear()
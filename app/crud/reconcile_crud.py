@@ -0,0 +1,249 @@
+# app/crud/reconcile_crud.py
+"""
+Range digests of the loan table and of loanApplications, for app/workers/reconcile.py.
+
+Both sides hash every loan with the same integer arithmetic (SQL on one side, an aggregation
+pipeline on the other) and sum the hashes per loan_id range, so a range is compared with one
+(count, digest) pair instead of its rows. The hash covers the fields MongoDB mirrors from SQL:
+the status, the amount and the interest rate (both in hundredths).
+
+The MongoDB side hashes documents after mapping them to the readable shape
+(app/crud/document_layout.py), so both storage layouts give the same digests.
+
+Every intermediate value stays below 2**53, so it is exact in either database, even where an
+operator goes through a double.
+"""
+from bson import ObjectId
+from pymongo import DeleteOne, MongoClient, UpdateOne
+from sqlalchemy import Integer, case, cast, func, select
+from sqlalchemy.orm import Session
+
+from app.crud import analytics_crud, document_layout
+from app.db import sql_models
+
+# --- Row hash ---
+HASH_MODULUS = 67108859  # prime below 2**26
+# One multiplier per hashed field (loan_id, status, amount, interest rate), then one for mixing
+HASH_MULTIPLIERS = (2654435, 1597333, 3266489, 668265)
+HASH_MIX = 1181783
+# Status strings as small integers; anything else hashes as OTHER_STATUS, NULL as 0
+STATUS_CODES = {"Pending": 1, "Approved": 2, "Rejected": 3}
+OTHER_STATUS = 9
+
+Loan = sql_models.Loan
+
+
+def hundredths(value) -> int:
+    """
+    The value in hundredths, as the digests compute it (add a half, truncate).
+    """
+    return int((value or 0) * 100 + 0.5)
+
+def status_code(status) -> int:
+    if status is None:
+        return 0
+    return STATUS_CODES.get(status, OTHER_STATUS)
+
+def row_values(status, amount, interest_rate) -> tuple:
+    """
+    The hashed fields of one loan, normalized the way both digests see them.
+    """
+    return status_code(status), hundredths(amount), hundredths(interest_rate)
+
+
+def _mix(terms: list, mod, add, multiply, square):
+    """
+    Builds the row hash from the field terms with the given operators, so SQL and MongoDB
+    share one definition. The square makes it non-linear: two loans swapping statuses change the sum.
+    """
+    x = mod(add([mod(multiply(mod(term), k)) for term, k in zip(terms, HASH_MULTIPLIERS)]))
+    return mod(add([multiply(mod(square(x)), HASH_MIX), x]))
+
+
+# --- SQL side ---
+def _sql_row_hash():
+    status = case(
+        *[(Loan.loan_status == name, code) for name, code in STATUS_CODES.items()],
+        (Loan.loan_status.is_(None), 0),
+        else_=OTHER_STATUS,
+    )
+    terms = [
+        Loan.loan_id,
+        status,
+        cast(func.coalesce(Loan.loan_amount, 0) * 100 + 0.5, Integer),
+        cast(func.coalesce(Loan.loan_interest_rate, 0) * 100 + 0.5, Integer),
+    ]
+    return _mix(
+        terms,
+        mod=lambda e: e % HASH_MODULUS,
+        add=lambda es: sum(es[1:], es[0]),
+        multiply=lambda e, k: e * k,
+        square=lambda e: e * e,
+    )
+
+def sql_key_bounds(db: Session) -> tuple:
+    return db.execute(select(func.min(Loan.loan_id), func.max(Loan.loan_id))).one()
+
+def sql_range_digests(db: Session, low: int, high: int, width: int) -> dict:
+    """
+    {bucket: (count, digest)} for loan_id in [low, high), in buckets of `width` ids.
+    """
+    bucket = ((Loan.loan_id - low) // width).label("bucket")
+    query = (
+        select(bucket, func.count(), func.sum(_sql_row_hash()))
+        .where(Loan.loan_id >= low, Loan.loan_id < high)
+        .group_by(bucket)
+    )
+    return {int(b): (int(count), int(digest)) for b, count, digest in db.execute(query)}
+
+def sql_range_rows(db: Session, low: int, high: int) -> dict:
+    """
+    {loan_id: (status, amount, interest rate)} for loan_id in [low, high).
+    """
+    query = (
+        select(Loan.loan_id, Loan.loan_status, Loan.loan_amount, Loan.loan_interest_rate)
+        .where(Loan.loan_id >= low, Loan.loan_id < high)
+    )
+    return {loan_id: tuple(values) for loan_id, *values in db.execute(query)}
+
+def sql_application_rows(db: Session, loan_ids: list) -> list:
+    """
+    Loans joined with their person, with the columns a loanApplications document is built from.
+    """
+    Person = sql_models.Person
+    query = (
+        select(
+            Loan.loan_id,
+            Loan.loan_status,
+            func.coalesce(Loan.loan_amount, 0).label("loan_amount"),
+            func.coalesce(Loan.loan_interest_rate, 0).label("loan_interest_rate"),
+            Loan.loan_intent_id,
+            func.coalesce(Person.age, 0).label("age"),
+            func.coalesce(Person.income, 0).label("income"),
+            func.coalesce(Person.employment_experience, 0).label("employment_experience"),
+            func.coalesce(Person.credit_score, 0).label("credit_score"),
+            func.coalesce(Person.credit_history_length, 0).label("credit_history_length"),
+            func.coalesce(Person.home_ownership_id, 0).label("home_ownership_id"),
+            Person.gender_id,
+            Person.education_id,
+        )
+        .join(Person, Person.person_id == Loan.person_id)
+        .where(Loan.loan_id.in_(loan_ids))
+        .order_by(Loan.loan_id)
+    )
+    return [dict(row) for row in db.execute(query).mappings()]
+
+
+# --- MongoDB side ---
+def _loan_applications(mongo_client: MongoClient):
+    return mongo_client['loan_prediction_db']['loanApplications']
+
+def _mongo_row_hash():
+    status = {"$switch": {
+        "branches": [{"case": {"$eq": ["$loanStatus", name]}, "then": code} for name, code in STATUS_CODES.items()]
+                    + [{"case": {"$eq": [{"$ifNull": ["$loanStatus", None]}, None]}, "then": 0}],
+        "default": OTHER_STATUS,
+    }}
+    terms = [
+        "$sql_loan_id",
+        status,
+        {"$toLong": {"$add": [{"$multiply": [{"$ifNull": ["$loanDetails.amount", 0]}, 100]}, 0.5]}},
+        {"$toLong": {"$add": [{"$multiply": [{"$ifNull": ["$loanDetails.interestRate", 0]}, 100]}, 0.5]}},
+    ]
+    return _mix(
+        terms,
+        mod=lambda e: {"$mod": [e, HASH_MODULUS]},
+        add=lambda es: {"$add": es},
+        multiply=lambda e, k: {"$multiply": [e, k]},
+        square=lambda e: {"$multiply": [e, e]},
+    )
+
+def mongo_key_bounds(mongo_client: MongoClient) -> tuple:
+    """
+    The lowest and highest sql_loan_id (two index lookups), or (None, None).
+    """
+    collection = _loan_applications(mongo_client)
+    linked = {"sql_loan_id": {"$type": "number"}}
+    bounds = []
+    for direction in (1, -1):
+        document = next(iter(collection.find(linked, {"sql_loan_id": 1}).sort("sql_loan_id", direction).limit(1)), None)
+        bounds.append(int(document["sql_loan_id"]) if document else None)
+    return tuple(bounds)
+
+def mongo_range_digests(mongo_client: MongoClient, low: int, high: int, width: int) -> dict:
+    """
+    {bucket: (count, digest)} for sql_loan_id in [low, high), in buckets of `width` ids.
+    """
+    pipeline = [
+        {"$match": {"sql_loan_id": {"$gte": low, "$lt": high}}},
+        *document_layout.readable_stages(["loanStatus", "loanDetails.amount", "loanDetails.interestRate"]),
+        {"$group": {
+            "_id": {"$trunc": {"$divide": [{"$subtract": ["$sql_loan_id", low]}, width]}},
+            "count": {"$sum": 1},
+            "digest": {"$sum": _mongo_row_hash()},
+        }},
+    ]
+    return {
+        int(group["_id"]): (int(group["count"]), int(group["digest"]))
+        for group in _loan_applications(mongo_client).aggregate(pipeline)
+    }
+
+def mongo_range_documents(mongo_client: MongoClient, low: int, high: int) -> list:
+    projection = document_layout.projection({**analytics_crud.ROLLUP_PROJECTION, "_id": 1, "loanDetails.amount": 1, "loanDetails.interestRate": 1})
+    return [
+        document_layout.to_readable(document)
+        for document in _loan_applications(mongo_client).find({"sql_loan_id": {"$gte": low, "$lt": high}}, projection)
+    ]
+
+def count_unlinked(mongo_client: MongoClient) -> int:
+    """
+    Documents without an sql_loan_id (e.g. loaded from the CSV by populate_mongodb.py); never reconciled.
+    """
+    return _loan_applications(mongo_client).count_documents({"sql_loan_id": None})
+
+
+# --- Repairs ---
+# Repairs are plain JSON-able dicts, so they can be written out for review and applied later:
+#   {"op": "update", "loan_id": 7, "set": {"loanStatus": "Approved", ...}}
+#   {"op": "insert", "loan_id": 7, "document": {...}}   (rebuilt from the SQL rows)
+#   {"op": "delete", "_id": "..."}                       (no SQL loan, or a duplicate)
+def _document_id(value):
+    return ObjectId(value) if ObjectId.is_valid(value) else value
+
+def repair_operation(repair: dict):
+    if repair["op"] == "update":
+        return UpdateOne({"sql_loan_id": repair["loan_id"]}, {"$set": document_layout.stored_fields(repair["set"])})
+    if repair["op"] == "insert":
+        return UpdateOne({"sql_loan_id": repair["loan_id"]}, {"$setOnInsert": document_layout.to_stored(repair["document"])}, upsert=True)
+    if repair["op"] == "delete":
+        return DeleteOne({"_id": _document_id(repair["_id"])})
+    raise ValueError(f"Unknown repair: {repair['op']}")
+
+def apply_repairs(mongo_client: MongoClient, repairs: list):
+    """
+    Applies repairs with one unordered bulk_write and moves the rollup counts to match.
+    """
+    if not repairs:
+        return
+    collection = _loan_applications(mongo_client)
+    if analytics_crud.ROLLUPS_ENABLED:
+        delete_ids = [_document_id(r["_id"]) for r in repairs if r["op"] == "delete"]
+        update_ids = [r["loan_id"] for r in repairs if r["op"] == "update" and "loanStatus" in r["set"]]
+        insert_ids = [r["loan_id"] for r in repairs if r["op"] == "insert"]
+        projection = document_layout.projection({**analytics_crud.ROLLUP_PROJECTION, "_id": 1})
+        deleted = [document_layout.to_readable(d) for d in collection.find({"_id": {"$in": delete_ids}}, projection)] if delete_ids else []
+        updated = [document_layout.to_readable(d) for d in collection.find({"sql_loan_id": {"$in": update_ids}}, projection)] if update_ids else []
+        # An insert whose document already exists (e.g. written since the check) changes nothing
+        existing = {d["sql_loan_id"] for d in collection.find({"sql_loan_id": {"$in": insert_ids}}, {"sql_loan_id": 1})} if insert_ids else set()
+    collection.bulk_write([repair_operation(r) for r in repairs], ordered=False)
+    if analytics_crud.ROLLUPS_ENABLED:
+        delta = analytics_crud.RollupDelta()
+        for document in deleted:
+            delta.add(document, sign=-1)
+        status_by_loan = {r["loan_id"]: r["set"]["loanStatus"] for r in repairs if r["op"] == "update" and "loanStatus" in r["set"]}
+        for document in updated:
+            delta.change_status(document, status_by_loan[document["sql_loan_id"]])
+        for repair in repairs:
+            if repair["op"] == "insert" and repair["loan_id"] not in existing:
+                delta.add(document_layout.normalized(repair["document"]))
+        analytics_crud.apply_delta(mongo_client, delta)
@@ -1,20 +1,43 @@
 # app/crud/sql_crud.py
 
-from sqlalchemy.orm import Session
+from sqlalchemy import select, insert, update, bindparam, func
+from sqlalchemy.orm import Session, joinedload
 from app.db import sql_models
 from app.models import pydantic_schemas
+from app.crud import lookup_cache, outbox_crud, person_cache
 
 def get_person(db: Session, person_id: int):
     """
     Reads a single person by their ID from the SQL database.
+    Loans are loaded in the same query, so serializing the response does not trigger a lazy load.
     """
-    return db.query(sql_models.Person).filter(sql_models.Person.person_id == person_id).first()
+    return (
+        db.query(sql_models.Person)
+        .options(joinedload(sql_models.Person.loans))
+        .filter(sql_models.Person.person_id == person_id)
+        .first()
+    )
 
-def create_person_and_loan(db: Session, application_data: pydantic_schemas.ApplicationCreate, predicted_status: str):
+def loan_changes_query(after_log_id: int, loan_ids):
     """
-    Creates a new person and a new loan record in the database.
+    (last loan_status_log id, whether a row after `after_log_id` is about one of `loan_ids`).
+    """
+    Log = sql_models.LoanStatusLog
+    changed = select(Log.log_id).where(Log.log_id > after_log_id, Log.loan_id.in_(loan_ids)).exists()
+    return select(func.coalesce(select(func.max(Log.log_id)).scalar_subquery(), 0), changed)
+
+def loan_changes(db: Session, after_log_id: int, loan_ids) -> tuple:
+    """
+    Checks a cached person (app/crud/person_cache.py) against status changes made by any process.
+    """
+    last_log_id, changed = db.execute(loan_changes_query(after_log_id, loan_ids)).one()
+    return last_log_id, bool(changed)
+
+def _person_and_loan_data(application_data: pydantic_schemas.ApplicationCreate, predicted_status: str, lookup_ids: dict):
+    """
+    Maps one application to the column values of its person and loan rows.
+    `lookup_ids` holds its gender_id, education_id and loan_intent_id (see lookup_cache.application_ids).
     """
-    # Create Person record
     person_data = {
         "age": application_data.age,
         "income": application_data.income,
@@ -22,38 +45,261 @@ def create_person_and_loan(db: Session, application_data: pydantic_schemas.Appli
         "credit_score": application_data.credit_score,
         "credit_history_length": application_data.credit_history_length,
         "home_ownership_id": application_data.home_ownership_id,
-        "gender_id": 1,
-        "education_id": 1
+        "gender_id": lookup_ids["gender_id"],
+        "education_id": lookup_ids["education_id"]
     }
-    db_person = sql_models.Person(**person_data)
-    db.add(db_person)
-    db.commit()
-    db.refresh(db_person)
-
-    # Create Loan record
     loan_data = {
         "loan_amount": application_data.loan_amount,
         "loan_interest_rate": application_data.loan_interest_rate,
         "loan_percent_income": application_data.loan_amount / application_data.income if application_data.income > 0 else 0,
         "loan_status": predicted_status,
         "previous_loan_defaults": 0,
-        "loan_intent_id": 1
+        "loan_intent_id": lookup_ids["loan_intent_id"]
     }
-    db_loan = sql_models.Loan(**loan_data, person_id=db_person.person_id)
-    db.add(db_loan)
+    return person_data, loan_data
+
+def create_person_and_loan(db: Session, application_data: pydantic_schemas.ApplicationCreate, predicted_status: str, outbox: bool = False):
+    """
+    Creates a new person and a new loan record in the database.
+    Both rows are flushed and committed in a single transaction.
+    With outbox=True the MongoDB document is queued in mongo_outbox in that same transaction.
+    """
+    lookup_ids = lookup_cache.application_ids([application_data])[0]
+    person_data, loan_data = _person_and_loan_data(application_data, predicted_status, lookup_ids)
+    db_person = sql_models.Person(**person_data)
+    db_loan = sql_models.Loan(**loan_data)
+    db_person.loans.append(db_loan)
+    db.add(db_person)
+    if outbox:
+        db.flush()
+        db.add(sql_models.MongoOutbox(**outbox_crud.application_entry(application_data, predicted_status, db_loan.loan_id)))
     db.commit()
+    person_cache.invalidate(db_person.person_id)
     db.refresh(db_person)
 
     return db_person
 
-def update_loan_status(db: Session, loan_id: int, status: str):
+def create_persons_and_loans(db: Session, applications: list, predicted_status: str, outbox: bool = False):
+    """
+    Creates a person and a loan for every application in one transaction.
+    Rows go in as multi-row INSERT ... RETURNING statements and there is a single commit for the whole batch.
+    With outbox=True the MongoDB documents are queued in mongo_outbox in that same transaction.
+    Returns a list of (person_id, loan_id) in the order of `applications`.
+    """
+    if not applications:
+        return []
+    lookup_ids = lookup_cache.application_ids(applications)
+    rows = [_person_and_loan_data(application, predicted_status, ids) for application, ids in zip(applications, lookup_ids)]
+    Person, Loan = sql_models.Person, sql_models.Loan
+    connection = db.connection()
+    try:
+        person_ids = list(connection.execute(
+            insert(Person.__table__).returning(Person.person_id, sort_by_parameter_order=True),
+            [person_data for person_data, _ in rows],
+        ).scalars())
+        loan_ids = list(connection.execute(
+            insert(Loan.__table__).returning(Loan.loan_id, sort_by_parameter_order=True),
+            [{**loan_data, "person_id": person_id} for (_, loan_data), person_id in zip(rows, person_ids)],
+        ).scalars())
+        if outbox:
+            connection.execute(
+                insert(sql_models.MongoOutbox.__table__),
+                [outbox_crud.application_entry(application, predicted_status, loan_id) for application, loan_id in zip(applications, loan_ids)],
+            )
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    person_cache.invalidate(*person_ids)
+    return list(zip(person_ids, loan_ids))
+
+def update_loan_status(db: Session, loan_id: int, status: str, outbox: bool = False):
     """
     Updates the status of an existing loan in the SQL database.
+    With outbox=True the MongoDB update is queued in mongo_outbox in the same transaction.
     """
     db_loan = db.query(sql_models.Loan).filter(sql_models.Loan.loan_id == loan_id).first()
     if not db_loan:
         return None
     db_loan.loan_status = status
+    if outbox:
+        db.add(sql_models.MongoOutbox(**outbox_crud.status_entry(loan_id, status)))
     db.commit()
+    person_cache.invalidate(db_loan.person_id)
     db.refresh(db_loan)
-    return db_loan
\ No newline at end of file
+    return db_loan
+
+def get_pending_loan_records(db: Session, after_loan_id: int, limit: int):
+    """
+    Reads the next chunk of Pending loans joined with their person, ordered by loan_id.
+    Uses keyset pagination (loan_id > after_loan_id) so every chunk is an index range scan.
+    """
+    Person, Loan = sql_models.Person, sql_models.Loan
+    query = (
+        select(
+            Loan.loan_id,
+            Loan.person_id,
+            func.coalesce(Loan.loan_amount, 0).label("loan_amount"),
+            func.coalesce(Loan.loan_interest_rate, 0).label("loan_interest_rate"),
+            Loan.loan_percent_income,
+            func.coalesce(Loan.previous_loan_defaults, 0).label("previous_loan_defaults"),
+            Loan.loan_intent_id,
+            func.coalesce(Person.age, 0).label("age"),
+            func.coalesce(Person.income, 0).label("income"),
+            func.coalesce(Person.employment_experience, 0).label("employment_experience"),
+            func.coalesce(Person.credit_score, 0).label("credit_score"),
+            func.coalesce(Person.credit_history_length, 0).label("credit_history_length"),
+            Person.home_ownership_id,
+            Person.gender_id,
+            Person.education_id,
+        )
+        .join(Person, Person.person_id == Loan.person_id)
+        .where(Loan.loan_status == "Pending", Loan.loan_id > after_loan_id)
+        .order_by(Loan.loan_id)
+        .limit(limit)
+    )
+    return [dict(row) for row in db.execute(query).mappings()]
+
+def bulk_update_loan_statuses(db: Session, updates: list):
+    """
+    Sets the status of many Pending loans with a single executemany UPDATE.
+    `updates` is a list of {"loan_id": ..., "loan_status": ...}. The caller commits.
+    """
+    if not updates:
+        return
+    statement = (
+        update(sql_models.Loan.__table__)
+        .where(sql_models.Loan.loan_id == bindparam("b_loan_id"), sql_models.Loan.loan_status == "Pending")
+        .values(loan_status=bindparam("b_loan_status"))
+    )
+    db.connection().execute(
+        statement,
+        [{"b_loan_id": u["loan_id"], "b_loan_status": u["loan_status"]} for u in updates],
+    )
+
+def decide_pending_loans(db: Session, decision, match, outbox: bool = False):
+    """
+    Sets every Pending loan that `match` selects to `decision` (SQL expressions over loan
+    joined with person, see app/ml/approval_rules.py) in one UPDATE ... FROM ... RETURNING.
+    Returns [{"loan_id", "person_id", "loan_status"}] for the changed loans. The caller commits.
+    """
+    Person, Loan = sql_models.Person, sql_models.Loan
+    statement = (
+        update(Loan)
+        .where(Loan.loan_status == "Pending", Loan.person_id == Person.person_id, match)
+        .values(loan_status=decision)
+        .returning(Loan.loan_id, Loan.person_id, Loan.loan_status)
+        .execution_options(synchronize_session=False)
+    )
+    decided = [dict(row) for row in db.execute(statement).mappings()]
+    if outbox and decided:
+        db.execute(insert(sql_models.MongoOutbox), [outbox_crud.status_entry(row["loan_id"], row["loan_status"]) for row in decided])
+    return decided
+
+def count_pending_matches(db: Session, label, match) -> dict:
+    """
+    Counts the Pending loans `match` selects, grouped by the `label` expression (e.g. rule name).
+    """
+    Person, Loan = sql_models.Person, sql_models.Loan
+    query = (
+        select(label.label("label"), func.count())
+        .select_from(Loan)
+        .join(Person, Person.person_id == Loan.person_id)
+        .where(Loan.loan_status == "Pending", match)
+        .group_by(label)
+    )
+    return {name: count for name, count in db.execute(query)}
+
+def get_status_changes(db: Session, after_log_id: int, limit: int):
+    """
+    Reads the next loan_status_log rows after `after_log_id`, in log_id order (a primary-key range scan).
+    """
+    Log = sql_models.LoanStatusLog
+    query = (
+        select(Log.log_id, Log.loan_id, Log.new_status)
+        .where(Log.log_id > after_log_id)
+        .order_by(Log.log_id)
+        .limit(limit)
+    )
+    return [dict(row) for row in db.execute(query).mappings()]
+
+def last_status_change_id(db: Session) -> int:
+    return db.execute(select(func.max(sql_models.LoanStatusLog.log_id))).scalar() or 0
+
+# --- Listing (keyset pagination on the primary key) ---
+LOAN_LIST_COLUMNS = (
+    sql_models.Loan.loan_id,
+    sql_models.Loan.person_id,
+    sql_models.Loan.loan_amount,
+    sql_models.Loan.loan_interest_rate,
+    sql_models.Loan.loan_status,
+    sql_models.Loan.loan_percent_income,
+    sql_models.Loan.loan_intent_id,
+)
+PERSON_LIST_COLUMNS = (
+    sql_models.Person.person_id,
+    sql_models.Person.age,
+    sql_models.Person.income,
+    sql_models.Person.home_ownership_id,
+    sql_models.Person.employment_experience,
+    sql_models.Person.credit_score,
+    sql_models.Person.credit_history_length,
+)
+
+def loan_list_query(loan_status: str = None, loan_intent_id: int = None, min_income: float = None,
+                    max_income: float = None, after_id: int = 0, limit: int = None):
+    """
+    Loans with loan_id > after_id matching the filters, in loan_id order.
+    The person table is only joined when an income bound is given.
+    """
+    Person, Loan = sql_models.Person, sql_models.Loan
+    query = select(*LOAN_LIST_COLUMNS).where(Loan.loan_id > after_id)
+    if loan_status is not None:
+        query = query.where(Loan.loan_status == loan_status)
+    if loan_intent_id is not None:
+        query = query.where(Loan.loan_intent_id == loan_intent_id)
+    if min_income is not None or max_income is not None:
+        query = query.join(Person, Person.person_id == Loan.person_id)
+        if min_income is not None:
+            query = query.where(Person.income >= min_income)
+        if max_income is not None:
+            query = query.where(Person.income <= max_income)
+    query = query.order_by(Loan.loan_id)
+    return query.limit(limit) if limit is not None else query
+
+def person_list_query(loan_status: str = None, loan_intent_id: int = None, min_income: float = None,
+                      max_income: float = None, after_id: int = 0, limit: int = None):
+    """
+    Persons with person_id > after_id matching the filters, in person_id order.
+    Status and intent match persons that have at least one such loan.
+    """
+    Person, Loan = sql_models.Person, sql_models.Loan
+    query = select(*PERSON_LIST_COLUMNS).where(Person.person_id > after_id)
+    if min_income is not None:
+        query = query.where(Person.income >= min_income)
+    if max_income is not None:
+        query = query.where(Person.income <= max_income)
+    if loan_status is not None or loan_intent_id is not None:
+        loans = select(Loan.loan_id).where(Loan.person_id == Person.person_id)
+        if loan_status is not None:
+            loans = loans.where(Loan.loan_status == loan_status)
+        if loan_intent_id is not None:
+            loans = loans.where(Loan.loan_intent_id == loan_intent_id)
+        query = query.where(loans.exists())
+    query = query.order_by(Person.person_id)
+    return query.limit(limit) if limit is not None else query
+
+def list_rows(db: Session, query) -> list:
+    """
+    Runs a list query and returns its rows as dicts (one page).
+    """
+    return [dict(row) for row in db.execute(query).mappings()]
+
+def stream_rows(db: Session, query, chunk_size: int = 5000):
+    """
+    Yields the rows of a list query as lists of dicts, chunk_size rows at a time,
+    from a server-side cursor, so the full result is never held in memory.
+    """
+    result = db.execute(query.execution_options(yield_per=chunk_size))
+    for partition in result.mappings().partitions():
+        yield [dict(row) for row in partition]
@@ -1,24 +1,118 @@
-from sqlalchemy import create_engine
+import threading
+from sqlalchemy import create_engine, event, text
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.ext.declarative import declarative_base
-from pymongo import MongoClient
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from pymongo import MongoClient, AsyncMongoClient
 import os
-from dotenv import load_dotenv
-
-# Load environment variables from .env file
-load_dotenv()
+from app.monitoring.instrumentation import instrument_engine, mongo_event_listeners
 
 # --- SQL Database (SQLite) ---
-SQLALCHEMY_DATABASE_URL = "sqlite:///./loan_database.db"
+SQLALCHEMY_DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./loan_database.db")
 engine = create_engine(
     SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}
 )
+
+# Applied to every new pooled connection: WAL lets readers run while a writer commits,
+# synchronous=NORMAL is durable under WAL with far fewer fsyncs, and mmap/cache keep hot pages in memory.
+SQLITE_PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "mmap_size": 268435456,  # 256 MB
+    "cache_size": -65536,    # 64 MB (negative = KiB)
+}
+
+def apply_sqlite_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    for name, value in SQLITE_PRAGMAS.items():
+        cursor.execute(f"PRAGMA {name}={value}")
+    cursor.close()
+
+event.listen(engine, "connect", apply_sqlite_pragmas)
+instrument_engine(engine)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
+# Async engine over the same file, used when the API runs with API_MODE=async
+ASYNC_SQLALCHEMY_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL", SQLALCHEMY_DATABASE_URL.replace("sqlite://", "sqlite+aiosqlite://", 1))
+async_engine = create_async_engine(ASYNC_SQLALCHEMY_DATABASE_URL)
+event.listen(async_engine.sync_engine, "connect", apply_sqlite_pragmas)
+instrument_engine(async_engine.sync_engine)
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
 # --- NoSQL Database (MongoDB) ---
-MONGO_URI = os.getenv("MONGO_URI")
-mongo_client = MongoClient(MONGO_URI)
+# Created on first use (or by the API's startup) rather than at import; see connect_mongo()
+mongo_client = None
+async_mongo_client = None
+_mongo_lock = threading.Lock()
+
+def connect_mongo():
+    """
+    Creates the MongoDB clients once, reading MONGO_URI from the environment (or .env, loaded by app/__init__.py).
+    """
+    global mongo_client, async_mongo_client
+    with _mongo_lock:
+        if mongo_client is None:
+            mongo_uri = os.getenv("MONGO_URI")
+            mongo_client = MongoClient(mongo_uri, event_listeners=mongo_event_listeners())
+            async_mongo_client = AsyncMongoClient(mongo_uri, event_listeners=mongo_event_listeners())
+    return mongo_client
+
+def close_mongo():
+    global mongo_client, async_mongo_client
+    with _mongo_lock:
+        if mongo_client is not None:
+            mongo_client.close()
+        # AsyncMongoClient.close() is a coroutine; dropping the reference is enough at shutdown
+        mongo_client = async_mongo_client = None
+
+def reset_after_fork():
+    """
+    Call first thing in a forked worker. Pooled SQLite connections and MongoDB clients are not
+    fork-safe, so the worker forgets the parent's (without closing them: they are not its own)
+    and opens its own on first use.
+    """
+    global mongo_client, async_mongo_client, _mongo_lock
+    engine.dispose(close=False)
+    async_engine.sync_engine.dispose(close=False)
+    mongo_client = async_mongo_client = None
+    _mongo_lock = threading.Lock()
+
+# --- Startup ---
+def init_sql():
+    """
+    Creates missing tables, then missing indexes on existing tables.
+    """
+    from app.db import sql_models, indexes
+
+    sql_models.Base.metadata.create_all(bind=engine)
+    return indexes.ensure_sql_indexes(engine)
+
+def warm_sql_pool(connections: int = None):
+    """
+    Opens pooled connections up front (running the connect PRAGMAs) so the first requests do not.
+    """
+    connections = connections or getattr(engine.pool, "size", lambda: 1)()
+    opened = [engine.connect() for _ in range(connections)]
+    for connection in opened:
+        connection.execute(text("SELECT 1"))
+        connection.close()
+    return connections
+
+async def warm_async_sql_pool(connections: int = None):
+    connections = connections or getattr(async_engine.sync_engine.pool, "size", lambda: 1)()
+    opened = [await async_engine.connect() for _ in range(connections)]
+    for connection in opened:
+        await connection.execute(text("SELECT 1"))
+        await connection.close()
+    return connections
+
+# How writes reach MongoDB: "inline" inside the request, "outbox" through the
+# mongo_outbox table drained by app/workers/outbox_dispatcher.py, or "cdc": documents are
+# created inline and status changes follow loan_status_log (app/workers/cdc_tailer.py)
+MONGO_SYNC_MODE = os.getenv("MONGO_SYNC_MODE", "inline")
+USE_OUTBOX = MONGO_SYNC_MODE == "outbox"
+USE_CDC = MONGO_SYNC_MODE == "cdc"
 
 # Dependency to get a DB session for SQL
 def get_db():
@@ -30,4 +124,14 @@ def get_db():
 
 # Dependency to get a MongoDB client
 def get_mongo_client():
-    return mongo_client
\ No newline at end of file
+    return mongo_client if mongo_client is not None else connect_mongo()
+
+# Async counterparts of the dependencies above
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+def get_async_mongo_client():
+    if async_mongo_client is None:
+        connect_mongo()
+    return async_mongo_client
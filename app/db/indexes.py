@@ -0,0 +1,139 @@
+"""
+Creates and verifies the indexes both stores need, and reports app queries that no index covers.
+
+Run from the project root:
+    python -m app.db.indexes
+"""
+from sqlalchemy import text
+from pymongo import MongoClient, IndexModel, ASCENDING, DESCENDING
+
+from app.crud import document_layout
+from app.db import sql_models
+from app.db.database import engine, get_mongo_client
+
+# --- MongoDB indexes on loanApplications ---
+# Keys are readable paths, mapped to the stored layout (app/crud/document_layout.py)
+def _index(keys: list, name: str) -> IndexModel:
+    return IndexModel(document_layout.sort(keys), name=name)
+
+MONGO_INDEXES = [
+    _index([("sql_loan_id", ASCENDING)], name="sql_loan_id_1"),
+    _index([("loanStatus", ASCENDING)], name="loanStatus_1"),
+    _index([("personDetails.gender", ASCENDING), ("personDetails.income", DESCENDING)], name="gender_1_income_-1"),
+    _index([("personDetails.income", ASCENDING), ("personDetails.age", ASCENDING)], name="income_1_age_1"),
+    _index([("personDetails.age", ASCENDING)], name="age_1"),
+    _index([("loanDetails.intent", ASCENDING)], name="intent_1"),
+]
+
+# --- Query patterns issued by the app, checked against the indexes ---
+# SQL patterns are checked with EXPLAIN QUERY PLAN; any full SCAN or temp B-tree sort is reported.
+SQL_QUERY_PATTERNS = {
+    "sql_crud.get_person": "SELECT * FROM person WHERE person_id = 1",
+    "Person.loans relationship load": "SELECT * FROM loan WHERE person_id = 1",
+    "sql_crud.update_loan_status": "SELECT * FROM loan WHERE loan_id = 1",
+    "sql_crud.get_pending_loan_records": (
+        "SELECT * FROM loan JOIN person ON person.person_id = loan.person_id "
+        "WHERE loan.loan_status = 'Pending' AND loan.loan_id > 0 ORDER BY loan.loan_id LIMIT 1000"
+    ),
+    "cdc_tailer (sql_crud.get_status_changes)": (
+        "SELECT log_id, loan_id, new_status FROM loan_status_log WHERE log_id > 0 ORDER BY log_id LIMIT 1000"
+    ),
+    "GET /loans (status + income filters)": (
+        "SELECT loan.* FROM loan JOIN person ON person.person_id = loan.person_id "
+        "WHERE loan.loan_id > 0 AND loan.loan_status = 'Pending' AND person.income >= 0 ORDER BY loan.loan_id LIMIT 100"
+    ),
+    "GET /persons (loan status filter)": (
+        "SELECT * FROM person WHERE person.person_id > 0 AND EXISTS "
+        "(SELECT loan_id FROM loan WHERE loan.person_id = person.person_id AND loan.loan_status = 'Pending') "
+        "ORDER BY person.person_id LIMIT 100"
+    ),
+}
+
+# Mongo patterns list the fields a query filters/sorts on; an index covers it if its keys start with them.
+MONGO_QUERY_PATTERNS = {
+    "mongo_crud.update_document_status": ["sql_loan_id"],
+    "query_mongodb.py: filter by loanStatus": ["loanStatus"],
+    "query_mongodb.py: filter by gender": ["personDetails.gender"],
+    "query_mongodb.py: income > x and age < y": ["personDetails.income", "personDetails.age"],
+    "query_mongodb.py: intent $or": ["loanDetails.intent"],
+    "query_mongodb.py: sort by age": ["personDetails.age"],
+    "query_mongodb.py: gender + income, sorted by income": ["personDetails.gender", "personDetails.income"],
+}
+
+
+def _loan_applications(client: MongoClient = None):
+    return (client if client is not None else get_mongo_client())['loan_prediction_db']['loanApplications']
+
+
+# --- SQLite ---
+def ensure_sql_indexes(bind=engine):
+    """
+    Creates every index declared on the SQLAlchemy models that is missing from the database.
+    create_all only adds indexes for new tables, so existing databases need this step.
+    """
+    created = []
+    for table in sql_models.Base.metadata.sorted_tables:
+        for index in table.indexes:
+            with bind.begin() as connection:
+                exists = connection.execute(
+                    text("SELECT 1 FROM sqlite_master WHERE type = 'index' AND name = :name"), {"name": index.name}
+                ).first()
+                if not exists:
+                    index.create(connection)
+                    created.append(index.name)
+    return created
+
+def uncovered_sql_queries(bind=engine):
+    """
+    Returns {pattern: plan details} for app queries whose plan scans a table or sorts in a temp B-tree.
+    """
+    uncovered = {}
+    with bind.connect() as connection:
+        for name, sql in SQL_QUERY_PATTERNS.items():
+            plan = [row[-1] for row in connection.execute(text(f"EXPLAIN QUERY PLAN {sql}"))]
+            problems = [detail for detail in plan if detail.startswith("SCAN") or "TEMP B-TREE" in detail]
+            if problems:
+                uncovered[name] = problems
+    return uncovered
+
+
+# --- MongoDB ---
+def ensure_mongo_indexes(client: MongoClient = None):
+    """
+    Creates the loanApplications indexes (a no-op for the ones that already exist).
+    """
+    return _loan_applications(client).create_indexes(MONGO_INDEXES)
+
+def missing_mongo_indexes(client: MongoClient = None):
+    """
+    Returns the names of expected indexes that are not present on loanApplications.
+    """
+    existing = _loan_applications(client).index_information()
+    return [index.document["name"] for index in MONGO_INDEXES if index.document["name"] not in existing]
+
+def uncovered_mongo_queries(client: MongoClient = None):
+    """
+    Returns the query patterns whose fields are not a prefix of any loanApplications index.
+    """
+    index_fields = [[field for field, _ in info["key"]] for info in _loan_applications(client).index_information().values()]
+    return [
+        name for name, fields in MONGO_QUERY_PATTERNS.items()
+        if not any(sorted(keys[:len(fields)]) == sorted(map(document_layout.path, fields)) for keys in index_fields)
+    ]
+
+
+def main():
+    created = ensure_sql_indexes()
+    print(f"SQLite: created {len(created)} index(es) {created}")
+    for name, problems in uncovered_sql_queries().items():
+        print(f"  NOT COVERED (SQLite) {name}: {'; '.join(problems)}")
+
+    ensure_mongo_indexes()
+    missing = missing_mongo_indexes()
+    print("MongoDB: all indexes present" if not missing else f"MongoDB: missing indexes {missing}")
+    for name in uncovered_mongo_queries():
+        print(f"  NOT COVERED (MongoDB) {name}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,6 @@
-from sqlalchemy import Column, Integer, String, Float, Boolean, ForeignKey
+from sqlalchemy import Column, Integer, String, Float, Boolean, ForeignKey, Index, Text, DateTime, DDL, event, text
 from sqlalchemy.orm import relationship
+from datetime import datetime
 from .database import Base
 
 # SQLAlchemy model for the 'person' table
@@ -7,6 +8,47 @@ from sqlalchemy import Column, Integer, Float, ForeignKey
 from sqlalchemy.orm import relationship
 from .database import Base
 
+# --- Lookup tables (sql/schema.sql) ---
+# Read through app/crud/lookup_cache.py. A table created here gets the seed rows of
+# sql/schema.sql, so its ids are the same as in a database built from that script.
+class Gender(Base):
+    __tablename__ = "gender"
+    __table_args__ = {"sqlite_autoincrement": True}
+
+    gender_id = Column(Integer, primary_key=True)
+    gender = Column(String(20), nullable=False)
+
+class Education(Base):
+    __tablename__ = "education"
+    __table_args__ = {"sqlite_autoincrement": True}
+
+    education_id = Column(Integer, primary_key=True)
+    level = Column(String(50), nullable=False)
+
+class HomeOwnership(Base):
+    __tablename__ = "home_ownership"
+    __table_args__ = {"sqlite_autoincrement": True}
+
+    home_ownership_id = Column(Integer, primary_key=True)
+    type = Column(String(50), nullable=False)
+
+class LoanIntent(Base):
+    __tablename__ = "loan_intent"
+    __table_args__ = {"sqlite_autoincrement": True}
+
+    intent_id = Column(Integer, primary_key=True)
+    purpose = Column(String(50), nullable=False)
+
+LOOKUP_SEEDS = {
+    Gender: "INSERT INTO gender (gender) VALUES ('Male'), ('Female'), ('Other')",
+    Education: "INSERT INTO education (level) VALUES ('High School'), ('Bachelor’s'), ('Master’s')",
+    HomeOwnership: "INSERT INTO home_ownership (type) VALUES ('Own'), ('Rent'), ('Mortgage')",
+    LoanIntent: "INSERT INTO loan_intent (purpose) VALUES ('Education'), ('Business'), ('Medical')",
+}
+for model, seed in LOOKUP_SEEDS.items():
+    # after_create of the table only fires when create_all actually creates it
+    event.listen(model.__table__, "after_create", DDL(seed))
+
 # SQLAlchemy model for the 'person' table
 class Person(Base):
     __tablename__ = "person"
@@ -30,7 +72,7 @@ class Loan(Base):
     __tablename__ = "loan"
 
     loan_id = Column(Integer, primary_key=True, index=True)
-    person_id = Column(Integer, ForeignKey("person.person_id"))
+    person_id = Column(Integer, ForeignKey("person.person_id"), index=True)
     loan_amount = Column(Float)
     loan_interest_rate = Column(Float)
     loan_status = Column(String)
@@ -39,4 +81,49 @@ class Loan(Base):
     loan_intent_id = Column(Integer) # <-- AND ADD THIS LINE
 
     # Defines the many-to-one relationship back to the 'Person' model
-    owner = relationship("Person", back_populates="loans")
\ No newline at end of file
+    owner = relationship("Person", back_populates="loans")
+
+    # Status filters with loan_id keyset paging (e.g. the Pending-loan worker) stay on the index
+    __table_args__ = (
+        Index("ix_loan_status_loan_id", "loan_status", "loan_id"),
+    )
+
+# SQLAlchemy model for the 'mongo_outbox' table
+# Pending MongoDB writes, committed in the same transaction as the SQL change they mirror
+class MongoOutbox(Base):
+    __tablename__ = "mongo_outbox"
+
+    outbox_id = Column(Integer, primary_key=True)
+    loan_id = Column(Integer, index=True)  # for holding back entries behind a stuck one (outbox_crud.get_batch)
+    operation = Column(String)  # "create_document" or "update_status"
+    payload = Column(Text)      # JSON
+    created_at = Column(DateTime, default=datetime.now)
+    attempts = Column(Integer, default=0)
+    last_error = Column(String, nullable=True)
+
+# SQLAlchemy model for the 'loan_status_log' table (sql/schema.sql)
+# One row per loan status change, written by the trg_log_loan_status trigger below.
+# AUTOINCREMENT keeps log_ids increasing and never reused, so readers can track a high-water mark.
+class LoanStatusLog(Base):
+    __tablename__ = "loan_status_log"
+    __table_args__ = {"sqlite_autoincrement": True}
+
+    log_id = Column(Integer, primary_key=True)
+    loan_id = Column(Integer)
+    old_status = Column(String(50))
+    new_status = Column(String(50))
+    changed_at = Column(DateTime, server_default=text("CURRENT_TIMESTAMP"))
+
+# Runs after every create_all (IF NOT EXISTS), so databases created before the log table
+# was part of the models get the trigger too. IS NOT also logs changes from or to NULL.
+LOAN_STATUS_TRIGGER = DDL(
+    "CREATE TRIGGER IF NOT EXISTS trg_log_loan_status "
+    "AFTER UPDATE ON loan "
+    "FOR EACH ROW "
+    "WHEN OLD.loan_status IS NOT NEW.loan_status "
+    "BEGIN "
+    "INSERT INTO loan_status_log (loan_id, old_status, new_status) "
+    "VALUES (OLD.loan_id, OLD.loan_status, NEW.loan_status); "
+    "END"
+)
+event.listen(Base.metadata, "after_create", LOAN_STATUS_TRIGGER)
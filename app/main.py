@@ -1,22 +1,134 @@
 # app/main.py
 
+import inspect
+import os
+import time
+from contextlib import asynccontextmanager
+import pymongo
 from fastapi import FastAPI
-from app.db import sql_models
-from app.db.database import engine # <-- CHANGE THIS LINE
-from app.routes import loan_routes
+from fastapi.responses import JSONResponse
+from app.db import database
+from app.db.database import USE_OUTBOX, USE_CDC
+from app.routes import model_routes, analytics_routes, metrics_routes
+from app.crud import lookup_cache
+from app.monitoring import metrics, traffic_capture
+from app.monitoring.instrumentation import TimingMiddleware
+from app.workers.outbox_dispatcher import OutboxDispatcher
+from app.workers.cdc_tailer import CdcTailer
+
+# "sync" serves loan_routes.py from the threadpool, "async" serves async_loan_routes.py from the event loop
+API_MODE = os.getenv("API_MODE", "sync")
+# Seconds the startup MongoDB ping may take; the API still starts (not warmed) if MongoDB is down
+MONGO_WARMUP_TIMEOUT = float(os.getenv("MONGO_WARMUP_TIMEOUT", "5"))
+
+# In outbox mode, MongoDB writes are delivered in batches by a background dispatcher
+# (app/serve.py runs it in one worker only)
+outbox_dispatcher = OutboxDispatcher()
+RUN_OUTBOX_DISPATCHER = USE_OUTBOX
+# In cdc mode, status changes reach MongoDB through loan_status_log (also one worker only)
+cdc_tailer = CdcTailer()
+RUN_CDC_TAILER = USE_CDC
+
+# Reported by GET /ready: whether startup has finished, and how long each step took (ms)
+startup_state = {"ready": False, "steps": {}}
+
+
+# --- Startup and shutdown ---
+async def timed_step(name: str, step):
+    start = time.perf_counter()
+    result = step()
+    if inspect.isawaitable(result):
+        result = await result
+    startup_state["steps"][name] = round((time.perf_counter() - start) * 1000, 1)
+    return result
+
+async def warm_mongo(app: FastAPI):
+    """
+    Pings MongoDB through the client the routes will use, so server discovery and the first
+    pooled connection happen now. Failure is logged, not fatal: writes retry or queue later.
+    """
+    dependencies = [database.get_mongo_client]
+    if API_MODE == "async":
+        dependencies.append(database.get_async_mongo_client)
+    for dependency in dependencies:
+        client = app.dependency_overrides.get(dependency, dependency)()
+        try:
+            with pymongo.timeout(MONGO_WARMUP_TIMEOUT):
+                reply = client.admin.command("ping")
+                if inspect.isawaitable(reply):
+                    await reply
+        except Exception as e:
+            print(f"MongoDB not reachable at startup, continuing without a warm connection: {e}")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Schema first, then the clients, then the model; traffic is only accepted after the yield
+    startup = time.perf_counter()
+    await timed_step("sql_schema", database.init_sql)
+    await timed_step("sql_pool", database.warm_async_sql_pool if API_MODE == "async" else database.warm_sql_pool)
+    await timed_step("mongo_client", database.connect_mongo)
+    await timed_step("mongo_ping", lambda: warm_mongo(app))
+    # The model stack (joblib, NumPy, scikit-learn) is first imported here, not when the app is imported
+    from app.ml import scoring_engine
+    await timed_step("model", scoring_engine.warm_engine)
+    await timed_step("lookup_data", lookup_cache.load)
+    if traffic_capture.CAPTURE_ENABLED:
+        await timed_step("traffic_capture", traffic_capture.writer.start)
+    if RUN_OUTBOX_DISPATCHER:
+        await timed_step("outbox_dispatcher", outbox_dispatcher.start)
+    if RUN_CDC_TAILER:
+        await timed_step("cdc_tailer", cdc_tailer.start)
+    startup_state["ready"] = True
+    print(f"Startup finished in {(time.perf_counter() - startup) * 1000:.0f} ms: {startup_state['steps']}")
+
+    yield
+
+    # Fail readiness first so the load balancer stops routing here while we drain
+    startup_state["ready"] = False
+    outbox_dispatcher.stop()
+    cdc_tailer.stop()
+    traffic_capture.writer.stop()
+    database.engine.dispose()
+    await database.async_engine.dispose()
+    database.close_mongo()
 
-# Create all database tables based on the models
-sql_models.Base.metadata.create_all(bind=engine)
 
 app = FastAPI(
     title="Loan Prediction API",
     description="API for CRUD operations and loan prediction.",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan,
 )
 
-# Include the router from loan_routes.py
-app.include_router(loan_routes.router)
+# Include the router for the selected mode (only that one is imported)
+if API_MODE == "async":
+    from app.routes import async_loan_routes
+    app.include_router(async_loan_routes.router)
+else:
+    from app.routes import loan_routes
+    app.include_router(loan_routes.router)
+app.include_router(model_routes.router)
+app.include_router(analytics_routes.router)
+
+# Per-request timing and stage breakdown, served with the other histograms at /metrics
+if metrics.METRICS_ENABLED:
+    app.add_middleware(TimingMiddleware)
+    app.include_router(metrics_routes.router)
+
+# Added last, so it is outermost and records the full request time
+if traffic_capture.CAPTURE_ENABLED:
+    app.add_middleware(traffic_capture.TrafficCaptureMiddleware)
 
 @app.get("/")
 def read_root():
-    return {"message": "Welcome to the Loan Prediction API!"}
\ No newline at end of file
+    return {"message": "Welcome to the Loan Prediction API!"}
+
+@app.get("/ready")
+def read_readiness():
+    """
+    Readiness probe: 200 once startup has finished, 503 while starting or shutting down.
+    """
+    return JSONResponse(
+        {"status": "ready" if startup_state["ready"] else "starting", "api_mode": API_MODE, "startup_ms": startup_state["steps"]},
+        status_code=200 if startup_state["ready"] else 503,
+    )
@@ -0,0 +1,176 @@
+"""
+Declarative auto-approval rules: the application-side replacement for the 'auto_approve_loans'
+stored procedure that sql/schema.sql cannot define in SQLite.
+
+A rule is a decision plus conditions that must all hold, e.g.
+    {"name": "prior_default", "decision": "Rejected", "all": [["previous_loan_defaults", "==", 1]]}
+Rules are checked in order and the first match decides. Loans matching no rule are left to the model.
+
+Rules see a loan the way the scorer does (sql_crud.get_pending_loan_records): a NULL numeric
+column reads as 0, so a person with no income is caught by "no_income". A value that stays
+missing (an unknown lookup id, or loan_percent_income with no income to derive it from) never
+matches a condition, and the loan is left to the model.
+
+The same rules compile to
+    sql_case()/sql_match()  one CASE expression for a set-based UPDATE over all Pending loans
+    decide()                NumPy masks over a batch of person/loan records
+"""
+import json
+import operator
+import os
+import numpy as np
+from sqlalchemy import and_, case, func, or_
+
+from app.db import sql_models
+
+# --- Configuration ---
+# JSON file with a list of rules replacing DEFAULT_RULES (unset = use the defaults)
+RULES_PATH = os.getenv("AUTO_APPROVAL_RULES")
+
+# Conservative defaults: only cases the model should never see
+DEFAULT_RULES = [
+    # Every application with a previous default is rejected in data/Phase2.csv (22856 of 22856)
+    {"name": "prior_default", "decision": "Rejected", "all": [["previous_loan_defaults", "==", 1]]},
+    # Policy limits: no stated income, or a loan larger than a year's income
+    {"name": "no_income", "decision": "Rejected", "all": [["income", "<=", 0]]},
+    {"name": "loan_exceeds_income", "decision": "Rejected", "all": [["loan_percent_income", ">", 1.0]]},
+]
+
+DECISIONS = ("Approved", "Rejected")
+
+OPERATORS = {
+    "==": operator.eq,
+    "!=": operator.ne,
+    "<": operator.lt,
+    "<=": operator.le,
+    ">": operator.gt,
+    ">=": operator.ge,
+    "in": None,  # value is a list
+}
+
+Person, Loan = sql_models.Person, sql_models.Loan
+
+# Numeric fields read as 0 when NULL, as sql_crud.get_pending_loan_records reads them for the scorer
+ZERO_IF_NULL = {
+    "age", "income", "employment_experience", "credit_score", "credit_history_length",
+    "loan_amount", "loan_interest_rate", "previous_loan_defaults",
+}
+
+
+def _zero_if_null(column):
+    return func.coalesce(column, 0)
+
+# Rule field -> SQL expression over a loan joined with its person (same derivations as decide())
+SQL_FIELDS = {
+    "age": _zero_if_null(Person.age),
+    "income": _zero_if_null(Person.income),
+    "employment_experience": _zero_if_null(Person.employment_experience),
+    "credit_score": _zero_if_null(Person.credit_score),
+    "credit_history_length": _zero_if_null(Person.credit_history_length),
+    "home_ownership_id": Person.home_ownership_id,
+    "gender_id": Person.gender_id,
+    "education_id": Person.education_id,
+    "loan_amount": _zero_if_null(Loan.loan_amount),
+    "loan_interest_rate": _zero_if_null(Loan.loan_interest_rate),
+    # NULL (never matches) when there is no stored percentage and no income to derive it from
+    "loan_percent_income": func.coalesce(Loan.loan_percent_income, _zero_if_null(Loan.loan_amount) / func.nullif(_zero_if_null(Person.income), 0)),
+    "previous_loan_defaults": _zero_if_null(Loan.previous_loan_defaults),
+    "loan_intent_id": Loan.loan_intent_id,
+}
+
+
+def validate_rules(rules: list) -> list:
+    """
+    Raises ValueError for a rule with an unknown field, operator or decision.
+    """
+    for rule in rules:
+        name = rule.get("name", "?")
+        if rule.get("decision") not in DECISIONS:
+            raise ValueError(f"Rule '{name}': decision must be one of {DECISIONS}")
+        if not rule.get("all"):
+            raise ValueError(f"Rule '{name}' has no conditions")
+        for field, op, value in rule["all"]:
+            if field not in SQL_FIELDS:
+                raise ValueError(f"Rule '{name}': unknown field '{field}'")
+            if op not in OPERATORS:
+                raise ValueError(f"Rule '{name}': unknown operator '{op}'")
+            if op == "in" and not isinstance(value, list):
+                raise ValueError(f"Rule '{name}': 'in' needs a list")
+    return rules
+
+def load_rules(path: str = RULES_PATH) -> list:
+    if not path:
+        return DEFAULT_RULES
+    with open(path) as f:
+        return validate_rules(json.load(f))
+
+
+# --- SQL ---
+def _sql_condition(rule: dict):
+    clauses = []
+    for field, op, value in rule["all"]:
+        column = SQL_FIELDS[field]
+        clauses.append(column.in_(value) if op == "in" else OPERATORS[op](column, value))
+    return and_(*clauses)
+
+def sql_match(rules: list):
+    """
+    True for loans that some rule decides.
+    """
+    return or_(*[_sql_condition(rule) for rule in rules])
+
+def sql_case(rules: list):
+    """
+    The first matching rule's decision (NULL when none matches).
+    """
+    return case(*[(_sql_condition(rule), rule["decision"]) for rule in rules])
+
+def sql_rule_name(rules: list):
+    return case(*[(_sql_condition(rule), rule["name"]) for rule in rules])
+
+
+# --- NumPy ---
+def _record_field(record: dict, field: str):
+    """
+    A rule field of a person/loan record, derived as SQL_FIELDS derives it (None: missing).
+    """
+    if field == "loan_percent_income":
+        value = record.get("loan_percent_income")
+        if value is None:
+            income = record.get("income") or 0
+            value = (record.get("loan_amount") or 0) / income if income else None
+        return value
+    value = record.get(field)
+    return 0 if value is None and field in ZERO_IF_NULL else value
+
+def _field_array(records: list, field: str) -> np.ndarray:
+    values = (_record_field(record, field) for record in records)
+    return np.fromiter((np.nan if v is None else v for v in values), dtype=np.float64, count=len(records))
+
+def decide(records: list, rules: list) -> list:
+    """
+    Returns, per record, (decision, rule name) of the first matching rule, or None.
+    Each condition is evaluated once for the whole batch; a missing value never matches,
+    as a NULL never satisfies a condition in SQL.
+    """
+    n_rows = len(records)
+    decisions = [None] * n_rows
+    if n_rows == 0:
+        return decisions
+    undecided = np.ones(n_rows, dtype=bool)
+    columns = {}
+    for rule in rules:
+        mask = undecided.copy()
+        for field, op, value in rule["all"]:
+            if field not in columns:
+                columns[field] = _field_array(records, field)
+            column = columns[field]
+            with np.errstate(invalid="ignore"):
+                hit = np.isin(column, value) if op == "in" else OPERATORS[op](column, value)
+            mask &= hit & ~np.isnan(column)
+        for i in np.flatnonzero(mask):
+            decisions[i] = (rule["decision"], rule["name"])
+        undecided &= ~mask
+        if not undecided.any():
+            break
+    return decisions
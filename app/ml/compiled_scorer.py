@@ -0,0 +1,63 @@
+import numpy as np
+
+# Maximum allowed difference from sklearn's predict_proba after compiling to float32
+PARITY_TOLERANCE = 1e-4
+
+
+class CompiledScorer:
+    """
+    StandardScaler + LogisticRegression folded into a single float32 weight vector and bias.
+
+    sigmoid(coef . (x - mean) / scale + intercept) == sigmoid((coef / scale) . x + bias)
+    with bias = intercept - sum(coef * mean / scale), so scoring is one dot product.
+    """
+
+    def __init__(self, weights: np.ndarray, bias: float):
+        self.weights = np.ascontiguousarray(weights, dtype=np.float32)
+        self.bias = np.float32(bias)
+
+    @classmethod
+    def from_pipeline(cls, model, scaler):
+        """
+        Builds the fused weights from a fitted StandardScaler and binary LogisticRegression.
+        """
+        coef = np.asarray(model.coef_, dtype=np.float64).ravel()
+        mean = scaler.mean_ if scaler.with_mean else np.zeros_like(coef)
+        scale = scaler.scale_ if scaler.with_std else np.ones_like(coef)
+
+        weights = coef / scale
+        bias = float(model.intercept_[0]) - float(np.dot(weights, mean))
+        return cls(weights, bias)
+
+    def predict_proba(self, X: np.ndarray) -> np.ndarray:
+        """
+        Returns the probability of the 'Approved' class for each row of X.
+        """
+        z = np.asarray(X, dtype=np.float32) @ self.weights + self.bias
+        with np.errstate(over="ignore"):
+            return 1.0 / (1.0 + np.exp(-z))
+
+
+def check_parity(scorer: CompiledScorer, model, scaler, X: np.ndarray, tolerance: float = PARITY_TOLERANCE) -> float:
+    """
+    Compares the compiled scorer with sklearn's predict_proba on X.
+    Raises ValueError if they disagree by more than the tolerance, otherwise returns the max difference.
+    """
+    mean = scaler.mean_ if scaler.with_mean else 0.0
+    scale = scaler.scale_ if scaler.with_std else 1.0
+    expected = model.predict_proba((X - mean) / scale)[:, 1]
+    difference = float(np.max(np.abs(scorer.predict_proba(X) - expected))) if len(X) else 0.0
+    if difference > tolerance:
+        raise ValueError(f"Compiled scorer differs from predict_proba by {difference:.2e} (tolerance {tolerance:.0e})")
+    return difference
+
+
+def probe_matrix(scaler, n_rows: int = 256, seed: int = 42) -> np.ndarray:
+    """
+    Generates rows spread around the training distribution for the load-time parity check.
+    """
+    rng = np.random.default_rng(seed)
+    n_features = len(scaler.scale_)
+    mean = scaler.mean_ if scaler.with_mean else np.zeros(n_features)
+    scale = scaler.scale_ if scaler.with_std else np.ones(n_features)
+    return mean + rng.standard_normal((n_rows, n_features)) * scale * 2
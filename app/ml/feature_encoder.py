@@ -0,0 +1,216 @@
+"""
+The one place features are encoded, shared by training (ml/train.py), the CLI (ml/predict.py)
+and the API (app/ml/scoring_engine.py), so a model is always scored on exactly the columns
+it was trained on.
+
+A FeatureEncoder is compiled once from the training column order into
+    numeric slots:   column index <- record field
+    category index:  field -> {category name: column index}
+and then writes person/loan records (or training DataFrames) straight into a NumPy matrix.
+
+NumPy is imported by the encoding methods: the CRUD modules import this one for
+normalize_category, and the API should not load NumPy before it loads the model.
+"""
+from __future__ import annotations
+
+# Numeric training columns -> field of the person/loan record they are read from
+NUMERIC_FEATURES = {
+    "person_age": "age",
+    "person_income": "income",
+    "person_emp_exp": "employment_experience",
+    "loan_amnt": "loan_amount",
+    "loan_int_rate": "loan_interest_rate",
+    "loan_percent_income": "loan_percent_income",
+    "cb_person_cred_hist_length": "credit_history_length",
+    "credit_score": "credit_score",
+}
+
+# One-hot encoded training columns (get_dummies prefix) -> record field
+CATEGORICAL_FEATURES = {
+    "person_gender": "gender",
+    "person_education": "education",
+    "person_home_ownership": "home_ownership",
+    "loan_intent": "loan_intent",
+    "previous_loan_defaults_on_file": "previous_loan_defaults",
+}
+
+# Category names that mean a category the training data calls differently: the SQL seeds
+# (sql/schema.sql) have the 'Business' loan intent, which the dataset calls VENTURE
+CATEGORY_ALIASES = {
+    "loan_intent": {"business": "venture"},
+}
+
+
+def normalize_category(field: str, value) -> str:
+    """
+    Converts a categorical value from the API/SQL side ("Bachelor's", "HOME_IMPROVEMENT", 1)
+    into the lowercase category names produced by get_dummies in the training notebook.
+    """
+    if field == "previous_loan_defaults":
+        if isinstance(value, str):
+            return "yes" if value.strip().lower() in ("y", "yes", "1", "true") else "no"
+        return "yes" if value else "no"
+
+    text = str(value).strip().lower().replace("’s", "").replace("'s", "")
+    if field == "loan_intent":
+        text = text.replace("_", "").replace(" ", "")
+    return CATEGORY_ALIASES.get(field, {}).get(text, text)
+
+
+def home_ownership_names() -> dict:
+    """
+    {home_ownership_id: name} of the home_ownership table. Which id is which depends on how the
+    database was built, so it is looked up, never hard-coded.
+    """
+    from app.crud import lookup_cache  # imported here: lookup_cache imports this module
+
+    return lookup_cache.names("home_ownership")
+
+def record_value(record: dict, field: str):
+    """
+    Reads a field from a person/loan record, deriving the ones the API does not send.
+    A missing categorical field is None, which encodes as the dropped (all-zero) category.
+    """
+    if field == "loan_percent_income":
+        value = record.get("loan_percent_income")
+        if value is None:
+            income = record.get("income") or 0
+            value = record["loan_amount"] / income if income > 0 else 0
+        return value
+    if field == "home_ownership":
+        value = record.get("home_ownership")
+        if value is None and record.get("home_ownership_id") is not None:
+            value = home_ownership_names().get(record["home_ownership_id"])
+        return value
+    if field == "previous_loan_defaults":
+        return record.get("previous_loan_defaults") or 0
+    if field in NUMERIC_FEATURES.values():
+        return record[field]
+    return record.get(field)
+
+
+def category_values(records: list, field: str) -> list:
+    """
+    record_value(record, field) for every record, with the home ownership names looked up once per batch.
+    """
+    if field != "home_ownership":
+        return [record_value(record, field) for record in records]
+    names = None
+    values = []
+    for record in records:
+        value = record.get("home_ownership")
+        if value is None and record.get("home_ownership_id") is not None:
+            if names is None:
+                names = home_ownership_names()
+            value = names.get(record["home_ownership_id"])
+        values.append(value)
+    return values
+
+
+class FeatureEncoder:
+    """
+    Compiled encoder for one training column order, e.g.
+        encoder = FeatureEncoder(assets["columns"])
+        X = encoder.encode(records)
+    Columns it does not know how to fill raise ValueError here, at load time, instead of
+    being silently left at zero for every request.
+    """
+
+    def __init__(self, columns):
+        self.columns = list(columns)
+        column_index = {name: i for i, name in enumerate(self.columns)}
+
+        # (column index, record field) for every numeric training column
+        self.numeric_slots = [
+            (column_index[column], field)
+            for column, field in NUMERIC_FEATURES.items()
+            if column in column_index
+        ]
+
+        # record field -> {category: column index}; the category dropped by
+        # get_dummies(drop_first=True) has no column and stays all-zero
+        self.category_index = {field: {} for field in CATEGORICAL_FEATURES.values()}
+        unknown = []
+        for column, i in column_index.items():
+            if column in NUMERIC_FEATURES:
+                continue
+            for prefix, field in CATEGORICAL_FEATURES.items():
+                if column.startswith(prefix + "_"):
+                    self.category_index[field][column[len(prefix) + 1:]] = i
+                    break
+            else:
+                unknown.append(column)
+        if unknown:
+            raise ValueError(f"No feature encoding for training columns: {', '.join(unknown)}")
+
+    @classmethod
+    def from_vocabulary(cls, vocabulary: dict):
+        """
+        Builds the column order of get_dummies(df, columns=CATEGORICAL_FEATURES, drop_first=True)
+        from {training column: categories}, as the notebook's training frame has it.
+        """
+        columns = list(NUMERIC_FEATURES)
+        for prefix in CATEGORICAL_FEATURES:
+            columns += [f"{prefix}_{category}" for category in sorted(vocabulary[prefix])[1:]]
+        return cls(columns)
+
+    def encode(self, records: list, dtype="float64") -> np.ndarray:
+        """
+        Encodes person/loan records into a new matrix in the training column order.
+        """
+        import numpy as np
+
+        n_rows = len(records)
+        X = np.zeros((n_rows, len(self.columns)), dtype=dtype)
+        if n_rows == 1:
+            self.encode_row(records[0], X[0])
+            return X
+        if n_rows == 0:
+            return X
+
+        for j, field in self.numeric_slots:
+            X[:, j] = [record_value(record, field) for record in records]
+
+        rows = np.arange(n_rows)
+        for field, index_map in self.category_index.items():
+            cols = np.fromiter(
+                (index_map.get(normalize_category(field, value), -1) for value in category_values(records, field)),
+                dtype=np.int64,
+                count=n_rows,
+            )
+            hit = cols >= 0
+            X[rows[hit], cols[hit]] = 1.0
+        return X
+
+    def encode_row(self, record: dict, out: np.ndarray) -> np.ndarray:
+        """
+        Writes one record into `out`, a zeroed row of len(columns).
+        """
+        for j, field in self.numeric_slots:
+            out[j] = record_value(record, field)
+        for field, index_map in self.category_index.items():
+            j = index_map.get(normalize_category(field, record_value(record, field)))
+            if j is not None:
+                out[j] = 1.0
+        return out
+
+    def encode_frame(self, frame, dtype="float64") -> np.ndarray:
+        """
+        Encodes a DataFrame with the dataset's columns (data/Phase2.csv names, raw or normalized
+        categories) into a new matrix; used by training instead of get_dummies.
+        """
+        import numpy as np
+
+        X = np.zeros((len(frame), len(self.columns)), dtype=dtype)
+        column_by_field = {field: column for column, field in NUMERIC_FEATURES.items()}
+        for j, field in self.numeric_slots:
+            X[:, j] = frame[column_by_field[field]].to_numpy(dtype=dtype)
+
+        rows = np.arange(len(frame))
+        for prefix, field in CATEGORICAL_FEATURES.items():
+            index_map = self.category_index[field]
+            codes = {value: index_map.get(normalize_category(field, value), -1) for value in frame[prefix].unique()}
+            cols = frame[prefix].map(codes).to_numpy(dtype=np.int64)
+            hit = cols >= 0
+            X[rows[hit], cols[hit]] = 1.0
+        return X
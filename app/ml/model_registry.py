@@ -0,0 +1,169 @@
+"""
+Versioned storage for trained pipelines.
+
+Layout (MODEL_REGISTRY_DIR, default ml/registry):
+    <version>/pipeline.joblib   uncompressed joblib dump, so arrays can be memory-mapped
+    <version>/metadata.json     feature columns, decision threshold, checksum, ...
+    ACTIVE                      version served by the API
+    SHADOW                      optional candidate scored alongside the active version
+
+Run from the project root:
+    python -m app.ml.model_registry register ml/saved_model/pipeline_assets.joblib --activate
+    python -m app.ml.model_registry list
+"""
+import argparse
+import hashlib
+import json
+import os
+from datetime import datetime
+import joblib
+
+REGISTRY_DIR = os.getenv("MODEL_REGISTRY_DIR", "ml/registry")
+PIPELINE_FILE = "pipeline.joblib"
+METADATA_FILE = "metadata.json"
+ACTIVE_FILE = "ACTIVE"
+SHADOW_FILE = "SHADOW"
+
+
+def file_checksum(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+def _write_atomic(path: str, text: str):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        f.write(text)
+    os.replace(tmp_path, path)
+
+def _read_pointer(name: str, registry_dir: str):
+    try:
+        with open(os.path.join(registry_dir, name)) as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def register(assets: dict, version: str = None, threshold: float = None, source: str = None, registry_dir: str = REGISTRY_DIR) -> dict:
+    """
+    Stores a pipeline ({'model', 'scaler', 'columns'}) as a new immutable version and returns its metadata.
+    """
+    from app.ml.scoring_engine import DECISION_THRESHOLD
+
+    version = version or datetime.now().strftime("v%Y%m%d%H%M%S")
+    version_dir = os.path.join(registry_dir, version)
+    if os.path.exists(version_dir):
+        raise ValueError(f"Model version '{version}' already exists")
+    os.makedirs(version_dir)
+
+    pipeline_path = os.path.join(version_dir, PIPELINE_FILE)
+    joblib.dump({"model": assets["model"], "scaler": assets["scaler"], "columns": list(assets["columns"])}, pipeline_path, compress=0)
+
+    metadata = {
+        "version": version,
+        "columns": list(assets["columns"]),
+        "threshold": threshold if threshold is not None else assets.get("threshold", DECISION_THRESHOLD),
+        "checksum": file_checksum(pipeline_path),
+        "model_type": type(assets["model"]).__name__,
+        "source": source,
+        "created_at": datetime.now().isoformat(),
+    }
+    _write_atomic(os.path.join(version_dir, METADATA_FILE), json.dumps(metadata, indent=2))
+    return metadata
+
+def list_versions(registry_dir: str = REGISTRY_DIR) -> list:
+    """
+    Returns the metadata of every registered version, oldest first.
+    """
+    if not os.path.isdir(registry_dir):
+        return []
+    versions = []
+    for name in sorted(os.listdir(registry_dir)):
+        metadata_path = os.path.join(registry_dir, name, METADATA_FILE)
+        if os.path.isfile(metadata_path):
+            with open(metadata_path) as f:
+                versions.append(json.load(f))
+    return sorted(versions, key=lambda m: m["created_at"])
+
+def get_metadata(version: str, registry_dir: str = REGISTRY_DIR) -> dict:
+    path = os.path.join(registry_dir, version, METADATA_FILE)
+    if not os.path.isfile(path):
+        raise KeyError(f"Unknown model version '{version}'")
+    with open(path) as f:
+        return json.load(f)
+
+def load(version: str, registry_dir: str = REGISTRY_DIR, mmap_mode: str = "r"):
+    """
+    Loads a version after verifying its checksum. Arrays are memory-mapped read-only,
+    so processes loading the same version share the page cache instead of private copies.
+    Returns (assets, metadata).
+    """
+    metadata = get_metadata(version, registry_dir)
+    pipeline_path = os.path.join(registry_dir, version, PIPELINE_FILE)
+    if file_checksum(pipeline_path) != metadata["checksum"]:
+        raise ValueError(f"Checksum mismatch for model version '{version}'")
+    return joblib.load(pipeline_path, mmap_mode=mmap_mode), metadata
+
+
+# --- Active / shadow pointers ---
+def active_version(registry_dir: str = REGISTRY_DIR):
+    return _read_pointer(ACTIVE_FILE, registry_dir)
+
+def set_active(version: str, registry_dir: str = REGISTRY_DIR):
+    get_metadata(version, registry_dir)
+    _write_atomic(os.path.join(registry_dir, ACTIVE_FILE), version)
+
+def shadow_version(registry_dir: str = REGISTRY_DIR):
+    return _read_pointer(SHADOW_FILE, registry_dir)
+
+def set_shadow(version: str = None, registry_dir: str = REGISTRY_DIR):
+    """
+    Sets the shadow candidate, or clears it when version is None.
+    """
+    path = os.path.join(registry_dir, SHADOW_FILE)
+    if version is None:
+        if os.path.exists(path):
+            os.remove(path)
+        return
+    get_metadata(version, registry_dir)
+    _write_atomic(path, version)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Manage versioned model pipelines.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    register_parser = commands.add_parser("register", help="Register a pipeline_assets.joblib file.")
+    register_parser.add_argument("assets_path")
+    register_parser.add_argument("--version")
+    register_parser.add_argument("--threshold", type=float)
+    register_parser.add_argument("--activate", action="store_true")
+    commands.add_parser("list", help="List registered versions.")
+    activate_parser = commands.add_parser("activate", help="Serve a version (running APIs pick it up).")
+    activate_parser.add_argument("version")
+    shadow_parser = commands.add_parser("shadow", help="Shadow-score a version on live traffic.")
+    shadow_parser.add_argument("version", nargs="?", help="Omit to stop shadow scoring.")
+    args = parser.parse_args()
+
+    if args.command == "register":
+        metadata = register(joblib.load(args.assets_path), args.version, args.threshold, source=args.assets_path)
+        print(f"Registered model version {metadata['version']} ({metadata['checksum'][:12]}).")
+        if args.activate:
+            set_active(metadata["version"])
+            print(f"Version {metadata['version']} is now active.")
+    elif args.command == "list":
+        active, shadow = active_version(), shadow_version()
+        for metadata in list_versions():
+            marker = " (active)" if metadata["version"] == active else " (shadow)" if metadata["version"] == shadow else ""
+            print(f"{metadata['version']}{marker}  threshold={metadata['threshold']}  {metadata['model_type']}  {metadata['created_at']}")
+    elif args.command == "activate":
+        set_active(args.version)
+        print(f"Version {args.version} is now active.")
+    elif args.command == "shadow":
+        set_shadow(args.version)
+        print(f"Shadow scoring {'with ' + args.version if args.version else 'disabled'}.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+import numpy as np
+
+# --- Configuration ---
+CACHE_SIZE = int(os.getenv("PREDICTION_CACHE_SIZE", "100000"))   # entries; 0 disables the cache
+CACHE_TTL = float(os.getenv("PREDICTION_CACHE_TTL", "3600"))     # seconds
+
+
+class PredictionCache:
+    """
+    Bounded LRU + TTL cache of approval probabilities.
+    Keys hash the encoded feature row together with the model fingerprint, so the same
+    applicant re-scored by the same model is a dictionary lookup instead of a model call.
+    """
+
+    def __init__(self, maxsize: int = CACHE_SIZE, ttl: float = CACHE_TTL):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.maxsize > 0
+
+    @staticmethod
+    def keys_for(X: np.ndarray, fingerprint: str) -> list:
+        """
+        One key per row of the feature matrix: blake2b(model fingerprint + row bytes).
+        """
+        prefix = fingerprint.encode()
+        X = np.ascontiguousarray(X, dtype=np.float64)
+        return [hashlib.blake2b(prefix + row.tobytes(), digest_size=16).digest() for row in X]
+
+    def get_many(self, keys: list) -> list:
+        """
+        Returns the cached probability for each key, or None where it is missing/expired.
+        """
+        now = time.monotonic()
+        found = []
+        with self._lock:
+            for key in keys:
+                entry = self._entries.get(key)
+                if entry is not None and entry[1] > now:
+                    self._entries.move_to_end(key)
+                    found.append(entry[0])
+                    self.hits += 1
+                else:
+                    if entry is not None:
+                        del self._entries[key]
+                    found.append(None)
+                    self.misses += 1
+        return found
+
+    def put_many(self, keys: list, probabilities):
+        expires_at = time.monotonic() + self.ttl
+        with self._lock:
+            for key, probability in zip(keys, probabilities):
+                self._entries[key] = (float(probability), expires_at)
+                self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_size": self.maxsize,
+                "ttl_seconds": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
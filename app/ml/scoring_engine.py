@@ -0,0 +1,273 @@
+import os
+import threading
+import time
+import numpy as np
+import joblib
+
+from app.ml import model_registry
+from app.ml.compiled_scorer import CompiledScorer, check_parity, probe_matrix
+from app.ml.feature_encoder import FeatureEncoder
+from app.ml.prediction_cache import PredictionCache
+from app.monitoring import metrics
+from app.monitoring.instrumentation import timed
+
+# --- Configuration ---
+ASSETS_PATH = os.getenv("MODEL_ASSETS_PATH", "ml/saved_model/pipeline_assets.joblib")
+# Decision threshold from ml/predict_updated.ipynb (raise it to be stricter)
+DECISION_THRESHOLD = float(os.getenv("LOAN_DECISION_THRESHOLD", "0.75"))
+# "sklearn" calls the saved model; "compiled" uses the fused float32 scorer
+SCORER_BACKEND = os.getenv("SCORER_BACKEND", "sklearn")
+# How often (seconds) a worker checks the registry for a newly activated model
+RELOAD_CHECK_INTERVAL = float(os.getenv("MODEL_RELOAD_CHECK_INTERVAL", "5"))
+
+# Scored once at startup so the first request does not pay for first-call costs in NumPy/scikit-learn
+WARMUP_RECORD = {
+    "age": 30, "income": 60000, "employment_experience": 5, "credit_score": 650, "credit_history_length": 5,
+    "home_ownership": "rent", "gender": "female", "education": "bachelor", "loan_amount": 10000,
+    "loan_interest_rate": 11.0, "loan_intent": "personal",
+}
+
+
+class ScoringEngine:
+    """
+    Keeps the trained pipeline in memory and scores many person/loan records
+    in a single vectorized call.
+    """
+
+    def __init__(self, model, scaler, columns, threshold: float = DECISION_THRESHOLD, compiled: bool = False, version: str = "unversioned", checksum: str = ""):
+        self.model = model
+        self.scaler = scaler
+        self.columns = list(columns)
+        self.threshold = threshold
+        self.version = version
+        # Identifies exactly which weights produced a probability (used in prediction cache keys)
+        self.fingerprint = f"{version}:{checksum}:{'compiled' if compiled else 'sklearn'}"
+        self.cache = None
+
+        # Category -> column index maps shared with training and ml/predict.py
+        self.encoder = FeatureEncoder(self.columns)
+
+        # Standardization parameters, applied directly to the NumPy matrix
+        self._mean = scaler.mean_ if scaler.with_mean else 0.0
+        self._scale = scaler.scale_ if scaler.with_std else 1.0
+
+        # Optional fused scorer; refuses to load if it does not match predict_proba
+        self.compiled = None
+        if compiled:
+            self.compiled = CompiledScorer.from_pipeline(model, scaler)
+            check_parity(self.compiled, model, scaler, probe_matrix(scaler))
+
+    @classmethod
+    def from_assets(cls, path: str = ASSETS_PATH, threshold: float = DECISION_THRESHOLD, compiled: bool = SCORER_BACKEND == "compiled"):
+        """
+        Loads the model, scaler and column order saved by the training notebook.
+        """
+        assets = joblib.load(path)
+        return cls(assets["model"], assets["scaler"], assets["columns"], threshold=threshold, compiled=compiled,
+                   checksum=model_registry.file_checksum(path))
+
+    @classmethod
+    def from_registry(cls, version: str, compiled: bool = SCORER_BACKEND == "compiled"):
+        """
+        Loads a registered model version (memory-mapped, checksum verified) with its own threshold.
+        """
+        assets, metadata = model_registry.load(version)
+        return cls(assets["model"], assets["scaler"], metadata["columns"], threshold=metadata["threshold"], compiled=compiled,
+                   version=version, checksum=metadata["checksum"])
+
+    def build_feature_matrix(self, records: list) -> np.ndarray:
+        """
+        Encodes person/loan records into a preallocated matrix in the training column order.
+        """
+        dtype = np.float32 if self.compiled is not None else np.float64
+        return self.encoder.encode(records, dtype)
+
+    def predict_proba(self, X: np.ndarray) -> np.ndarray:
+        """
+        Returns the probability of the 'Approved' class for each row of X.
+        """
+        if self.compiled is not None:
+            return self.compiled.predict_proba(X)
+        X_scaled = (X - self._mean) / self._scale
+        return self.model.predict_proba(X_scaled)[:, 1]
+
+    def score(self, records: list) -> list:
+        """
+        Scores a batch of records and returns (approval_probability, predicted_status) pairs.
+        With a prediction cache attached, only rows not seen before go through the model.
+        """
+        backend = "sklearn" if self.compiled is None else "compiled"
+        with timed("scoring", metrics.MODEL_SCORING_SECONDS, backend):
+            X = self.build_feature_matrix(records)
+            if self.cache is not None and self.cache.enabled:
+                keys = self.cache.keys_for(X, self.fingerprint)
+                cached = self.cache.get_many(keys)
+                missing = [i for i, p in enumerate(cached) if p is None]
+                probabilities = np.array([0.0 if p is None else p for p in cached])
+                if missing:
+                    computed = self.predict_proba(X[missing])
+                    probabilities[missing] = computed
+                    self.cache.put_many([keys[i] for i in missing], computed)
+            else:
+                probabilities = self.predict_proba(X)
+        approved = probabilities >= self.threshold
+        return [
+            (float(p), "Approved" if a else "Rejected")
+            for p, a in zip(probabilities, approved)
+        ]
+
+
+class ShadowStats:
+    """
+    Running comparison between the active model and the shadow candidate on live traffic.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self, version: str = None):
+        with self._lock:
+            self.version = version
+            self.rows = 0
+            self.disagreements = 0
+            self.abs_probability_diff = 0.0
+
+    def record(self, primary_results: list, shadow_results: list):
+        with self._lock:
+            for (p_primary, s_primary), (p_shadow, s_shadow) in zip(primary_results, shadow_results):
+                self.rows += 1
+                self.disagreements += s_primary != s_shadow
+                self.abs_probability_diff += abs(p_primary - p_shadow)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "shadow_version": self.version,
+                "rows": self.rows,
+                "disagreements": self.disagreements,
+                "disagreement_rate": self.disagreements / self.rows if self.rows else 0.0,
+                "mean_abs_probability_diff": self.abs_probability_diff / self.rows if self.rows else 0.0,
+            }
+
+
+# --- Resident engine, loaded once at app startup ---
+# Swaps are a single reference assignment: requests already holding the old engine finish with it.
+_engine = None
+_shadow_engine = None
+_assets_path = ASSETS_PATH
+_assets_mtime = None
+_last_reload_check = 0.0
+_reload_lock = threading.Lock()
+shadow_stats = ShadowStats()
+prediction_cache = PredictionCache()
+
+def _resident(engine):
+    """
+    Attaches the shared prediction cache to a newly served engine and drops entries from the old one.
+    """
+    prediction_cache.clear()
+    engine.cache = prediction_cache
+    return engine
+
+def _mtime(path: str):
+    try:
+        return os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        return None
+
+def load_engine(path: str = ASSETS_PATH):
+    """
+    Loads the active registry version (or the loose assets file when nothing is registered)
+    into the process-wide scoring engine, plus the shadow candidate if one is set.
+    """
+    global _engine, _shadow_engine, _assets_path, _assets_mtime
+    version = model_registry.active_version()
+    _assets_path = path
+    _assets_mtime = None if version else _mtime(path)
+    _engine = _resident(ScoringEngine.from_registry(version) if version else ScoringEngine.from_assets(path))
+    shadow = model_registry.shadow_version()
+    _shadow_engine = ScoringEngine.from_registry(shadow) if shadow else None
+    shadow_stats.reset(shadow)
+    return _engine
+
+def warm_engine():
+    """
+    Loads the engine if needed and runs one record through each served model, bypassing the prediction cache.
+    """
+    engine = _engine if _engine is not None else load_engine()
+    for candidate in (engine, _shadow_engine):
+        if candidate is not None:
+            candidate.predict_proba(candidate.build_feature_matrix([WARMUP_RECORD]))
+    return engine
+
+def swap_engine(version: str):
+    """
+    Makes a registry version active and swaps it in without a restart.
+    The new engine is fully loaded before the swap; other workers follow via the ACTIVE pointer.
+    """
+    global _engine
+    engine = ScoringEngine.from_registry(version)
+    model_registry.set_active(version)
+    _engine = _resident(engine)
+    return engine
+
+def set_shadow_engine(version: str = None):
+    """
+    Starts shadow-scoring a registry version on live traffic (or stops it when version is None).
+    """
+    global _shadow_engine
+    engine = ScoringEngine.from_registry(version) if version else None
+    model_registry.set_shadow(version)
+    _shadow_engine = engine
+    shadow_stats.reset(version)
+
+def _reload_if_changed():
+    """
+    Picks up ACTIVE/SHADOW changes made by another worker or the registry CLI,
+    and a rewritten pipeline_assets.joblib when no registry version is active.
+    """
+    global _engine, _shadow_engine, _assets_mtime, _last_reload_check
+    now = time.monotonic()
+    if now - _last_reload_check < RELOAD_CHECK_INTERVAL or not _reload_lock.acquire(blocking=False):
+        return
+    try:
+        _last_reload_check = now
+        active = model_registry.active_version()
+        if active and active != _engine.version:
+            _engine = _resident(ScoringEngine.from_registry(active))
+        elif not active and _assets_mtime is not None and _mtime(_assets_path) != _assets_mtime:
+            _assets_mtime = _mtime(_assets_path)
+            _engine = _resident(ScoringEngine.from_assets(_assets_path))
+        shadow = model_registry.shadow_version()
+        if shadow != (_shadow_engine.version if _shadow_engine else None):
+            _shadow_engine = ScoringEngine.from_registry(shadow) if shadow else None
+            shadow_stats.reset(shadow)
+    except Exception as e:
+        # Keep serving the current model if the new one cannot be loaded
+        print(f"Model reload failed, keeping version {_engine.version}: {e}")
+    finally:
+        _reload_lock.release()
+
+# Dependency to get the loaded scoring engine
+def get_scoring_engine():
+    if _engine is None:
+        return load_engine()
+    _reload_if_changed()
+    return _engine
+
+def get_shadow_engine():
+    return _shadow_engine
+
+def shadow_score(records: list, primary_results: list):
+    """
+    Scores the same records with the shadow candidate (if any) and records how it compares.
+    Meant to run after the response is sent; failures never affect the request.
+    """
+    engine = _shadow_engine
+    if engine is None:
+        return
+    try:
+        shadow_stats.record(primary_results, engine.score(records))
+    except Exception as e:
+        print(f"Shadow scoring with version {engine.version} failed: {e}")
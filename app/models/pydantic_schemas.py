@@ -63,4 +63,94 @@ class ApplicationCreate(BaseModel):
     # Loan details (status is excluded)
     loan_amount: float
     loan_interest_rate: float
-    loan_intent: str # e.g., "EDUCATION", "MEDICAL"
\ No newline at end of file
+    loan_intent: str # e.g., "EDUCATION", "MEDICAL"
+
+# Result row of a batch application insert
+class CreatedApplication(BaseModel):
+    person_id: int
+    loan_id: int
+    loan_status: str
+
+# --- Prediction Schemas ---
+# A person/loan record to score. loan_id is optional and echoed back in the result.
+class ScoringRequest(ApplicationCreate):
+    loan_id: Optional[int] = None
+    previous_loan_defaults: int = 0
+
+class LoanPrediction(BaseModel):
+    loan_id: Optional[int] = None
+    approval_probability: float
+    predicted_status: str
+    model_version: Optional[str] = None
+
+# --- Model Registry Schemas ---
+class ModelVersion(BaseModel):
+    version: str
+    threshold: float
+    checksum: str
+    model_type: str
+    source: Optional[str] = None
+    created_at: str
+    columns: List[str]
+
+class ModelStatus(BaseModel):
+    active_version: str
+    shadow_version: Optional[str] = None
+    versions: List[ModelVersion] = []
+
+class ShadowStats(BaseModel):
+    shadow_version: Optional[str] = None
+    rows: int
+    disagreements: int
+    disagreement_rate: float
+    mean_abs_probability_diff: float
+
+
+class PredictionCacheStats(BaseModel):
+    size: int
+    max_size: int
+    ttl_seconds: float
+    hits: int
+    misses: int
+    hit_rate: float
+# --- List Schemas ---
+# Rows of GET /loans and GET /persons. next_after_id is passed back as after_id for the next page
+# and is None on the last page.
+class LoanRow(BaseModel):
+    loan_id: int
+    person_id: int
+    loan_amount: Optional[float] = None
+    loan_interest_rate: Optional[float] = None
+    loan_status: Optional[str] = None
+    loan_percent_income: Optional[float] = None
+    loan_intent_id: Optional[int] = None
+
+class PersonRow(BaseModel):
+    person_id: int
+    age: Optional[int] = None
+    income: Optional[float] = None
+    home_ownership_id: Optional[int] = None
+    employment_experience: Optional[int] = None
+    credit_score: Optional[int] = None
+    credit_history_length: Optional[int] = None
+
+class LoanPage(BaseModel):
+    items: List[LoanRow]
+    next_after_id: Optional[int] = None
+
+class PersonPage(BaseModel):
+    items: List[PersonRow]
+    next_after_id: Optional[int] = None
+
+# --- Analytics Schemas ---
+class Rollup(BaseModel):
+    dimension: str
+    value: str
+    total: int = 0
+    approved: int = 0
+    rejected: int = 0
+    pending: int = 0
+    approval_rate: Optional[float] = None  # approved / (approved + rejected)
+
+class RollupRebuild(BaseModel):
+    rollups: int
@@ -0,0 +1,167 @@
+"""
+Hooks that feed app/monitoring/metrics.py and break each request down by stage:
+    sql         statement execution (SQLAlchemy before/after_cursor_execute)
+    sql_commit  SQLite COMMIT (ConnectionEvents.commit -> SessionEvents.after_commit)
+    mongo       MongoDB commands (pymongo command monitoring)
+    scoring     model encoding + scoring (timed())
+    other       everything else: routing, validation, serialization, middleware
+"""
+import os
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from pymongo import monitoring
+
+from app.monitoring import metrics
+
+# --- Configuration ---
+# Requests slower than this are printed with their stage breakdown; 0 turns the log off
+SLOW_REQUEST_MS = float(os.getenv("SLOW_REQUEST_LOG_MS", "0"))
+
+SQL_OPERATIONS = {"SELECT", "INSERT", "UPDATE", "DELETE", "PRAGMA", "WITH"}
+
+# stage -> [seconds, count] for the request being served. Sync endpoints run in the threadpool
+# with a copy of the request's context, which still points at the same dict.
+_request_stages = ContextVar("request_stages", default=None)
+_commit_started = ContextVar("commit_started", default=None)
+
+
+def add_stage(stage: str, seconds: float):
+    stages = _request_stages.get()
+    if stages is not None:
+        entry = stages.setdefault(stage, [0.0, 0])
+        entry[0] += seconds
+        entry[1] += 1
+
+@contextmanager
+def timed(stage: str, histogram: metrics.Histogram = None, *labelvalues):
+    """
+    Times a block, records it in `histogram` and adds it to the current request's `stage`.
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        if histogram is not None:
+            histogram.observe(elapsed, *labelvalues)
+        add_stage(stage, elapsed)
+
+
+# --- HTTP ---
+class TimingMiddleware:
+    """
+    ASGI middleware timing every HTTP request to its last response byte (so streamed
+    responses are counted in full), labelled by route template rather than raw path.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stages = {}
+        token = _request_stages.set(stages)
+        status = [500]
+        start = time.perf_counter()
+
+        async def send_with_status(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - start
+            _request_stages.reset(token)
+            route = getattr(scope.get("route"), "path", "unmatched")
+            record_request(scope["method"], route, status[0], elapsed, stages, scope.get("path", ""))
+
+def record_request(method: str, route: str, status: int, elapsed: float, stages: dict, path: str = ""):
+    metrics.HTTP_REQUEST_SECONDS.observe(elapsed, method, route, str(status))
+    accounted = 0.0
+    for stage, (seconds, _) in stages.items():
+        metrics.HTTP_STAGE_SECONDS.observe(seconds, route, stage)
+        accounted += seconds
+    metrics.HTTP_STAGE_SECONDS.observe(max(elapsed - accounted, 0.0), route, "other")
+
+    if SLOW_REQUEST_MS and elapsed * 1000 >= SLOW_REQUEST_MS:
+        breakdown = ", ".join(
+            f"{stage} {seconds * 1000:.1f} ms/{count}x" for stage, (seconds, count) in sorted(stages.items())
+        )
+        other = max(elapsed - accounted, 0.0) * 1000
+        print(f"Slow request: {method} {path} -> {status} in {elapsed * 1000:.1f} ms "
+              f"({breakdown + ', ' if breakdown else ''}other {other:.1f} ms)")
+
+
+# --- SQLAlchemy ---
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info["query_start"].pop()
+    operation = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else "OTHER"
+    metrics.SQL_STATEMENT_SECONDS.observe(elapsed, operation if operation in SQL_OPERATIONS else "OTHER")
+    add_stage("sql", elapsed)
+
+def _session_before_commit(session):
+    # Runs before the flush; drops a start left behind by a commit outside a Session
+    _commit_started.set(None)
+
+def _before_commit(conn):
+    _commit_started.set(time.perf_counter())
+
+def _after_commit(session):
+    start = _commit_started.get()
+    if start is not None:
+        _commit_started.set(None)
+        elapsed = time.perf_counter() - start
+        metrics.SQL_COMMIT_SECONDS.observe(elapsed)
+        add_stage("sql_commit", elapsed)
+
+def instrument_engine(engine):
+    """
+    Registers the statement and commit timers on a (sync) Engine; pass async_engine.sync_engine for async.
+    """
+    if not metrics.METRICS_ENABLED:
+        return
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine, "commit", _before_commit)
+    if not event.contains(Session, "after_commit", _after_commit):
+        event.listen(Session, "before_commit", _session_before_commit)
+        event.listen(Session, "after_commit", _after_commit)
+
+
+# --- pymongo ---
+class MongoCommandTimer(monitoring.CommandListener):
+    """
+    Command monitoring listener; pymongo calls it synchronously in the thread/task that ran the command.
+    """
+
+    def started(self, event):
+        pass
+
+    def succeeded(self, event):
+        self._record(event, "success")
+
+    def failed(self, event):
+        self._record(event, "failure")
+
+    @staticmethod
+    def _record(event, outcome: str):
+        elapsed = event.duration_micros / 1e6
+        metrics.MONGO_COMMAND_SECONDS.observe(elapsed, event.command_name, outcome)
+        add_stage("mongo", elapsed)
+
+def mongo_event_listeners() -> list:
+    """
+    Listeners to pass to MongoClient(..., event_listeners=...).
+    """
+    return [MongoCommandTimer()] if metrics.METRICS_ENABLED else []
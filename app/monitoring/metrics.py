@@ -0,0 +1,121 @@
+"""
+In-process histograms (and gauges read at scrape time) rendered in the Prometheus text
+exposition format (served at GET /metrics).
+
+Each API worker process keeps its own series; Prometheus scrapes and aggregates them.
+"""
+import bisect
+import os
+import threading
+
+# --- Configuration ---
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "on") == "on"
+# Seconds. Fine-grained at the low end, where single SQLite statements and Mongo commands land.
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_registry = []
+
+
+class Histogram:
+    """
+    Cumulative-bucket histogram with a fixed set of labels, e.g.
+        SQL_STATEMENT_SECONDS.observe(0.0012, "SELECT")
+    """
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple = (), buckets: tuple = DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._series = {}  # label values -> [per-bucket counts (+Inf last), sum]
+        self._lock = threading.Lock()
+        _registry.append(self)
+
+    def observe(self, value: float, *labelvalues):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labelvalues)
+            if series is None:
+                series = self._series[labelvalues] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+
+    def clear(self):
+        with self._lock:
+            self._series.clear()
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = [(labels, list(counts), total) for labels, (counts, total) in self._series.items()]
+        for labelvalues, counts, total in sorted(series):
+            labels = [f'{name}="{_escape(value)}"' for name, value in zip(self.labelnames, labelvalues)]
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                bucket_labels = ",".join(labels + [f'le="{le}"'])
+                lines.append(f"{self.name}_bucket{{{bucket_labels}}} {cumulative}")
+            suffix = f"{{{','.join(labels)}}}" if labels else ""
+            lines.append(f"{self.name}_sum{suffix} {total}")
+            lines.append(f"{self.name}_count{suffix} {cumulative}")
+        return lines
+
+
+class Gauge:
+    """
+    A value read when /metrics is rendered, e.g. a row count kept in the database, so every
+    worker reports the same figure. `read` returns a number, or None to leave the gauge out.
+    """
+
+    def __init__(self, name: str, documentation: str, read):
+        self.name = name
+        self.documentation = documentation
+        self.read = read
+        _registry.append(self)
+
+    def render(self) -> list:
+        try:
+            value = self.read()
+        except Exception as e:
+            print(f"Could not read gauge {self.name}: {e}")
+            value = None
+        if value is None:
+            return []
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} gauge", f"{self.name} {value}"]
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def render_all() -> str:
+    lines = []
+    for histogram in _registry:
+        lines.extend(histogram.render())
+    return "\n".join(lines) + "\n"
+
+
+# --- Metrics recorded by app/monitoring/instrumentation.py ---
+HTTP_REQUEST_SECONDS = Histogram(
+    "http_request_duration_seconds", "Time from request start to the last response byte.",
+    ("method", "route", "status"),
+)
+HTTP_STAGE_SECONDS = Histogram(
+    "http_request_stage_seconds", "Time each request spent per stage (sql, sql_commit, mongo, scoring, other).",
+    ("route", "stage"),
+)
+SQL_STATEMENT_SECONDS = Histogram(
+    "sql_statement_duration_seconds", "SQLite statement execution time by statement type.",
+    ("operation",),
+)
+SQL_COMMIT_SECONDS = Histogram(
+    "sql_commit_duration_seconds", "Time spent in SQLite COMMIT (session commits).",
+)
+MONGO_COMMAND_SECONDS = Histogram(
+    "mongo_command_duration_seconds", "MongoDB command round-trip time as reported by pymongo.",
+    ("command", "outcome"),
+)
+MODEL_SCORING_SECONDS = Histogram(
+    "model_scoring_duration_seconds", "Time to encode and score one batch of records.",
+    ("backend",),
+)
@@ -0,0 +1,208 @@
+"""
+Opt-in recording of API traffic for offline replay (benchmarks/replay.py).
+
+With TRAFFIC_CAPTURE_DIR set, every HTTP request is written as one JSON line:
+    {"ts": 1760000000.123, "method": "POST", "path": "/applications/", "route": "/applications/",
+     "query": "", "body": {...}, "status": 200, "duration_ms": 4.2}
+Only what a replay needs is kept: no headers (cookies, credentials), no client address, JSON bodies
+only, with the values of TRAFFIC_CAPTURE_REDACT keys replaced. Requests to /metrics and the probes
+are skipped.
+
+The request path only appends the raw parts to a bounded queue; a writer thread does the decoding,
+redaction and buffered writes. When the writer falls behind, requests are dropped from the capture
+(and counted) rather than slowed down. Each process writes its own files,
+    <dir>/capture-<pid>-<started>-<n>.jsonl
+starting a new one after TRAFFIC_CAPTURE_MAX_MB and keeping its last TRAFFIC_CAPTURE_MAX_FILES.
+"""
+import json
+import os
+import queue
+import threading
+import time
+
+# --- Configuration ---
+CAPTURE_DIR = os.getenv("TRAFFIC_CAPTURE_DIR", "")  # empty: capture is off
+CAPTURE_ENABLED = bool(CAPTURE_DIR)
+MAX_FILE_BYTES = int(float(os.getenv("TRAFFIC_CAPTURE_MAX_MB", "64")) * 1024 * 1024)
+MAX_FILES = int(os.getenv("TRAFFIC_CAPTURE_MAX_FILES", "10"))  # per process
+REDACTED_KEYS = {key.strip().lower() for key in os.getenv("TRAFFIC_CAPTURE_REDACT", "password,token,secret,api_key,authorization").split(",") if key.strip()}
+SKIPPED_PATHS = {"/metrics", "/ready", "/favicon.ico"}
+MAX_BODY_BYTES = 256 * 1024  # larger bodies are recorded without the body
+QUEUE_SIZE = 10000           # requests waiting for the writer
+FLUSH_INTERVAL = 1.0         # seconds between flushes while traffic is flowing
+REDACTED = "[redacted]"
+
+
+def redact(value):
+    """
+    Replaces the values of REDACTED_KEYS anywhere in a decoded JSON body.
+    """
+    if isinstance(value, dict):
+        return {key: REDACTED if key.lower() in REDACTED_KEYS else redact(inner) for key, inner in value.items()}
+    if isinstance(value, list):
+        return [redact(inner) for inner in value]
+    return value
+
+def decode_body(body: bytes, content_type: str):
+    """
+    The JSON body, redacted; None for an empty, non-JSON or oversized body.
+    """
+    if not body or len(body) > MAX_BODY_BYTES or "json" not in content_type:
+        return None
+    try:
+        return redact(json.loads(body))
+    except ValueError:
+        return None
+
+
+# --- Writer ---
+class CaptureWriter:
+    """
+    Background thread writing captured requests to rotating JSON Lines files.
+    """
+
+    def __init__(self, directory: str = CAPTURE_DIR, max_file_bytes: int = MAX_FILE_BYTES, max_files: int = MAX_FILES):
+        self.directory = directory
+        self.max_file_bytes = max_file_bytes
+        self.max_files = max_files
+        self.written = 0
+        self.dropped = 0
+        self._queue = queue.Queue(QUEUE_SIZE)
+        self._files = []  # paths written by this process, oldest first
+        self._file = None
+        self._file_bytes = 0
+        self._thread = None
+
+    def submit(self, entry: tuple):
+        """
+        Called on the request path: never blocks, drops the entry when the queue is full.
+        """
+        try:
+            self._queue.put_nowait(entry)
+        except queue.Full:
+            self.dropped += 1
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            os.makedirs(self.directory, exist_ok=True)
+            self._thread = threading.Thread(target=self._run, name="traffic-capture", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: float = 5.0):
+        """
+        Writes out what is queued and closes the current file.
+        """
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _run(self):
+        last_flush = time.monotonic()
+        while True:
+            try:
+                entry = self._queue.get(timeout=FLUSH_INTERVAL)
+            except queue.Empty:
+                entry = ()
+            if entry is None:
+                break
+            if entry:
+                try:
+                    self._write(self._record(*entry))
+                except Exception as e:
+                    self.dropped += 1
+                    print(f"Traffic capture failed to write a request: {e}")
+            # Flush when idle or at least every FLUSH_INTERVAL, so captures are readable while running
+            if self._file is not None and (not entry or time.monotonic() - last_flush >= FLUSH_INTERVAL):
+                self._file.flush()
+                last_flush = time.monotonic()
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    @staticmethod
+    def _record(started_at, method, path, route, query, content_type, body, status, elapsed) -> dict:
+        return {
+            "ts": round(started_at, 6),
+            "method": method,
+            "path": path,
+            "route": route,
+            "query": query,
+            "body": decode_body(body, content_type),
+            "status": status,
+            "duration_ms": round(elapsed * 1000, 3),
+        }
+
+    def _write(self, record: dict):
+        line = json.dumps(record, separators=(",", ":"), default=str) + "\n"
+        if self._file is None or self._file_bytes >= self.max_file_bytes:
+            self._rotate()
+        self._file.write(line)
+        self._file_bytes += len(line)
+        self.written += 1
+
+    def _rotate(self):
+        if self._file is not None:
+            self._file.close()
+        path = os.path.join(self.directory, f"capture-{os.getpid()}-{time.strftime('%Y%m%d-%H%M%S')}-{len(self._files)}.jsonl")
+        self._file = open(path, "w", buffering=1024 * 1024, encoding="utf-8")
+        self._file_bytes = 0
+        self._files.append(path)
+        while len(self._files) > max(self.max_files, 1):
+            try:
+                os.remove(self._files.pop(0))
+            except FileNotFoundError:
+                pass
+
+
+writer = CaptureWriter()
+
+
+# --- HTTP ---
+class TrafficCaptureMiddleware:
+    """
+    ASGI middleware handing every HTTP request (and its body, as received) to the capture writer.
+    """
+
+    def __init__(self, app, capture_writer: CaptureWriter = None):
+        self.app = app
+        self.writer = capture_writer or writer
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope.get("path") in SKIPPED_PATHS:
+            await self.app(scope, receive, send)
+            return
+
+        chunks, size = [], [0]
+        status = [500]
+        started_at, start = time.time(), time.perf_counter()
+
+        async def receive_and_keep():
+            message = await receive()
+            if message["type"] == "http.request" and size[0] <= MAX_BODY_BYTES:
+                chunk = message.get("body", b"")
+                chunks.append(chunk)
+                size[0] += len(chunk)
+            return message
+
+        async def send_with_status(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive_and_keep, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - start
+            headers = dict(scope.get("headers") or [])
+            self.writer.submit((
+                started_at,
+                scope["method"],
+                scope.get("path", ""),
+                getattr(scope.get("route"), "path", "unmatched"),
+                scope.get("query_string", b"").decode("latin-1"),
+                headers.get(b"content-type", b"").decode("latin-1"),
+                b"".join(chunks) if size[0] <= MAX_BODY_BYTES else b"",
+                status[0],
+                elapsed,
+            ))
@@ -0,0 +1,36 @@
+from fastapi import APIRouter, Depends, HTTPException
+from pymongo import MongoClient
+from typing import List
+
+from app.crud import analytics_crud
+from app.models import pydantic_schemas
+from app.db.database import get_mongo_client
+
+router = APIRouter()
+
+@router.get("/analytics/approval-rates", response_model=List[pydantic_schemas.Rollup], tags=["Analytics"])
+def read_approval_rates(mongo: MongoClient = Depends(get_mongo_client)):
+    """
+    Approval counts and rates for every intent, education, home ownership and income bucket,
+    read from the pre-aggregated loanRollups collection.
+    """
+    return analytics_crud.get_rollups(mongo)
+
+@router.get("/analytics/approval-rates/{dimension}", response_model=List[pydantic_schemas.Rollup], tags=["Analytics"])
+def read_approval_rates_by(dimension: str, mongo: MongoClient = Depends(get_mongo_client)):
+    """
+    Approval counts and rates for one dimension (intent, education, homeOwnership or incomeBucket).
+    """
+    if dimension not in analytics_crud.DIMENSIONS:
+        raise HTTPException(status_code=404, detail=f"Unknown dimension '{dimension}'")
+    return analytics_crud.get_rollups(mongo, dimension)
+
+@router.post("/analytics/rebuild", response_model=pydantic_schemas.RollupRebuild, tags=["Analytics"])
+def rebuild_rollups(mongo: MongoClient = Depends(get_mongo_client)):
+    """
+    Recomputes all rollups from loanApplications (for recovery).
+    """
+    try:
+        return {"rollups": analytics_crud.rebuild_rollups(mongo)}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"An error occurred: {e}")
@@ -0,0 +1,145 @@
+import json
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from pymongo import AsyncMongoClient
+from typing import List
+
+from app.crud import sql_crud, async_sql_crud, async_mongo_crud, person_cache
+from app.models import pydantic_schemas
+from app.db.database import get_async_db, get_async_mongo_client, USE_OUTBOX, USE_CDC
+from app.routes import loan_routes
+
+# Same endpoints as loan_routes.py, served from the event loop (API_MODE=async)
+router = APIRouter()
+
+@router.post("/applications/", response_model=pydantic_schemas.Person, tags=["Applications"])
+async def create_pending_application(
+    application: pydantic_schemas.ApplicationCreate,
+    db: AsyncSession = Depends(get_async_db),
+    mongo: AsyncMongoClient = Depends(get_async_mongo_client)
+):
+    """
+    Receives a new loan application and creates records in both SQL and MongoDB
+    with a status of 'Pending'.
+    """
+    try:
+        # The Mongo document references the SQL loan_id, so the SQL insert goes first
+        person_with_loan = await async_sql_crud.create_person_and_loan(db=db, application_data=application, predicted_status="Pending", outbox=USE_OUTBOX)
+        if not USE_OUTBOX:
+            new_loan_id = person_with_loan.loans[0].loan_id
+            await async_mongo_crud.create_application_document(mongo, application, "Pending", new_loan_id)
+
+        return person_with_loan
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"An error occurred: {e}")
+
+@router.post("/applications/batch", response_model=List[pydantic_schemas.CreatedApplication], tags=["Applications"])
+async def create_pending_applications_batch(
+    applications: List[pydantic_schemas.ApplicationCreate],
+    db: AsyncSession = Depends(get_async_db),
+    mongo: AsyncMongoClient = Depends(get_async_mongo_client)
+):
+    """
+    Receives many loan applications and creates all of them as 'Pending'
+    with one SQL transaction and one MongoDB insert_many.
+    """
+    try:
+        ids = await async_sql_crud.create_persons_and_loans(db=db, applications=applications, predicted_status="Pending", outbox=USE_OUTBOX)
+        if not USE_OUTBOX:
+            await async_mongo_crud.create_application_documents(mongo, applications, "Pending", [loan_id for _, loan_id in ids])
+
+        return [
+            {"person_id": person_id, "loan_id": loan_id, "loan_status": "Pending"}
+            for person_id, loan_id in ids
+        ]
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"An error occurred: {e}")
+
+@router.put("/loans/{loan_id}", response_model=pydantic_schemas.Loan, tags=["Loans"])
+async def update_loan_status_in_both_dbs(
+    loan_id: int,
+    loan_update: pydantic_schemas.LoanUpdate,
+    db: AsyncSession = Depends(get_async_db),
+    mongo: AsyncMongoClient = Depends(get_async_mongo_client)
+):
+    """
+    Updates the status of a loan in both the SQL and MongoDB databases.
+    MongoDB is only written once the SQL update has committed, as in the sync route
+    (in outbox mode the MongoDB write is queued with the SQL commit instead, in cdc mode it is tailed
+    from loan_status_log).
+    """
+    updated_sql_loan = await async_sql_crud.update_loan_status(db=db, loan_id=loan_id, status=loan_update.loan_status, outbox=USE_OUTBOX)
+    if updated_sql_loan is None:
+        raise HTTPException(status_code=404, detail="Loan not found in SQL database")
+
+    if not USE_OUTBOX and not USE_CDC:
+        await async_mongo_crud.update_document_status(mongo, loan_id, loan_update.loan_status)
+
+    return updated_sql_loan
+
+async def ndjson_chunks(chunks):
+    async for chunk in chunks:
+        yield "".join(json.dumps(row) + "\n" for row in chunk)
+
+@router.get("/loans", response_model=pydantic_schemas.LoanPage, tags=["Loans"])
+async def list_loans(
+    filters: dict = Depends(loan_routes.list_filters),
+    limit: int = Query(loan_routes.DEFAULT_PAGE_SIZE, ge=1, le=loan_routes.MAX_PAGE_SIZE),
+    output_format: str = loan_routes.LIST_FORMAT,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Lists loans in loan_id order, filtered by status, intent and the owner's income.
+    Pages are keyset-paginated: pass next_after_id back as after_id.
+    """
+    if output_format == "ndjson":
+        query = sql_crud.loan_list_query(**filters)
+        return StreamingResponse(ndjson_chunks(async_sql_crud.stream_rows(db, query, loan_routes.STREAM_CHUNK_SIZE)), media_type="application/x-ndjson")
+    rows = await async_sql_crud.list_rows(db, sql_crud.loan_list_query(**filters, limit=limit))
+    return loan_routes.page(rows, "loan_id", limit)
+
+@router.get("/persons", response_model=pydantic_schemas.PersonPage, tags=["Persons"])
+async def list_persons(
+    filters: dict = Depends(loan_routes.list_filters),
+    limit: int = Query(loan_routes.DEFAULT_PAGE_SIZE, ge=1, le=loan_routes.MAX_PAGE_SIZE),
+    output_format: str = loan_routes.LIST_FORMAT,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Lists persons in person_id order, filtered by income and by having a loan with the given status/intent.
+    Pages are keyset-paginated: pass next_after_id back as after_id.
+    """
+    if output_format == "ndjson":
+        query = sql_crud.person_list_query(**filters)
+        return StreamingResponse(ndjson_chunks(async_sql_crud.stream_rows(db, query, loan_routes.STREAM_CHUNK_SIZE)), media_type="application/x-ndjson")
+    rows = await async_sql_crud.list_rows(db, sql_crud.person_list_query(**filters, limit=limit))
+    return loan_routes.page(rows, "person_id", limit)
+
+@router.get("/persons/{person_id}", response_model=pydantic_schemas.Person, tags=["Persons"])
+async def read_person(person_id: int, db: AsyncSession = Depends(get_async_db)):
+    last_log_id = 0
+    cached = person_cache.get(person_id)
+    if cached is not None:
+        last_log_id, changed = await async_sql_crud.loan_changes(db, cached.log_id, cached.loan_ids)
+        if not changed:
+            person_cache.confirm(person_id, cached, last_log_id)
+            return Response(content=cached.body, media_type="application/json")
+    elif person_cache.CACHE_SIZE > 0:
+        last_log_id = await async_sql_crud.last_status_change_id(db)
+
+    db_person = await async_sql_crud.get_person(db, person_id=person_id)
+    if db_person is None:
+        raise HTTPException(status_code=404, detail="Person not found")
+    body = pydantic_schemas.Person.model_validate(db_person).model_dump_json().encode()
+    person_cache.put(person_id, body, last_log_id, [loan.loan_id for loan in db_person.loans])
+    return Response(content=body, media_type="application/json")
+
+# Scoring is CPU-bound with no I/O, so the sync handler (run on the threadpool) is reused
+router.add_api_route(
+    "/predict/batch",
+    loan_routes.predict_batch,
+    methods=["POST"],
+    response_model=List[pydantic_schemas.LoanPrediction],
+    tags=["Predictions"],
+)
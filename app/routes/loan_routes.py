@@ -1,15 +1,40 @@
-from fastapi import APIRouter, Depends, HTTPException
+import json
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, Response
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from pymongo import MongoClient
-import pandas as pd
-import joblib
+from typing import List, Optional
 
-from app.crud import sql_crud, mongo_crud
+from app.crud import sql_crud, mongo_crud, person_cache
 from app.models import pydantic_schemas
-from app.db.database import get_db, get_mongo_client
+from app.db.database import get_db, get_mongo_client, USE_OUTBOX, USE_CDC
 
 router = APIRouter()
 
+# --- Listing ---
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+STREAM_CHUNK_SIZE = 5000  # rows fetched from the cursor per NDJSON chunk
+LIST_FORMAT = Query("json", alias="format", pattern="^(json|ndjson)$",
+                    description="ndjson streams every matching row after after_id, one JSON object per line")
+
+def list_filters(
+    loan_status: Optional[str] = None,
+    loan_intent_id: Optional[int] = None,
+    min_income: Optional[float] = None,
+    max_income: Optional[float] = None,
+    after_id: int = Query(0, ge=0, description="Primary key to continue after (next_after_id of the previous page)"),
+):
+    return {"loan_status": loan_status, "loan_intent_id": loan_intent_id,
+            "min_income": min_income, "max_income": max_income, "after_id": after_id}
+
+def page(rows: list, id_field: str, limit: int) -> dict:
+    return {"items": rows, "next_after_id": rows[-1][id_field] if len(rows) == limit else None}
+
+def ndjson_chunks(chunks):
+    for chunk in chunks:
+        yield "".join(json.dumps(row) + "\n" for row in chunk)
+
 @router.post("/applications/", response_model=pydantic_schemas.Person, tags=["Applications"])
 def create_pending_application(
     application: pydantic_schemas.ApplicationCreate, 
@@ -22,18 +47,41 @@ def create_pending_application(
     """
     try:
         # Create the record in the SQL database first to get the person/loan IDs
-        person_with_loan = sql_crud.create_person_and_loan(db=db, application_data=application, predicted_status="Pending")
-        
-        # Get the new SQL loan_id
-        new_loan_id = person_with_loan.loans[0].loan_id
-        
-        # Now create the document in MongoDB, passing the new loan_id for reference
-        mongo_crud.create_application_document(mongo, application, "Pending", new_loan_id)
-        
+        person_with_loan = sql_crud.create_person_and_loan(db=db, application_data=application, predicted_status="Pending", outbox=USE_OUTBOX)
+
+        if not USE_OUTBOX:
+            # Get the new SQL loan_id
+            new_loan_id = person_with_loan.loans[0].loan_id
+
+            # Now create the document in MongoDB, passing the new loan_id for reference
+            mongo_crud.create_application_document(mongo, application, "Pending", new_loan_id)
+
         return person_with_loan
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"An error occurred: {e}")
 
+@router.post("/applications/batch", response_model=List[pydantic_schemas.CreatedApplication], tags=["Applications"])
+def create_pending_applications_batch(
+    applications: List[pydantic_schemas.ApplicationCreate],
+    db: Session = Depends(get_db),
+    mongo: MongoClient = Depends(get_mongo_client)
+):
+    """
+    Receives many loan applications and creates all of them as 'Pending'
+    with one SQL transaction and one MongoDB insert_many.
+    """
+    try:
+        ids = sql_crud.create_persons_and_loans(db=db, applications=applications, predicted_status="Pending", outbox=USE_OUTBOX)
+        if not USE_OUTBOX:
+            mongo_crud.create_application_documents(mongo, applications, "Pending", [loan_id for _, loan_id in ids])
+
+        return [
+            {"person_id": person_id, "loan_id": loan_id, "loan_status": "Pending"}
+            for person_id, loan_id in ids
+        ]
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"An error occurred: {e}")
+
 @router.put("/loans/{loan_id}", response_model=pydantic_schemas.Loan, tags=["Loans"])
 def update_loan_status_in_both_dbs(
     loan_id: int, 
@@ -45,19 +93,92 @@ def update_loan_status_in_both_dbs(
     Updates the status of a loan in both the SQL and MongoDB databases.
     """
     # Update in SQL
-    updated_sql_loan = sql_crud.update_loan_status(db=db, loan_id=loan_id, status=loan_update.loan_status)
+    updated_sql_loan = sql_crud.update_loan_status(db=db, loan_id=loan_id, status=loan_update.loan_status, outbox=USE_OUTBOX)
     if updated_sql_loan is None:
         raise HTTPException(status_code=404, detail="Loan not found in SQL database")
-    
-    # Update in MongoDB
-    mongo_crud.update_document_status(mongo, loan_id, loan_update.loan_status)
+
+    # Update in MongoDB (queued with the SQL commit in outbox mode, tailed from loan_status_log in cdc mode)
+    if not USE_OUTBOX and not USE_CDC:
+        mongo_crud.update_document_status(mongo, loan_id, loan_update.loan_status)
     
     return updated_sql_loan
 
+@router.get("/loans", response_model=pydantic_schemas.LoanPage, tags=["Loans"])
+def list_loans(
+    filters: dict = Depends(list_filters),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    output_format: str = LIST_FORMAT,
+    db: Session = Depends(get_db)
+):
+    """
+    Lists loans in loan_id order, filtered by status, intent and the owner's income.
+    Pages are keyset-paginated: pass next_after_id back as after_id.
+    """
+    if output_format == "ndjson":
+        query = sql_crud.loan_list_query(**filters)
+        return StreamingResponse(ndjson_chunks(sql_crud.stream_rows(db, query, STREAM_CHUNK_SIZE)), media_type="application/x-ndjson")
+    rows = sql_crud.list_rows(db, sql_crud.loan_list_query(**filters, limit=limit))
+    return page(rows, "loan_id", limit)
+
 # You can keep your GET endpoints for checking data
+@router.get("/persons", response_model=pydantic_schemas.PersonPage, tags=["Persons"])
+def list_persons(
+    filters: dict = Depends(list_filters),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    output_format: str = LIST_FORMAT,
+    db: Session = Depends(get_db)
+):
+    """
+    Lists persons in person_id order, filtered by income and by having a loan with the given status/intent.
+    Pages are keyset-paginated: pass next_after_id back as after_id.
+    """
+    if output_format == "ndjson":
+        query = sql_crud.person_list_query(**filters)
+        return StreamingResponse(ndjson_chunks(sql_crud.stream_rows(db, query, STREAM_CHUNK_SIZE)), media_type="application/x-ndjson")
+    rows = sql_crud.list_rows(db, sql_crud.person_list_query(**filters, limit=limit))
+    return page(rows, "person_id", limit)
+
 @router.get("/persons/{person_id}", response_model=pydantic_schemas.Person, tags=["Persons"])
 def read_person(person_id: int, db: Session = Depends(get_db)):
+    # Serve the cached JSON if no process changed this person's loans since it was built
+    last_log_id = 0
+    cached = person_cache.get(person_id)
+    if cached is not None:
+        last_log_id, changed = sql_crud.loan_changes(db, cached.log_id, cached.loan_ids)
+        if not changed:
+            person_cache.confirm(person_id, cached, last_log_id)
+            return Response(content=cached.body, media_type="application/json")
+    elif person_cache.CACHE_SIZE > 0:
+        last_log_id = sql_crud.last_status_change_id(db)
+
     db_person = sql_crud.get_person(db, person_id=person_id)
     if db_person is None:
         raise HTTPException(status_code=404, detail="Person not found")
-    return db_person
\ No newline at end of file
+    body = pydantic_schemas.Person.model_validate(db_person).model_dump_json().encode()
+    person_cache.put(person_id, body, last_log_id, [loan.loan_id for loan in db_person.loans])
+    return Response(content=body, media_type="application/json")
+
+def scoring_engine_dependency():
+    # Imported here so the router does not load joblib and NumPy at import; startup loads the model
+    from app.ml.scoring_engine import get_scoring_engine
+    return get_scoring_engine()
+
+@router.post("/predict/batch", response_model=List[pydantic_schemas.LoanPrediction], tags=["Predictions"])
+def predict_batch(
+    applications: List[pydantic_schemas.ScoringRequest],
+    background_tasks: BackgroundTasks,
+    engine=Depends(scoring_engine_dependency)
+):
+    """
+    Scores a batch of applications in one vectorized call using the resident model.
+    Nothing is written to the databases. A shadow model, if set, scores the same batch after the response.
+    """
+    from app.ml.scoring_engine import shadow_score
+
+    records = [application.model_dump() for application in applications]
+    results = engine.score(records)
+    background_tasks.add_task(shadow_score, records, results)
+    return [
+        {"loan_id": record["loan_id"], "approval_probability": probability, "predicted_status": status, "model_version": engine.version}
+        for record, (probability, status) in zip(records, results)
+    ]
@@ -0,0 +1,12 @@
+from fastapi import APIRouter, Response
+
+from app.monitoring import metrics
+
+router = APIRouter()
+
+@router.get("/metrics", tags=["Monitoring"])
+def read_metrics():
+    """
+    Request, SQL, MongoDB and scoring latency histograms of this worker, in Prometheus text format.
+    """
+    return Response(content=metrics.render_all(), media_type="text/plain; version=0.0.4; charset=utf-8")
@@ -0,0 +1,86 @@
+from fastapi import APIRouter, HTTPException
+
+from app.models import pydantic_schemas
+
+router = APIRouter()
+
+# The registry and the engine (joblib, NumPy) are imported by the handlers, after startup has loaded them
+
+def _status():
+    from app.ml import model_registry, scoring_engine
+
+    shadow = scoring_engine.get_shadow_engine()
+    return {
+        "active_version": scoring_engine.get_scoring_engine().version,
+        "shadow_version": shadow.version if shadow else None,
+        "versions": model_registry.list_versions(),
+    }
+
+@router.get("/models", response_model=pydantic_schemas.ModelStatus, tags=["Models"])
+def read_models():
+    """
+    Lists the registered model versions and which ones this worker is serving.
+    """
+    return _status()
+
+@router.post("/models/{version}/activate", response_model=pydantic_schemas.ModelStatus, tags=["Models"])
+def activate_model(version: str):
+    """
+    Swaps the served model without a restart. Other workers pick it up from the registry.
+    """
+    from app.ml import scoring_engine
+
+    try:
+        scoring_engine.swap_engine(version)
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"Model version '{version}' not found")
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return _status()
+
+@router.post("/models/{version}/shadow", response_model=pydantic_schemas.ModelStatus, tags=["Models"])
+def shadow_model(version: str):
+    """
+    Scores live /predict/batch traffic with this version as well, without affecting responses.
+    """
+    from app.ml import scoring_engine
+
+    try:
+        scoring_engine.set_shadow_engine(version)
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"Model version '{version}' not found")
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return _status()
+
+@router.delete("/models/shadow", response_model=pydantic_schemas.ModelStatus, tags=["Models"])
+def stop_shadow_model():
+    from app.ml import scoring_engine
+
+    scoring_engine.set_shadow_engine(None)
+    return _status()
+
+@router.get("/models/shadow/stats", response_model=pydantic_schemas.ShadowStats, tags=["Models"])
+def read_shadow_stats():
+    """
+    How often the shadow model disagrees with the active one on live traffic.
+    """
+    from app.ml import scoring_engine
+
+    return scoring_engine.shadow_stats.snapshot()
+
+@router.get("/models/cache/stats", response_model=pydantic_schemas.PredictionCacheStats, tags=["Models"])
+def read_prediction_cache_stats():
+    """
+    Hit/miss counters of the prediction cache in this worker.
+    """
+    from app.ml import scoring_engine
+
+    return scoring_engine.prediction_cache.stats()
+
+@router.delete("/models/cache", response_model=pydantic_schemas.PredictionCacheStats, tags=["Models"])
+def clear_prediction_cache():
+    from app.ml import scoring_engine
+
+    scoring_engine.prediction_cache.clear()
+    return scoring_engine.prediction_cache.stats()
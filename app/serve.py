@@ -0,0 +1,219 @@
+"""
+Production entry point: one parent process that loads everything once, and forked uvicorn workers.
+
+The parent imports the app, creates the schema and loads and warms the model, then freezes
+those objects out of the garbage collector and forks the workers. The workers share those
+memory pages copy-on-write instead of each loading its own copy. The parent never opens a
+database connection or MongoDB client, and each worker drops whatever it inherited
+(database.reset_after_fork) and connects on its own.
+
+The workers accept connections on one listening socket opened by the parent. A worker that
+has served about --max-requests requests finishes its in-flight requests and exits, and the
+parent forks a fresh one. SIGHUP replaces the workers one at a time. SIGTERM/SIGINT shuts
+down gracefully.
+
+Run from the project root:
+    python -m app.serve --workers 4 --port 8000
+"""
+import argparse
+import gc
+import os
+import random
+import signal
+import socket
+import time
+import uvicorn
+
+# --- Configuration ---
+HOST = os.getenv("SERVE_HOST", "0.0.0.0")
+PORT = int(os.getenv("SERVE_PORT", "8000"))
+WORKERS = int(os.getenv("SERVE_WORKERS", str(os.cpu_count() or 1)))
+MAX_REQUESTS = int(os.getenv("SERVE_MAX_REQUESTS", "50000"))        # per worker before it is recycled; 0 = never
+MAX_REQUESTS_JITTER = int(os.getenv("SERVE_MAX_REQUESTS_JITTER", "5000"))  # spreads recycling out over time
+GRACEFUL_TIMEOUT = float(os.getenv("SERVE_GRACEFUL_TIMEOUT", "30"))  # seconds a stopping worker gets for in-flight requests
+BACKLOG = 2048
+CRASH_WINDOW = 5.0      # a worker exiting with an error sooner than this after its start...
+CRASH_BACKOFF = 1.0     # ...is restarted after this delay (doubling while it keeps crashing)
+MAX_CRASH_BACKOFF = 30.0
+
+
+def preload():
+    """
+    Runs once in the parent before forking: everything here is shared by all workers.
+    """
+    from app.crud import lookup_cache
+    from app.db import database
+    from app.ml import scoring_engine
+
+    database.init_sql()
+    scoring_engine.warm_engine()
+    lookup_cache.load()
+    # The parent must not hand pooled connections or MongoDB clients to its children
+    database.engine.dispose()
+    database.close_mongo()
+
+
+def bind_socket(host: str, port: int) -> socket.socket:
+    sock = socket.socket(socket.AF_INET6 if ":" in host else socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(BACKLOG)
+    sock.set_inheritable(True)
+    return sock
+
+
+def run_worker(slot: int, sock: socket.socket, args):
+    """
+    Body of a forked worker; never returns.
+    """
+    from app import main
+    from app.db import database
+
+    for signum in (signal.SIGTERM, signal.SIGINT, signal.SIGHUP):
+        signal.signal(signum, signal.SIG_DFL)
+    # Own process group: Ctrl+C reaches only the parent, which then stops the workers once
+    os.setpgid(0, 0)
+    random.seed()
+    database.reset_after_fork()
+    # Only one worker drains the outbox (or tails the status log), so nothing is delivered twice
+    main.RUN_OUTBOX_DISPATCHER = main.USE_OUTBOX and slot == 0
+    main.RUN_CDC_TAILER = main.USE_CDC and slot == 0
+
+    max_requests = None
+    if args.max_requests:
+        max_requests = args.max_requests + random.randint(0, args.max_requests_jitter)
+    config = uvicorn.Config(
+        main.app,
+        lifespan="on",
+        limit_max_requests=max_requests,
+        timeout_graceful_shutdown=args.graceful_timeout,
+        log_level=args.log_level,
+        access_log=args.access_log,
+    )
+    status = 0
+    try:
+        uvicorn.Server(config).run(sockets=[sock])
+    except BaseException as e:
+        print(f"Worker {slot} (pid {os.getpid()}) failed: {e}")
+        status = 1
+    finally:
+        os._exit(status)
+
+
+class Supervisor:
+    """
+    Keeps `workers` forked workers running, one per slot, and handles the process signals.
+    """
+
+    def __init__(self, sock: socket.socket, args):
+        self.sock = sock
+        self.args = args
+        self.workers = {}        # pid -> (slot, started at)
+        self.backoff = {}        # slot -> seconds to wait before the next restart
+        self.restart_at = {}     # slot -> monotonic time the slot may be refilled
+        self.recycle_queue = []  # pids to replace one at a time after SIGHUP
+        self.recycling = None
+        self.stopping = False
+
+    def spawn(self, slot: int):
+        pid = os.fork()
+        if pid == 0:
+            run_worker(slot, self.sock, self.args)
+        self.workers[pid] = (slot, time.monotonic())
+        print(f"Started worker {slot} (pid {pid}).")
+
+    def on_stop(self, signum, frame):
+        self.stopping = True
+
+    def on_reload(self, signum, frame):
+        self.recycle_queue = list(self.workers)
+
+    def reap(self):
+        while self.workers:
+            pid, status = os.waitpid(-1, os.WNOHANG)
+            if pid == 0:
+                return
+            slot, started = self.workers.pop(pid, (None, 0.0))
+            if slot is None:
+                continue
+            code = os.waitstatus_to_exitcode(status)
+            if pid == self.recycling:
+                self.recycling = None
+            if self.stopping:
+                print(f"Worker {slot} (pid {pid}) exited with {code}.")
+                continue
+            # uvicorn re-raises the SIGTERM/SIGINT it shut down on, so those exits are graceful too
+            crashed = code not in (0, -signal.SIGTERM, -signal.SIGINT)
+            if crashed and time.monotonic() - started < CRASH_WINDOW:
+                delay = self.backoff.get(slot, CRASH_BACKOFF)
+                self.backoff[slot] = min(delay * 2, MAX_CRASH_BACKOFF)
+                self.restart_at[slot] = time.monotonic() + delay
+                print(f"Worker {slot} (pid {pid}) exited with {code} right after starting; restarting in {delay:.0f}s.")
+            else:
+                self.backoff.pop(slot, None)
+                self.restart_at[slot] = time.monotonic()
+                print(f"Worker {slot} (pid {pid}) exited with {code}; replacing it.")
+
+    def run(self):
+        signal.signal(signal.SIGTERM, self.on_stop)
+        signal.signal(signal.SIGINT, self.on_stop)
+        signal.signal(signal.SIGHUP, self.on_reload)
+        for slot in range(self.args.workers):
+            self.spawn(slot)
+
+        while not self.stopping:
+            self.reap()
+            now = time.monotonic()
+            for slot, when in list(self.restart_at.items()):
+                if when <= now and not self.stopping:
+                    del self.restart_at[slot]
+                    self.spawn(slot)
+            # Rolling restart: stop the next old worker once the previous one has been replaced
+            if self.recycling is None and self.recycle_queue and not self.restart_at:
+                pid = self.recycle_queue.pop(0)
+                if pid in self.workers:
+                    self.recycling = pid
+                    os.kill(pid, signal.SIGTERM)
+            time.sleep(0.1)
+        self.shutdown()
+
+    def shutdown(self):
+        print(f"Stopping {len(self.workers)} worker(s)...")
+        for pid in self.workers:
+            os.kill(pid, signal.SIGTERM)
+        deadline = time.monotonic() + self.args.graceful_timeout + 5
+        while self.workers and time.monotonic() < deadline:
+            self.reap()
+            time.sleep(0.1)
+        for pid in self.workers:
+            os.kill(pid, signal.SIGKILL)
+            os.waitpid(pid, 0)
+        self.sock.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the API with preloaded, forked workers.")
+    parser.add_argument("--host", default=HOST)
+    parser.add_argument("--port", type=int, default=PORT)
+    parser.add_argument("--workers", type=int, default=WORKERS)
+    parser.add_argument("--max-requests", type=int, default=MAX_REQUESTS)
+    parser.add_argument("--max-requests-jitter", type=int, default=MAX_REQUESTS_JITTER)
+    parser.add_argument("--graceful-timeout", type=float, default=GRACEFUL_TIMEOUT)
+    parser.add_argument("--log-level", default="info")
+    parser.add_argument("--access-log", action="store_true")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    import app.main  # noqa: F401  (imports every module the workers need, before the fork)
+    preload()
+    # Move everything loaded so far out of the collector's generations, so collections in the
+    # workers do not write to (and so copy) the shared pages
+    gc.freeze()
+    sock = bind_socket(args.host, args.port)
+    print(f"Preloaded in {(time.perf_counter() - started) * 1000:.0f} ms; serving on {args.host}:{args.port} "
+          f"with {args.workers} worker(s) (parent pid {os.getpid()}).")
+    Supervisor(sock, args).run()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""
+Applies the auto-approval rules (app/ml/approval_rules.py) to every Pending loan at once:
+one set-based UPDATE in SQLite and one update_many per decision in MongoDB.
+Loans no rule decides stay Pending for the model (app/workers/score_pending.py).
+
+Run from the project root:
+    python -m app.workers.auto_approve --dry-run
+    python -m app.workers.auto_approve --rules my_rules.json
+"""
+import argparse
+
+from app.crud import sql_crud, mongo_crud
+from app.db.database import SessionLocal, get_mongo_client, USE_OUTBOX, USE_CDC
+from app.ml import approval_rules
+
+
+def auto_approve_loans(db, mongo, rules: list) -> dict:
+    """
+    Decides every Pending loan some rule matches and mirrors the decisions to MongoDB
+    (or queues them in mongo_outbox, or leaves them to the CDC tailer). Returns the number of loans per decision.
+    """
+    if not rules:
+        return {}
+    # As in score_pending, SQL is only committed once MongoDB has accepted the changes
+    try:
+        decided = sql_crud.decide_pending_loans(db, approval_rules.sql_case(rules), approval_rules.sql_match(rules), outbox=USE_OUTBOX)
+        loan_ids = {}
+        for row in decided:
+            loan_ids.setdefault(row["loan_status"], []).append(row["loan_id"])
+        if not USE_OUTBOX and not USE_CDC:
+            for status, ids in loan_ids.items():
+                mongo_crud.set_document_statuses(mongo, ids, status)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    return {status: len(ids) for status, ids in loan_ids.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Decide clear-cut Pending loans with the auto-approval rules.")
+    parser.add_argument("--rules", default=approval_rules.RULES_PATH, help="JSON rules file (default: the built-in rules).")
+    parser.add_argument("--dry-run", action="store_true", help="Only count the loans each rule would decide.")
+    args = parser.parse_args()
+
+    rules = approval_rules.load_rules(args.rules)
+    db = SessionLocal()
+    try:
+        if args.dry_run:
+            counts = sql_crud.count_pending_matches(db, approval_rules.sql_rule_name(rules), approval_rules.sql_match(rules))
+            for rule in rules:
+                print(f"{rule['name']:<24} {rule['decision']:<9} {counts.get(rule['name'], 0)}")
+            return
+        totals = auto_approve_loans(db, get_mongo_client(), rules)
+        print(f"Done: {totals.get('Approved', 0)} approved, {totals.get('Rejected', 0)} rejected by rules.")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""
+Tails loan_status_log into loanApplications, so MongoDB follows every loan status change made
+in SQLite (by the API, the workers or by hand) without each code path writing to both stores.
+
+The trg_log_loan_status trigger adds a log row for every status change. The tailer reads the rows
+after the last log_id it applied, in batches, and applies each batch with one bulk_write. That
+log_id (the high-water mark) is stored in MongoDB's syncState collection once the batch is
+written, so after downtime the tailer picks up where it stopped and catches up in batches.
+Replaying a batch is harmless: it sets the same statuses again and the rollups do not move.
+
+SQLite has one writer at a time, so log_ids become visible in order and a high-water mark
+never skips a row that commits later.
+
+The API starts it as a background thread when MONGO_SYNC_MODE=cdc. It can also run
+as its own process from the project root:
+    python -m app.workers.cdc_tailer
+    python -m app.workers.cdc_tailer --once
+    python -m app.workers.cdc_tailer --from-log-id 0
+"""
+import argparse
+import threading
+
+from app.crud import sql_crud, mongo_crud
+from app.db.database import SessionLocal, get_mongo_client
+
+# --- Configuration ---
+BATCH_SIZE = 1000    # log rows per bulk_write
+POLL_INTERVAL = 0.5  # seconds between polls once caught up
+MAX_BACKOFF = 30.0   # seconds, when MongoDB or SQLite is unavailable
+SYNC_POSITION = "loan_status_log"  # _id of the high-water mark in syncState
+
+
+def tail_once(db, mongo, after_log_id: int, batch_size: int = BATCH_SIZE) -> tuple:
+    """
+    Applies the next batch of logged status changes after `after_log_id` to MongoDB and
+    records the new high-water mark. Returns (rows applied, last applied log_id).
+    """
+    changes = sql_crud.get_status_changes(db, after_log_id, batch_size)
+    db.rollback()  # end the read transaction, so the next poll sees newly committed rows
+    if not changes:
+        return 0, after_log_id
+    # Only the last change of each loan in the batch matters
+    latest = {}
+    for change in changes:
+        latest[change["loan_id"]] = change["new_status"]
+    mongo_crud.bulk_update_document_statuses(mongo, [{"loan_id": loan_id, "loan_status": status} for loan_id, status in latest.items()])
+    last_log_id = changes[-1]["log_id"]
+    mongo_crud.set_sync_position(mongo, SYNC_POSITION, last_log_id)
+    return len(changes), last_log_id
+
+
+class CdcTailer:
+    """
+    Background loop around tail_once: drains the backlog, then polls, with exponential backoff on errors.
+    """
+
+    def __init__(self, mongo=None, batch_size: int = BATCH_SIZE):
+        self.mongo = mongo
+        self.batch_size = batch_size
+        self.position = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def run(self, once: bool = False):
+        if self.mongo is None:
+            self.mongo = get_mongo_client()
+        backoff = POLL_INTERVAL
+        while not self._stop.is_set():
+            db = SessionLocal()
+            try:
+                if self.position is None:
+                    self.position = mongo_crud.get_sync_position(self.mongo, SYNC_POSITION)
+                applied, self.position = tail_once(db, self.mongo, self.position, self.batch_size)
+                backoff = POLL_INTERVAL
+            except Exception as e:
+                db.rollback()
+                applied = 0
+                print(f"CDC tailing failed, retrying in {backoff:.1f}s: {e}")
+                backoff = min(backoff * 2, MAX_BACKOFF)
+            finally:
+                db.close()
+            # Keep going while a full batch came back (catching up), otherwise wait
+            if applied < self.batch_size:
+                if once and backoff == POLL_INTERVAL:
+                    return self.position
+                self._stop.wait(backoff)
+        return self.position
+
+    def start(self):
+        self._thread = threading.Thread(target=self.run, name="cdc-tailer", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Apply loan_status_log to MongoDB incrementally.")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    parser.add_argument("--once", action="store_true", help="Catch up to the end of the log and exit.")
+    parser.add_argument("--from-log-id", type=int, help="Restart after this log_id instead of the stored position.")
+    args = parser.parse_args()
+
+    mongo = get_mongo_client()
+    if args.from_log_id is not None:
+        mongo_crud.set_sync_position(mongo, SYNC_POSITION, args.from_log_id)
+    tailer = CdcTailer(mongo, args.batch_size)
+    db = SessionLocal()
+    try:
+        behind = sql_crud.last_status_change_id(db) - mongo_crud.get_sync_position(mongo, SYNC_POSITION)
+    finally:
+        db.close()
+    print(f"Tailing loan_status_log into MongoDB, about {max(behind, 0)} change(s) behind" + (" (Ctrl+C to stop)..." if not args.once else "..."))
+    try:
+        position = tailer.run(once=args.once)
+        print(f"Caught up to log_id {position}.")
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+"""
+Drains the mongo_outbox table into loanApplications with batched bulk_write calls.
+
+The API starts it as a background thread when MONGO_SYNC_MODE=outbox. It can also run
+as its own process from the project root:
+    python -m app.workers.outbox_dispatcher
+
+An entry that fails MAX_ATTEMPTS times stays in mongo_outbox, and the later entries for its
+loan are held back behind it (in order) until it is fixed or deleted by hand. Such entries are
+logged and counted by the mongo_outbox_stuck_entries gauge at /metrics.
+"""
+import json
+import threading
+import time
+from datetime import datetime
+from pymongo.errors import BulkWriteError
+
+from app.crud import analytics_crud, outbox_crud, mongo_crud
+from app.db.database import SessionLocal, get_mongo_client, USE_OUTBOX
+from app.monitoring import metrics
+
+# --- Configuration ---
+BATCH_SIZE = 500     # entries per bulk_write
+MAX_DELAY = 1.0      # seconds an entry may wait for a batch to fill (bounds the lag)
+POLL_INTERVAL = 0.2  # seconds between polls when there is nothing to send
+MAX_ATTEMPTS = 10    # entries failing this often are left in the table for inspection
+MAX_BACKOFF = 30.0   # seconds, when MongoDB is unreachable
+
+
+def stuck_entries():
+    if not USE_OUTBOX:
+        return None
+    db = SessionLocal()
+    try:
+        return outbox_crud.count_stuck(db, MAX_ATTEMPTS)
+    finally:
+        db.close()
+
+# Read from the table at scrape time, so every API worker reports it (the dispatcher runs in one)
+OUTBOX_STUCK_ENTRIES = metrics.Gauge(
+    "mongo_outbox_stuck_entries", "Outbox entries that failed MAX_ATTEMPTS times; later entries for their loans wait behind them.",
+    stuck_entries,
+)
+
+
+def dispatch_once(db, mongo, batch_size: int = BATCH_SIZE, max_delay: float = MAX_DELAY) -> int:
+    """
+    Sends one batch of outbox entries to MongoDB and deletes the delivered ones.
+    A partial batch is held back until its oldest entry is max_delay seconds old.
+    Returns the number of delivered entries.
+    """
+    entries = outbox_crud.get_batch(db, batch_size, MAX_ATTEMPTS)
+    if not entries:
+        return 0
+    if len(entries) < batch_size and (datetime.now() - entries[0].created_at).total_seconds() < max_delay:
+        return 0
+
+    payloads = [json.loads(e.payload) for e in entries]
+    operations = [mongo_crud.outbox_operation(e.operation, e.loan_id, payload) for e, payload in zip(entries, payloads)]
+    # Documents as they were before this batch, to work out the rollup changes it causes
+    state = mongo_crud.rollup_state(mongo, [e.loan_id for e in entries]) if analytics_crud.ROLLUPS_ENABLED else None
+    try:
+        mongo_crud.apply_operations(mongo, operations)
+        delivered = entries
+    except BulkWriteError as e:
+        # Ordered bulk_write stops at the first error; everything before it was applied
+        error = e.details["writeErrors"][0]
+        delivered = entries[:error["index"]]
+        failed = entries[error["index"]]
+        attempts, message = failed.attempts + 1, error.get("errmsg", str(e))
+        outbox_crud.record_failure(db, failed.outbox_id, message)
+        if attempts >= MAX_ATTEMPTS:
+            print(f"Outbox entry {failed.outbox_id} ({failed.operation} for loan {failed.loan_id}) failed {MAX_ATTEMPTS} times "
+                  f"and is left in mongo_outbox; later entries for loan {failed.loan_id} are held back: {message}")
+
+    # Rollups are updated before the entries are deleted: if this fails, the batch is redelivered
+    # and the replay sees the documents already written, so nothing is counted twice.
+    if state is not None and delivered:
+        delivered_entries = [(e.operation, e.loan_id, payload) for e, payload in zip(delivered, payloads)]
+        analytics_crud.apply_delta(mongo, mongo_crud.outbox_rollup_delta(state, delivered_entries))
+
+    outbox_crud.delete_entries(db, [e.outbox_id for e in delivered])
+    db.commit()
+    return len(delivered)
+
+
+class OutboxDispatcher:
+    """
+    Background loop around dispatch_once with exponential backoff while MongoDB is down.
+    """
+
+    def __init__(self, mongo=None, batch_size: int = BATCH_SIZE, max_delay: float = MAX_DELAY):
+        self.mongo = mongo
+        self.batch_size = batch_size
+        self.max_delay = max_delay
+        self._stop = threading.Event()
+        self._thread = None
+
+    def run(self):
+        if self.mongo is None:
+            self.mongo = get_mongo_client()
+        backoff = POLL_INTERVAL
+        while not self._stop.is_set():
+            db = SessionLocal()
+            try:
+                delivered = dispatch_once(db, self.mongo, self.batch_size, self.max_delay)
+                backoff = POLL_INTERVAL
+            except Exception as e:
+                db.rollback()
+                delivered = 0
+                print(f"Outbox dispatch failed, retrying in {backoff:.1f}s: {e}")
+                backoff = min(backoff * 2, MAX_BACKOFF)
+            finally:
+                db.close()
+            # Keep draining while there is a backlog, otherwise wait
+            if not delivered:
+                self._stop.wait(backoff)
+
+    def start(self):
+        self._thread = threading.Thread(target=self.run, name="outbox-dispatcher", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+
+if __name__ == "__main__":
+    print("Dispatching mongo_outbox to MongoDB (Ctrl+C to stop)...")
+    dispatcher = OutboxDispatcher()
+    try:
+        dispatcher.run()
+    except KeyboardInterrupt:
+        pass
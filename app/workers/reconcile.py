@@ -0,0 +1,163 @@
+"""
+Checks that the loan table and the loanApplications documents linked to it (by sql_loan_id)
+agree, and repairs MongoDB from SQLite where they do not.
+
+The loan_id key space is split into FANOUT ranges and each range is compared by its
+(count, digest) on both sides (app/crud/reconcile_crud.py): one grouped SQL query and one
+$group pipeline per level. Only ranges that differ are split again; once a range holds at
+most LEAF_SIZE ids its rows and documents are compared one by one. A check of stores that
+agree costs two aggregation queries however large they are.
+
+Repairs (SQLite is the source of truth):
+    update  a document whose status, amount or interest rate differs from its loan
+    insert  a document for a loan that has none (rebuilt from the SQL rows)
+    delete  a document whose loan does not exist, or a second document for the same loan
+Documents without an sql_loan_id (CSV imports) are counted but never touched.
+
+Changes made while it runs can show up as differences; repairs are idempotent, so run it
+again (or while writes are quiet) to confirm.
+
+Run from the project root:
+    python -m app.workers.reconcile                          # report only
+    python -m app.workers.reconcile --output repairs.jsonl   # write the repairs for review
+    python -m app.workers.reconcile --apply                  # apply them to MongoDB
+"""
+import argparse
+import json
+from collections import Counter
+from datetime import datetime
+
+from app.crud import mongo_crud, reconcile_crud
+from app.db.database import SessionLocal, get_mongo_client
+from app.workers.score_pending import to_scoring_record
+
+# --- Configuration ---
+FANOUT = 64          # sub-ranges a differing range is split into
+LEAF_SIZE = 1000     # ids per range compared row by row
+REPAIR_BATCH = 1000  # repairs per bulk_write / write to the output
+
+
+def diff_leaf(db, mongo, low: int, high: int, stats: Counter) -> list:
+    """
+    Compares the loans and documents with ids in [low, high) and returns the repairs.
+    """
+    rows = reconcile_crud.sql_range_rows(db, low, high)
+    documents = {}
+    for document in reconcile_crud.mongo_range_documents(mongo, low, high):
+        documents.setdefault(int(document["sql_loan_id"]), []).append(document)
+    stats["rows_compared"] += len(rows)
+
+    repairs, missing = [], []
+    for loan_id, (status, amount, interest_rate) in rows.items():
+        linked = documents.pop(loan_id, [])
+        if not linked:
+            missing.append(loan_id)
+            continue
+        for duplicate in linked[1:]:
+            repairs.append({"op": "delete", "_id": str(duplicate["_id"])})
+            stats["duplicate"] += 1
+        loan_details = linked[0].get("loanDetails") or {}
+        mirrored = reconcile_crud.row_values(linked[0].get("loanStatus"), loan_details.get("amount"), loan_details.get("interestRate"))
+        if mirrored != reconcile_crud.row_values(status, amount, interest_rate):
+            repairs.append({"op": "update", "loan_id": loan_id, "set": {
+                "loanStatus": status, "loanDetails.amount": amount, "loanDetails.interestRate": interest_rate,
+            }})
+            stats["mismatched"] += 1
+    # Whatever is left has no loan in SQLite
+    for orphans in documents.values():
+        for document in orphans:
+            repairs.append({"op": "delete", "_id": str(document["_id"])})
+            stats["orphaned"] += 1
+
+    if missing:
+        ingested_at = datetime.now()
+        for record in reconcile_crud.sql_application_rows(db, missing):
+            document = mongo_crud.document_from_sql_record(to_scoring_record(record), ingested_at)
+            repairs.append({"op": "insert", "loan_id": record["loan_id"], "document": document})
+        stats["missing"] += len(missing)
+    return repairs
+
+
+def differing_ranges(db, mongo, low: int, high: int, fanout: int, stats: Counter) -> list:
+    """
+    Splits [low, high) into `fanout` ranges and returns the ones whose digests differ.
+    """
+    width = max(-(-(high - low) // fanout), 1)
+    sql_digests = reconcile_crud.sql_range_digests(db, low, high, width)
+    mongo_digests = reconcile_crud.mongo_range_digests(mongo, low, high, width)
+    stats["ranges_compared"] += len(set(sql_digests) | set(mongo_digests))
+    return [
+        (low + bucket * width, min(low + (bucket + 1) * width, high))
+        for bucket in sorted(set(sql_digests) | set(mongo_digests))
+        if sql_digests.get(bucket) != mongo_digests.get(bucket)
+    ]
+
+
+def reconcile(db, mongo, on_repairs, fanout: int = FANOUT, leaf_size: int = LEAF_SIZE) -> Counter:
+    """
+    Finds the differences between both stores and passes the repairs to `on_repairs`
+    in batches of about REPAIR_BATCH. Returns counts of what was compared and found.
+    """
+    stats = Counter()
+    bounds = [b for b in (*reconcile_crud.sql_key_bounds(db), *reconcile_crud.mongo_key_bounds(mongo)) if b is not None]
+    stats["unlinked_documents"] = reconcile_crud.count_unlinked(mongo)
+    if not bounds:
+        return stats
+
+    pending, batch = [(min(bounds), max(bounds) + 1)], []
+    while pending:
+        low, high = pending.pop(0)
+        if high - low <= leaf_size:
+            stats["leaves"] += 1
+            batch.extend(diff_leaf(db, mongo, low, high, stats))
+            if len(batch) >= REPAIR_BATCH:
+                on_repairs(batch)
+                batch = []
+        else:
+            ranges = differing_ranges(db, mongo, low, high, fanout, stats)
+            stats["ranges_differing"] += len(ranges)
+            pending.extend(ranges)
+    if batch:
+        on_repairs(batch)
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare SQLite loans with their MongoDB documents and repair drift.")
+    parser.add_argument("--apply", action="store_true", help="Apply the repairs to MongoDB.")
+    parser.add_argument("--output", help="Write the repairs to this JSON Lines file.")
+    parser.add_argument("--fanout", type=int, default=FANOUT)
+    parser.add_argument("--leaf-size", type=int, default=LEAF_SIZE)
+    args = parser.parse_args()
+
+    mongo = get_mongo_client()
+    output = open(args.output, "w") if args.output else None
+    totals = Counter()
+
+    def on_repairs(repairs):
+        totals.update(repair["op"] for repair in repairs)
+        if output is not None:
+            output.writelines(json.dumps(repair, default=str) + "\n" for repair in repairs)
+        if args.apply:
+            reconcile_crud.apply_repairs(mongo, repairs)
+
+    db = SessionLocal()
+    try:
+        stats = reconcile(db, mongo, on_repairs, args.fanout, args.leaf_size)
+    finally:
+        db.close()
+        if output is not None:
+            output.close()
+
+    print(f"Compared {stats['ranges_compared']} ranges ({stats['ranges_differing']} differing) "
+          f"and {stats['rows_compared']} loans in {stats['leaves']} leaf range(s).")
+    print(f"Found {stats['mismatched']} mismatched, {stats['missing']} missing, {stats['orphaned']} orphaned "
+          f"and {stats['duplicate']} duplicate document(s); {stats['unlinked_documents']} document(s) have no sql_loan_id.")
+    if sum(totals.values()):
+        action = "Applied" if args.apply else "Would apply"
+        print(f"{action} {totals['update']} update(s), {totals['insert']} insert(s) and {totals['delete']} delete(s)"
+              + (f"; written to {args.output}." if args.output else "."))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""
+Scores every Pending loan in bulk and writes the decisions back to SQLite and MongoDB.
+
+Run from the project root:
+    python -m app.workers.score_pending --chunk-size 5000
+"""
+import argparse
+import json
+import os
+
+from app.crud import sql_crud, mongo_crud, lookup_cache
+from app.db.database import SessionLocal, get_mongo_client, USE_CDC
+from app.ml import approval_rules
+from app.ml.scoring_engine import get_scoring_engine
+
+# --- Configuration ---
+CHUNK_SIZE = 5000
+CHECKPOINT_PATH = "score_pending.checkpoint.json"
+
+
+def read_checkpoint(path: str) -> int:
+    """
+    Returns the last loan_id that was fully written back, or 0 if there is no checkpoint.
+    """
+    try:
+        with open(path) as f:
+            return int(json.load(f)["last_loan_id"])
+    except FileNotFoundError:
+        return 0
+
+def write_checkpoint(path: str, last_loan_id: int):
+    """
+    Atomically records the last loan_id that was fully written back.
+    """
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump({"last_loan_id": last_loan_id}, f)
+    os.replace(tmp_path, path)
+
+
+def to_scoring_record(row: dict) -> dict:
+    """
+    Adds the categorical names the scoring engine expects to a joined person/loan row
+    (from the lookup tables, see app/crud/lookup_cache.py).
+    """
+    row["gender"] = lookup_cache.name("gender", row["gender_id"])
+    row["education"] = lookup_cache.name("education", row["education_id"])
+    row["loan_intent"] = lookup_cache.name("loan_intent", row["loan_intent_id"])
+    row["home_ownership"] = lookup_cache.name("home_ownership", row["home_ownership_id"], None)
+    return row
+
+
+def score_pending_loans(db, mongo, engine, chunk_size: int = CHUNK_SIZE, checkpoint_path: str = CHECKPOINT_PATH, restart: bool = False, rules: list = None):
+    """
+    Works through Pending loans in loan_id order, one chunk at a time:
+    read (keyset), apply the auto-approval rules and score the rest (vectorized),
+    write back (one UPDATE + one bulk_write), checkpoint.
+    """
+    rules = approval_rules.load_rules() if rules is None else rules
+    last_loan_id = 0 if restart else read_checkpoint(checkpoint_path)
+    if last_loan_id:
+        print(f"Resuming after loan_id {last_loan_id}.")
+
+    total = {"Approved": 0, "Rejected": 0}
+    while True:
+        rows = sql_crud.get_pending_loan_records(db, after_loan_id=last_loan_id, limit=chunk_size)
+        if not rows:
+            break
+
+        records = [to_scoring_record(row) for row in rows]
+        # Clear-cut loans are decided by the rules; only the rest go through the model
+        decisions = approval_rules.decide(records, rules)
+        undecided = [record for record, decision in zip(records, decisions) if decision is None]
+        scored = iter(engine.score(undecided) if undecided else [])
+        updates = [
+            {"loan_id": record["loan_id"], "loan_status": decision[0] if decision else next(scored)[1]}
+            for record, decision in zip(records, decisions)
+        ]
+
+        # The SQL transaction is only committed once MongoDB has accepted the chunk,
+        # so a failure leaves both stores untouched and the chunk is retried on resume.
+        try:
+            sql_crud.bulk_update_loan_statuses(db, updates)
+            if not USE_CDC:  # otherwise the CDC tailer applies the logged changes
+                mongo_crud.bulk_update_document_statuses(mongo, updates)
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+
+        last_loan_id = records[-1]["loan_id"]
+        write_checkpoint(checkpoint_path, last_loan_id)
+        for update in updates:
+            total[update["loan_status"]] += 1
+        print(f"Scored {len(updates)} loans up to loan_id {last_loan_id} "
+              f"(approved {total['Approved']}, rejected {total['Rejected']} so far).")
+
+    if os.path.exists(checkpoint_path):
+        os.remove(checkpoint_path)
+    return total
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Score all Pending loans in bulk.")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    parser.add_argument("--checkpoint", default=CHECKPOINT_PATH)
+    parser.add_argument("--restart", action="store_true", help="Ignore an existing checkpoint.")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        total = score_pending_loans(db, get_mongo_client(), get_scoring_engine(), args.chunk_size, args.checkpoint, args.restart)
+        print(f"Done: {total['Approved']} approved, {total['Rejected']} rejected.")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,206 @@
+"""
+Replays captured API traffic (app/monitoring/traffic_capture.py) against an in-process copy of
+the app, to reproduce a production load shape before rolling out a database or model change.
+
+The app runs on a scratch copy of a SQLite database and, unless --mongo-uri names a scratch
+server, on mongomock. Requests are sent through the ASGI interface (no sockets), started at
+their captured offsets divided by --speedup (0: back to back), with at most --concurrency in
+flight. The report lists throughput, p50/p95/p99 latency and status codes per route, next to
+the latency that was captured.
+
+Replay against a copy taken when the capture started: later requests refer to ids (persons,
+loans) that exist there, and ids created by replayed POSTs follow on from the same place.
+
+Run from the project root:
+    python -m benchmarks.replay captures/
+    python -m benchmarks.replay captures/capture-*.jsonl --concurrency 32 --speedup 4
+    python -m benchmarks.replay captures/ --database backup.db --speedup 0 --output replay.json
+"""
+import argparse
+import asyncio
+import glob
+import json
+import os
+import sqlite3
+import tempfile
+import time
+from collections import Counter
+from datetime import datetime
+
+from benchmarks.run import percentile, write_json
+
+# --- Configuration ---
+DB_PATH = "loan_database.db"
+CONCURRENCY = 8
+SPEEDUP = 1.0
+
+
+# --- Captures ---
+def capture_files(paths: list) -> list:
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(sorted(glob.glob(os.path.join(path, "*.jsonl"))))
+        else:
+            files.extend(sorted(glob.glob(path)))
+    return files
+
+def load_requests(files: list, limit: int = None) -> list:
+    """
+    Captured requests from all files (several processes may have written them), in time order.
+    """
+    requests = []
+    for path in files:
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    requests.append(json.loads(line))
+    requests.sort(key=lambda request: request["ts"])
+    return requests[:limit] if limit else requests
+
+def copy_database(source: str, target: str):
+    """
+    Copies the database with SQLite's backup API, so pages still in the WAL are included.
+    """
+    with sqlite3.connect(source) as src, sqlite3.connect(target) as dst:
+        src.backup(dst)
+
+
+# --- Replay ---
+async def replay(app, requests: list, concurrency: int, speedup: float) -> tuple:
+    """
+    Sends the requests through the app and returns ([(request, status, seconds)], wall seconds).
+    """
+    import httpx
+
+    results = []
+    slots = asyncio.Semaphore(concurrency)
+    first_ts = requests[0]["ts"]
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://replay") as client:
+
+        async def send(request):
+            async with slots:
+                url = request["path"] + (f"?{request['query']}" if request.get("query") else "")
+                start = time.perf_counter()
+                try:
+                    response = await client.request(request["method"], url, json=request.get("body"))
+                    status = response.status_code
+                except Exception:
+                    status = 599  # the app raised instead of answering
+                results.append((request, status, time.perf_counter() - start))
+
+        started = time.perf_counter()
+        tasks = []
+        for request in requests:
+            if speedup > 0:
+                delay = (request["ts"] - first_ts) / speedup - (time.perf_counter() - started)
+                if delay > 0:
+                    await asyncio.sleep(delay)
+            tasks.append(asyncio.create_task(send(request)))
+        await asyncio.gather(*tasks)
+        wall = time.perf_counter() - started
+    return results, wall
+
+async def run_app(app, requests: list, concurrency: int, speedup: float) -> tuple:
+    # Runs the app's startup and shutdown around the replay, as uvicorn would
+    async with app.router.lifespan_context(app):
+        return await replay(app, requests, concurrency, speedup)
+
+
+# --- Report ---
+def summarize(results: list, wall: float) -> list:
+    """
+    One row per route: count, throughput over the replay's wall time, replayed and captured latency.
+    """
+    by_route = {}
+    for request, status, seconds in results:
+        by_route.setdefault(f"{request['method']} {request.get('route') or request['path']}", []).append((request, status, seconds))
+    report = []
+    for route, rows in sorted(by_route.items()):
+        latencies_ms = sorted(seconds * 1000 for _, _, seconds in rows)
+        captured_ms = sorted(request["duration_ms"] for request, _, _ in rows if request.get("duration_ms") is not None)
+        statuses = Counter(status for _, status, _ in rows)
+        report.append({
+            "route": route,
+            "requests": len(rows),
+            "throughput_per_s": len(rows) / wall if wall else 0.0,
+            "p50_ms": percentile(latencies_ms, 50),
+            "p95_ms": percentile(latencies_ms, 95),
+            "p99_ms": percentile(latencies_ms, 99),
+            "captured_p50_ms": percentile(captured_ms, 50) if captured_ms else None,
+            "captured_p95_ms": percentile(captured_ms, 95) if captured_ms else None,
+            "statuses": {str(status): count for status, count in sorted(statuses.items())},
+            "status_changed": sum(1 for request, status, _ in rows if request.get("status") not in (None, status)),
+        })
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay captured API traffic against a scratch copy of the databases.")
+    parser.add_argument("captures", nargs="+", help="Capture files, globs or directories.")
+    parser.add_argument("--database", default=DB_PATH, help="SQLite database to replay against (a copy is used).")
+    parser.add_argument("--mongo-uri", help="Scratch MongoDB server to use instead of mongomock (needed for API_MODE=async).")
+    parser.add_argument("--concurrency", type=int, default=CONCURRENCY, help="Requests in flight at most.")
+    parser.add_argument("--speedup", type=float, default=SPEEDUP, help="Divide the captured gaps by this factor; 0 sends back to back.")
+    parser.add_argument("--limit", type=int, help="Replay only the first N requests.")
+    parser.add_argument("--output", help="Write the report as JSON to this file.")
+    args = parser.parse_args()
+
+    files = capture_files(args.captures)
+    requests = load_requests(files, args.limit)
+    if not requests:
+        print(f"No captured requests in {', '.join(args.captures)}.")
+        return
+    if os.getenv("API_MODE", "sync") == "async" and not args.mongo_uri:
+        parser.error("API_MODE=async needs --mongo-uri: mongomock has no async client.")
+
+    # The app is imported after its database points at the scratch copy
+    work_dir = tempfile.mkdtemp(prefix="loan-replay-")
+    db_path = os.path.join(work_dir, "replay.db")
+    copy_database(args.database, db_path)
+    os.environ["DATABASE_URL"] = f"sqlite:///{db_path}"
+    os.environ.pop("ASYNC_DATABASE_URL", None)
+    os.environ["TRAFFIC_CAPTURE_DIR"] = ""  # do not capture the replay itself
+    if args.mongo_uri:
+        os.environ["MONGO_URI"] = args.mongo_uri
+
+    from app.db import database
+    if not args.mongo_uri:
+        import mongomock
+        database.mongo_client = mongomock.MongoClient()
+    from app.main import app
+
+    print(f"Replaying {len(requests)} request(s) from {len(files)} file(s) against a copy of {args.database} "
+          f"({'MongoDB at ' + args.mongo_uri if args.mongo_uri else 'mongomock'}), "
+          f"concurrency {args.concurrency}, speedup {args.speedup:g}...")
+    results, wall = asyncio.run(run_app(app, requests, args.concurrency, args.speedup))
+    report = summarize(results, wall)
+    captured_span = requests[-1]["ts"] - requests[0]["ts"]
+
+    print(f"{'route':<40}{'reqs':>7}{'req/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'cap p50':>9}  statuses")
+    for row in report:
+        captured = f"{row['captured_p50_ms']:>9.2f}" if row["captured_p50_ms"] is not None else f"{'-':>9}"
+        statuses = " ".join(f"{status}x{count}" for status, count in row["statuses"].items())
+        print(f"{row['route'][:39]:<40}{row['requests']:>7}{row['throughput_per_s']:>9.1f}{row['p50_ms']:>9.2f}"
+              f"{row['p95_ms']:>9.2f}{row['p99_ms']:>9.2f}{captured}  {statuses}")
+    changed = sum(row["status_changed"] for row in report)
+    print(f"Replayed in {wall:.2f}s ({len(results) / wall if wall else 0:.1f} req/s); captured over {captured_span:.2f}s. "
+          f"{changed} request(s) got a different status than when captured.")
+
+    if args.output:
+        write_json(args.output, {
+            "created_at": datetime.now().isoformat(),
+            "captures": files,
+            "database": args.database,
+            "concurrency": args.concurrency,
+            "speedup": args.speedup,
+            "requests": len(results),
+            "wall_s": wall,
+            "routes": report,
+        })
+        print(f"Report written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
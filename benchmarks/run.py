@@ -0,0 +1,274 @@
+"""
+Offline benchmarks for the ingest, read, score and update hot paths.
+
+The API runs in-process against a temporary SQLite file and mongomock, so no server,
+database or network is needed. Every benchmark reports throughput and p50/p95/p99 latency,
+results are written as JSON, and anything slower than the stored baseline by more than
+the tolerance is flagged (exit code 1).
+
+Run from the project root:
+    python -m benchmarks.run                       # compare with benchmarks/baseline.json
+    python -m benchmarks.run --save-baseline       # record a new baseline on this machine
+    python -m benchmarks.run --only api_put_loan --iterations 2000
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+BASELINE_PATH = "benchmarks/baseline.json"
+RESULTS_PATH = "benchmarks/results.json"
+CSV_FILE_PATH = "data/Phase2.csv"
+ITERATIONS = 500
+WARMUP = 20
+ROUNDS = 3
+TOLERANCE = 0.3   # allowed p50/p95 slowdown before a result counts as a regression
+
+APPLICATION = {
+    "age": 22, "income": 71948, "employment_experience": 0, "credit_score": 561,
+    "credit_history_length": 3, "home_ownership_id": 2, "gender": "female", "education": "master",
+    "loan_amount": 35000, "loan_interest_rate": 16.02, "loan_intent": "personal",
+}
+
+
+# --- Measurement ---
+def percentile(sorted_values: list, q: float) -> float:
+    index = min(len(sorted_values) - 1, max(0, round(q / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+def summarize(name: str, latencies_ns: list, items_per_call: int = 1) -> dict:
+    """
+    Turns per-call latencies into the reported statistics. Throughput counts items
+    (requests, records or documents) per second of measured time.
+    """
+    latencies_ms = sorted(ns / 1e6 for ns in latencies_ns)
+    total_s = sum(latencies_ns) / 1e9
+    return {
+        "name": name,
+        "calls": len(latencies_ms),
+        "items_per_call": items_per_call,
+        "throughput_per_s": len(latencies_ms) * items_per_call / total_s if total_s else 0.0,
+        "mean_ms": sum(latencies_ms) / len(latencies_ms),
+        "p50_ms": percentile(latencies_ms, 50),
+        "p95_ms": percentile(latencies_ms, 95),
+        "p99_ms": percentile(latencies_ms, 99),
+    }
+
+def measure(name: str, call, iterations: int, warmup: int = WARMUP, before=None, items_per_call: int = 1, rounds: int = ROUNDS) -> dict:
+    """
+    Times `call(i)` for i in range(iterations) after `warmup` untimed calls, `rounds` times,
+    and keeps the round with the lowest median: slow rounds are mostly interference from
+    the rest of the machine, not the code under test.
+    `before(i)`, if given, runs untimed ahead of each call (e.g. to clear a cache).
+    """
+    for i in range(warmup):
+        if before:
+            before(i)
+        call(i)
+    best = None
+    for _ in range(rounds):
+        latencies = []
+        for i in range(iterations):
+            if before:
+                before(i)
+            start = time.perf_counter_ns()
+            call(i)
+            latencies.append(time.perf_counter_ns() - start)
+        result = summarize(name, latencies, items_per_call)
+        if best is None or result["p50_ms"] < best["p50_ms"]:
+            best = result
+    return best
+
+
+# --- API benchmarks ---
+def api_benchmarks(iterations: int, warmup: int, rounds: int, only: set) -> list:
+    """
+    POST /applications/, GET /persons/{id} (cold and cached) and PUT /loans/{id},
+    through the ASGI app with a TestClient.
+    """
+    import mongomock
+    from fastapi.testclient import TestClient
+    from app.main import app
+    from app.crud import person_cache
+    from app.db.database import get_mongo_client
+
+    mongo = mongomock.MongoClient()
+    app.dependency_overrides[get_mongo_client] = lambda: mongo
+    results = []
+    with TestClient(app) as client:
+        created = []
+
+        def post_application(i):
+            response = client.post("/applications/", json=APPLICATION)
+            response.raise_for_status()
+            created.append((response.json()["person_id"], response.json()["loans"][0]["loan_id"]))
+
+        # The created rows are also the data set for the read and update benchmarks
+        results.append(measure("api_post_application", post_application, iterations, warmup, rounds=rounds))
+
+        def get_person(i):
+            client.get(f"/persons/{created[i % len(created)][0]}").raise_for_status()
+
+        if not only or "api_get_person" in only:
+            results.append(measure("api_get_person", get_person, iterations, warmup, before=lambda i: person_cache.clear(), rounds=rounds))
+        if not only or "api_get_person_cached" in only:
+            results.append(measure("api_get_person_cached", get_person, iterations, warmup, rounds=rounds))
+
+        def put_loan(i):
+            status = "Approved" if i % 2 else "Rejected"
+            client.put(f"/loans/{created[i % len(created)][1]}", json={"loan_status": status}).raise_for_status()
+
+        if not only or "api_put_loan" in only:
+            results.append(measure("api_put_loan", put_loan, iterations, warmup, rounds=rounds))
+    app.dependency_overrides.clear()
+    return results
+
+
+# --- Scoring benchmarks ---
+def scoring_benchmarks(iterations: int, warmup: int, rounds: int) -> list:
+    """
+    ml/predict.py's one-row path next to the API's vectorized scoring engine.
+    """
+    import joblib
+    from ml import predict
+    from app.ml.feature_encoder import FeatureEncoder
+    from app.ml.scoring_engine import ASSETS_PATH, ScoringEngine
+    from app.db.database import init_sql
+
+    init_sql()  # home_ownership_id is scored by its name in the lookup table
+    assets = joblib.load(ASSETS_PATH)
+    encoder = FeatureEncoder(assets["columns"])
+    person = {**APPLICATION, "person_id": 1}
+    loan = {"loan_id": 1, "loan_amount": APPLICATION["loan_amount"], "loan_interest_rate": APPLICATION["loan_interest_rate"]}
+    results = [
+        measure("predict_feature_row", lambda i: predict.build_feature_row(encoder, person, loan), iterations, warmup, rounds=rounds),
+        measure("predict_score", lambda i: predict.predict_status(assets, person, loan, encoder), iterations, warmup, rounds=rounds),
+    ]
+
+    # The prediction cache is left off so every call runs the model
+    engine = ScoringEngine.from_assets(ASSETS_PATH)
+    batch = [APPLICATION] * 1000
+    results.append(measure("engine_score_one", lambda i: engine.score([APPLICATION]), iterations, warmup, rounds=rounds))
+    results.append(measure("engine_score_batch_1000", lambda i: engine.score(batch), max(iterations // 10, 10), warmup, items_per_call=len(batch), rounds=rounds))
+    return results
+
+
+# --- Loader benchmarks ---
+def loader_benchmarks(csv_path: str, warmup: int, rounds: int) -> list:
+    """
+    populate_mongodb.build_documents over the whole CSV, one call per insert batch
+    (reading the CSV is not timed).
+    """
+    import pandas as pd
+    import populate_mongodb
+
+    ingested_at = datetime.now()
+    frame = pd.read_csv(csv_path)
+    batch_size = populate_mongodb.BATCH_SIZE
+    batches = [frame.iloc[start:start + batch_size] for start in range(0, len(frame), batch_size)]
+    call = lambda i: populate_mongodb.build_documents(batches[i], ingested_at)
+    result = measure("populate_build_documents", call, len(batches), min(warmup, len(batches)), items_per_call=batch_size, rounds=rounds)
+    result["throughput_per_s"] = len(frame) / (result["mean_ms"] * len(batches) / 1e3)
+    return [result]
+
+
+# --- Baseline comparison ---
+def compare(results: list, baseline: dict, tolerance: float) -> list:
+    """
+    Returns a message for every result whose p50 or p95 latency grew by more than
+    `tolerance` relative to the baseline. Percentiles are compared rather than throughput
+    because a few outliers (GC, a noisy neighbour) move the mean far more than the median.
+    """
+    previous = {result["name"]: result for result in baseline.get("results", [])}
+    regressions = []
+    for result in results:
+        before = previous.get(result["name"])
+        if before is None:
+            continue
+        for stat in ("p50_ms", "p95_ms"):
+            if result[stat] > before[stat] * (1 + tolerance):
+                regressions.append(f"{result['name']}: {stat} {before[stat]:.3f} -> {result[stat]:.3f}")
+    return regressions
+
+def write_json(path: str, data: dict):
+    with open(path, "w") as f:
+        json.dump(data, f, indent=2)
+        f.write("\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the offline benchmark suite.")
+    parser.add_argument("--iterations", type=int, default=ITERATIONS)
+    parser.add_argument("--warmup", type=int, default=WARMUP)
+    parser.add_argument("--rounds", type=int, default=ROUNDS, help="Repeat each benchmark and keep the fastest round.")
+    parser.add_argument("--only", nargs="*", default=[], help="Benchmark names or groups (api, scoring, loader).")
+    parser.add_argument("--csv", default=CSV_FILE_PATH)
+    parser.add_argument("--output", default=RESULTS_PATH)
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--tolerance", type=float, default=TOLERANCE)
+    parser.add_argument("--save-baseline", action="store_true", help="Write the results as the new baseline.")
+    args = parser.parse_args()
+
+    # The app is imported inside the benchmarks, after its database points at a scratch file
+    work_dir = tempfile.mkdtemp(prefix="loan-bench-")
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(work_dir, 'bench.db')}"
+    os.environ.setdefault("MONGO_URI", "mongodb://localhost:27017")
+    os.environ["MONGO_SYNC_MODE"] = "inline"
+    os.environ["PREDICTION_CACHE_SIZE"] = "0"
+
+    only = set(args.only)
+    groups = {"api": ["api_post_application", "api_get_person", "api_get_person_cached", "api_put_loan"],
+              "scoring": ["predict_feature_row", "predict_score", "engine_score_one", "engine_score_batch_1000"],
+              "loader": ["populate_build_documents"]}
+    for group, names in groups.items():
+        if group in only:
+            only.update(names)
+    wanted = lambda group: not only or any(name in only for name in groups[group])
+
+    results = []
+    if wanted("api"):
+        results += api_benchmarks(args.iterations, args.warmup, args.rounds, only)
+    if wanted("scoring"):
+        results += scoring_benchmarks(args.iterations, args.warmup, args.rounds)
+    if wanted("loader"):
+        results += loader_benchmarks(args.csv, args.warmup, args.rounds)
+    if only:
+        results = [result for result in results if result["name"] in only]
+
+    report = {
+        "created_at": datetime.now().isoformat(),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "iterations": args.iterations,
+        "results": results,
+    }
+    write_json(args.output, report)
+
+    print(f"{'benchmark':<28}{'items/s':>12}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for result in results:
+        print(f"{result['name']:<28}{result['throughput_per_s']:>12.1f}{result['p50_ms']:>10.3f}{result['p95_ms']:>10.3f}{result['p99_ms']:>10.3f}")
+    print(f"Results written to {args.output}")
+
+    if args.save_baseline:
+        write_json(args.baseline, report)
+        print(f"Baseline saved to {args.baseline}")
+        return
+    if not os.path.exists(args.baseline):
+        print(f"No baseline at {args.baseline}; run with --save-baseline to record one.")
+        return
+    with open(args.baseline) as f:
+        regressions = compare(results, json.load(f), args.tolerance)
+    if regressions:
+        print(f"REGRESSIONS (more than {args.tolerance:.0%} worse than {args.baseline}):")
+        for message in regressions:
+            print(f"  {message}")
+        sys.exit(1)
+    print(f"No regressions against {args.baseline}.")
+
+
+if __name__ == "__main__":
+    main()
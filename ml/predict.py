@@ -1,7 +1,15 @@
+"""
+Scores one Pending loan fetched from the API and writes the decision back.
+
+Run from the project root (with the API running):
+    python -m ml.predict
+"""
 import requests
-import pandas as pd
 import joblib
 
+from app.ml.feature_encoder import FeatureEncoder
+from app.ml.scoring_engine import DECISION_THRESHOLD
+
 API_URL = "http://127.0.0.1:8000"
 ASSETS_PATH = "ml/saved_model/pipeline_assets.joblib"
 
@@ -28,6 +36,18 @@ def get_person_and_loan(person_id, loan_id):
         print(f"❌ API Error: {e}")
         return None, None
 
+def build_feature_row(encoder, person, loan):
+    """Encodes one person/loan pair with the same encoder training and the API use."""
+    return encoder.encode([{**person, **loan}])
+
+def predict_status(assets, person, loan, encoder=None):
+    """Scores one person/loan pair and returns "Approved" or "Rejected"."""
+    model, scaler = assets['model'], assets['scaler']
+    encoder = encoder or FeatureEncoder(assets['columns'])
+    X = (build_feature_row(encoder, person, loan) - scaler.mean_) / scaler.scale_
+    probability = model.predict_proba(X)[0, 1]
+    return "Approved" if probability >= assets.get('threshold', DECISION_THRESHOLD) else "Rejected"
+
 def main():
     print("🚀 Starting Loan Prediction Script...")
     try:
@@ -45,25 +65,9 @@ def main():
     try:
         # 2. Load model, scaler, expected columns
         assets = joblib.load(ASSETS_PATH)
-        model, scaler, training_columns = assets['model'], assets['scaler'], assets['columns']
-        input_df = pd.DataFrame(columns=training_columns, index=[0]).fillna(0)
-
-        # 3. Map and preprocess features
-        ownership_map = {0: "RENT", 1: "OWN", 2: "MORTGAGE"}
-        input_df.loc[0, 'person_age'] = person['age']
-        input_df.loc[0, 'person_income'] = person['income']
-        input_df.loc[0, 'person_home_ownership'] = ownership_map.get(person['home_ownership_id'], "RENT")
-        input_df.loc[0, 'person_emp_length'] = person['employment_experience']
-        input_df.loc[0, 'loan_amnt'] = loan['loan_amount']
-        input_df.loc[0, 'loan_int_rate'] = loan['loan_interest_rate']
-        input_df.loc[0, 'loan_percent_income'] = loan['loan_amount'] / person['income']
-        input_df.loc[0, 'cb_person_default_on_file'] = "Y" if person['credit_score'] < 650 else "N"
-        input_df.loc[0, 'cb_person_cred_hist_length'] = person['credit_history_length']
 
-        # 4. Make prediction
-        input_scaled = scaler.transform(input_df[training_columns])
-        prediction = model.predict(input_scaled)[0]
-        result = "Approved" if prediction == 1 else "Rejected"
+        # 3-4. Map and preprocess features, then make the prediction
+        result = predict_status(assets, person, loan)
         print(f"\n🧠 Model Prediction: {result}")
 
         # 5. Update the loan status in both databases via the API
@@ -0,0 +1,369 @@
+"""
+Out-of-core training pipeline (replaces the training cells of ml/predict_updated.ipynb).
+
+1. scan    stream the CSV (or the SQLite tables) in chunks, collecting the category vocabulary
+2. encode  write the one-hot design matrix to a memory-mapped .npy cache in ml/cache/<key>/,
+           which later runs on the same data reuse instead of parsing and encoding again
+3. fit     StandardScaler.partial_fit, then LogisticRegression (as in the notebook), or
+           SGDClassifier.partial_fit over chunks with --incremental for data larger than RAM
+4. check   cross-validation folds and a decision-threshold sweep, run in parallel with joblib
+5. save    a pipeline_assets-compatible artifact: {'model', 'scaler', 'columns', 'threshold', 'metrics'}
+
+Run from the project root:
+    python -m ml.train
+    python -m ml.train --source sql --incremental --n-jobs 4 --select-threshold f1 --register
+"""
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import sqlite3
+import time
+import joblib
+import numpy as np
+import pandas as pd
+from joblib import Parallel, delayed
+from sklearn.linear_model import LogisticRegression, SGDClassifier
+from sklearn.metrics import log_loss, roc_auc_score
+from sklearn.preprocessing import StandardScaler
+
+from app.ml.feature_encoder import CATEGORICAL_FEATURES, NUMERIC_FEATURES, FeatureEncoder, normalize_category
+from app.ml.scoring_engine import DECISION_THRESHOLD
+
+# --- Configuration ---
+CSV_FILE_PATH = "data/Phase2.csv"
+DATABASE_PATH = "loan_database.db"
+OUTPUT_PATH = "ml/saved_model/pipeline_assets.joblib"
+CACHE_DIR = "ml/cache"
+CHUNK_SIZE = 50000        # rows per CSV/SQL chunk and per block read from the cache
+TEST_SIZE = 0.2
+CV_FOLDS = 5
+EPOCHS = 5                # passes over the data with --incremental
+SEED = 42
+THRESHOLDS = np.round(np.arange(0.05, 0.96, 0.01), 2)
+ENCODING_VERSION = 1      # bump when FeatureEncoder changes, to invalidate old caches
+TARGET_COLUMN = "loan_status"
+
+# Decided loans from SQLite, with the CSV's column names and category names from the lookup tables
+SQL_TRAINING_QUERY = """
+    SELECT p.age AS person_age, g.gender AS person_gender, e.level AS person_education,
+           p.income AS person_income, p.employment_experience AS person_emp_exp,
+           h.type AS person_home_ownership, l.loan_amount AS loan_amnt, i.purpose AS loan_intent,
+           l.loan_interest_rate AS loan_int_rate, l.loan_percent_income,
+           p.credit_history_length AS cb_person_cred_hist_length, p.credit_score,
+           CASE WHEN l.previous_loan_defaults THEN 'yes' ELSE 'no' END AS previous_loan_defaults_on_file,
+           CASE WHEN l.loan_status = 'Approved' THEN 1 ELSE 0 END AS loan_status
+    FROM loan l
+    JOIN person p ON p.person_id = l.person_id
+    LEFT JOIN gender g ON g.gender_id = p.gender_id
+    LEFT JOIN education e ON e.education_id = p.education_id
+    LEFT JOIN home_ownership h ON h.home_ownership_id = p.home_ownership_id
+    LEFT JOIN loan_intent i ON i.intent_id = l.loan_intent_id
+    WHERE l.loan_status IN ('Approved', 'Rejected')
+    ORDER BY l.loan_id
+"""
+
+
+# --- 1. Sources ---
+def iter_chunks(source: str, path: str, chunk_size: int = CHUNK_SIZE):
+    """
+    Yields DataFrames with the CSV's columns, rows with missing values dropped (as the notebook does)
+    and categories normalized the way the API normalizes them.
+    """
+    if source == "csv":
+        chunks = pd.read_csv(path, chunksize=chunk_size)
+    else:
+        connection = sqlite3.connect(path)
+        chunks = pd.read_sql_query(SQL_TRAINING_QUERY, connection, chunksize=chunk_size)
+    for chunk in chunks:
+        chunk = chunk[list(NUMERIC_FEATURES) + list(CATEGORICAL_FEATURES) + [TARGET_COLUMN]].dropna()
+        for column, field in CATEGORICAL_FEATURES.items():
+            names = {value: normalize_category(field, value) for value in chunk[column].unique()}
+            chunk[column] = chunk[column].map(names)
+        yield chunk
+
+def source_fingerprint(source: str, path: str) -> str:
+    stat = os.stat(path)
+    identity = {"source": source, "path": os.path.abspath(path), "size": stat.st_size,
+                "mtime": stat.st_mtime_ns, "encoding": ENCODING_VERSION}
+    return hashlib.sha1(json.dumps(identity, sort_keys=True).encode()).hexdigest()[:16]
+
+def scan(source: str, path: str, chunk_size: int = CHUNK_SIZE):
+    """
+    First pass: the sorted category vocabulary per column and the number of usable rows.
+    """
+    vocabulary = {column: set() for column in CATEGORICAL_FEATURES}
+    n_rows = 0
+    for chunk in iter_chunks(source, path, chunk_size):
+        n_rows += len(chunk)
+        for column in CATEGORICAL_FEATURES:
+            vocabulary[column].update(chunk[column].unique())
+    return {column: sorted(values) for column, values in vocabulary.items()}, n_rows
+
+
+# --- 2. Encoding and the memory-mapped cache ---
+def build_cache(source: str, path: str, cache_dir: str = CACHE_DIR, chunk_size: int = CHUNK_SIZE, rebuild: bool = False):
+    """
+    Returns (X, y, columns, cache path) with X and y memory-mapped from the cache, encoding
+    the source first if it has changed since the cache was written.
+    """
+    cache_path = os.path.join(cache_dir, f"{source}-{source_fingerprint(source, path)}")
+    meta_path = os.path.join(cache_path, "meta.json")
+    if rebuild or not os.path.exists(meta_path):
+        started = time.perf_counter()
+        vocabulary, n_rows = scan(source, path, chunk_size)
+        encoder = FeatureEncoder.from_vocabulary(vocabulary)
+        columns = encoder.columns
+
+        tmp_path = cache_path + ".tmp"
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        os.makedirs(tmp_path)
+        X = np.lib.format.open_memmap(os.path.join(tmp_path, "X.npy"), mode="w+", dtype=np.float32, shape=(n_rows, len(columns)))
+        y = np.lib.format.open_memmap(os.path.join(tmp_path, "y.npy"), mode="w+", dtype=np.int8, shape=(n_rows,))
+        offset = 0
+        for chunk in iter_chunks(source, path, chunk_size):
+            X[offset:offset + len(chunk)] = encoder.encode_frame(chunk, np.float32)
+            y[offset:offset + len(chunk)] = chunk[TARGET_COLUMN].to_numpy(dtype=np.int8)
+            offset += len(chunk)
+        X.flush()
+        y.flush()
+        del X, y
+        with open(os.path.join(tmp_path, "meta.json"), "w") as f:
+            json.dump({"source": source, "path": path, "rows": n_rows, "columns": columns}, f, indent=2)
+        shutil.rmtree(cache_path, ignore_errors=True)
+        os.replace(tmp_path, cache_path)
+        print(f"Encoded {n_rows} rows x {len(columns)} columns into {cache_path} in {time.perf_counter() - started:.1f}s.")
+    else:
+        print(f"Using cached design matrix {cache_path}.")
+
+    with open(meta_path) as f:
+        meta = json.load(f)
+    X = np.load(os.path.join(cache_path, "X.npy"), mmap_mode="r")
+    y = np.load(os.path.join(cache_path, "y.npy"), mmap_mode="r")
+    return X, y, meta["columns"], cache_path
+
+
+# --- Row selection ---
+def row_hash(start: int, stop: int, seed: int = SEED) -> np.ndarray:
+    """
+    Deterministic pseudo-random uint32 per row index, so splits can be computed block by block.
+    """
+    index = np.arange(start, stop, dtype=np.uint64)
+    mixed = (index + np.uint64(seed)) * np.uint64(0x9E3779B97F4A7C15)
+    return ((mixed >> np.uint64(32)) & np.uint64(0xFFFFFFFF)).astype(np.uint32)
+
+def selector(part: str, test_size: float = TEST_SIZE, folds: int = CV_FOLDS, fold: int = None, seed: int = SEED):
+    """
+    Returns select(start, stop) -> boolean mask for one part of the data:
+    "test", "train", "fold_train" (train minus `fold`) or "fold_valid" (`fold` of train).
+    """
+    cutoff = np.uint32(test_size * 0xFFFFFFFF)
+
+    def select(start, stop):
+        h = row_hash(start, stop, seed)
+        if part == "test":
+            return h < cutoff
+        train = h >= cutoff
+        if part == "train":
+            return train
+        in_fold = (h % np.uint32(folds)) == fold
+        return train & (in_fold if part == "fold_valid" else ~in_fold)
+    return select
+
+def iter_blocks(X, y, select, chunk_size: int = CHUNK_SIZE, order=None):
+    """
+    Yields (X block, y block) of the selected rows, reading the memmap one block at a time.
+    """
+    starts = list(range(0, len(y), chunk_size))
+    for start in (order if order is not None else starts):
+        stop = min(start + chunk_size, len(y))
+        mask = select(start, stop)
+        if mask.any():
+            yield np.asarray(X[start:stop][mask], dtype=np.float64), np.asarray(y[start:stop][mask])
+
+
+# --- 3. Fitting ---
+def standardize(X_block: np.ndarray, scaler: StandardScaler) -> np.ndarray:
+    return (X_block - scaler.mean_) / scaler.scale_
+
+def fit_scaler(X, y, select, columns: list, chunk_size: int = CHUNK_SIZE) -> StandardScaler:
+    scaler = StandardScaler()
+    for X_block, _ in iter_blocks(X, y, select, chunk_size):
+        scaler.partial_fit(pd.DataFrame(X_block, columns=columns))
+    if not hasattr(scaler, "mean_"):
+        raise ValueError("No rows selected for fitting; the data set is too small for this split.")
+    return scaler
+
+def fit_model(X, y, select, scaler, incremental: bool = False, epochs: int = EPOCHS, chunk_size: int = CHUNK_SIZE, seed: int = SEED):
+    """
+    LogisticRegression on the selected rows loaded into memory (the notebook's model), or with
+    `incremental` an SGD logistic regression fitted block by block so memory stays bounded.
+    Both weight the classes as class_weight='balanced' does.
+    """
+    if not incremental:
+        X_train = np.concatenate([standardize(X_block, scaler) for X_block, _ in iter_blocks(X, y, select, chunk_size)])
+        y_train = np.concatenate([y_block for _, y_block in iter_blocks(X, y, select, chunk_size)])
+        model = LogisticRegression(max_iter=1000, random_state=seed, class_weight='balanced')
+        return model.fit(X_train, y_train)
+
+    counts = np.zeros(2)
+    for _, y_block in iter_blocks(X, y, select, chunk_size):
+        counts += np.bincount(y_block, minlength=2)
+    class_weight = counts.sum() / (2 * np.maximum(counts, 1))
+
+    model = SGDClassifier(loss="log_loss", alpha=1e-4, learning_rate="optimal", random_state=seed)
+    rng = np.random.default_rng(seed)
+    starts = np.arange(0, len(y), chunk_size)
+    for _ in range(epochs):
+        for X_block, y_block in iter_blocks(X, y, select, chunk_size, order=rng.permutation(starts)):
+            model.partial_fit(standardize(X_block, scaler), y_block, classes=[0, 1], sample_weight=class_weight[y_block])
+    return model
+
+def predict_proba(model, scaler, X, y, select, chunk_size: int = CHUNK_SIZE):
+    """
+    Returns (probabilities, labels) of the selected rows, scored block by block.
+    """
+    probabilities, labels = [], []
+    for X_block, y_block in iter_blocks(X, y, select, chunk_size):
+        probabilities.append(model.predict_proba(standardize(X_block, scaler))[:, 1])
+        labels.append(y_block)
+    return np.concatenate(probabilities), np.concatenate(labels)
+
+
+# --- 4. Cross-validation and threshold sweep ---
+def score_predictions(probabilities: np.ndarray, labels: np.ndarray, threshold: float) -> dict:
+    predicted = probabilities >= threshold
+    actual = labels == 1
+    true_positive = int(np.sum(predicted & actual))
+    precision = true_positive / max(int(predicted.sum()), 1)
+    recall = true_positive / max(int(actual.sum()), 1)
+    return {
+        "threshold": float(threshold),
+        "accuracy": float(np.mean(predicted == actual)),
+        "precision": precision,
+        "recall": recall,
+        "f1": 2 * precision * recall / (precision + recall) if precision + recall else 0.0,
+        "approval_rate": float(predicted.mean()),
+    }
+
+def _cross_validate_fold(cache_path: str, columns: list, fold: int, options: dict) -> dict:
+    # Runs in a joblib worker: the arrays are re-opened memory-mapped, so workers share the page cache
+    X = np.load(os.path.join(cache_path, "X.npy"), mmap_mode="r")
+    y = np.load(os.path.join(cache_path, "y.npy"), mmap_mode="r")
+    fit_rows = selector("fold_train", options["test_size"], options["folds"], fold, options["seed"])
+    valid_rows = selector("fold_valid", options["test_size"], options["folds"], fold, options["seed"])
+    scaler = fit_scaler(X, y, fit_rows, columns, options["chunk_size"])
+    model = fit_model(X, y, fit_rows, scaler, options["incremental"], options["epochs"], options["chunk_size"], options["seed"])
+    probabilities, labels = predict_proba(model, scaler, X, y, valid_rows, options["chunk_size"])
+    return {
+        "fold": fold,
+        "rows": int(len(labels)),
+        "roc_auc": float(roc_auc_score(labels, probabilities)),
+        "log_loss": float(log_loss(labels, probabilities, labels=[0, 1])),
+        **score_predictions(probabilities, labels, options["threshold"]),
+    }
+
+def cross_validate(cache_path: str, columns: list, options: dict, n_jobs: int = -1) -> list:
+    """
+    Fits and evaluates one model per fold, with the folds spread over `n_jobs` processes.
+    """
+    return Parallel(n_jobs=n_jobs)(
+        delayed(_cross_validate_fold)(cache_path, columns, fold, options) for fold in range(options["folds"])
+    )
+
+def sweep_thresholds(probabilities: np.ndarray, labels: np.ndarray, thresholds=THRESHOLDS, n_jobs: int = -1) -> list:
+    """
+    Precision/recall/F1/approval rate at every threshold. NumPy releases the GIL, so threads suffice.
+    """
+    return Parallel(n_jobs=n_jobs, prefer="threads")(
+        delayed(score_predictions)(probabilities, labels, threshold) for threshold in thresholds
+    )
+
+
+# --- 5. Main ---
+def train(source: str, path: str, output: str = OUTPUT_PATH, incremental: bool = False, epochs: int = EPOCHS,
+          folds: int = CV_FOLDS, test_size: float = TEST_SIZE, threshold: float = None, select_threshold: str = None,
+          n_jobs: int = -1, chunk_size: int = CHUNK_SIZE, cache_dir: str = CACHE_DIR, rebuild_cache: bool = False,
+          seed: int = SEED) -> dict:
+    """
+    Runs the whole pipeline and returns the saved assets.
+    """
+    X, y, columns, cache_path = build_cache(source, path, cache_dir, chunk_size, rebuild_cache)
+    threshold = DECISION_THRESHOLD if threshold is None else threshold
+    options = {"test_size": test_size, "folds": folds, "seed": seed, "chunk_size": chunk_size,
+               "incremental": incremental, "epochs": epochs, "threshold": threshold}
+
+    cv_results = []
+    if folds > 1:
+        started = time.perf_counter()
+        cv_results = cross_validate(cache_path, columns, options, n_jobs)
+        print(f"{folds}-fold cross-validation in {time.perf_counter() - started:.1f}s: "
+              f"ROC AUC {np.mean([r['roc_auc'] for r in cv_results]):.4f} "
+              f"(+/- {np.std([r['roc_auc'] for r in cv_results]):.4f})")
+
+    started = time.perf_counter()
+    train_rows, test_rows = selector("train", test_size, seed=seed), selector("test", test_size, seed=seed)
+    scaler = fit_scaler(X, y, train_rows, columns, chunk_size)
+    model = fit_model(X, y, train_rows, scaler, incremental, epochs, chunk_size, seed)
+    print(f"Fitted {type(model).__name__} in {time.perf_counter() - started:.1f}s.")
+
+    probabilities, labels = predict_proba(model, scaler, X, y, test_rows, chunk_size)
+    sweep = sweep_thresholds(probabilities, labels, THRESHOLDS, n_jobs)
+    if select_threshold:
+        threshold = max(sweep, key=lambda r: r[select_threshold])["threshold"]
+    test_metrics = {
+        "rows": int(len(labels)),
+        "roc_auc": float(roc_auc_score(labels, probabilities)),
+        "log_loss": float(log_loss(labels, probabilities, labels=[0, 1])),
+        **score_predictions(probabilities, labels, threshold),
+    }
+    print(f"Test set ({test_metrics['rows']} rows) at threshold {threshold}: ROC AUC {test_metrics['roc_auc']:.4f}, "
+          f"precision {test_metrics['precision']:.3f}, recall {test_metrics['recall']:.3f}, F1 {test_metrics['f1']:.3f}")
+
+    assets = {
+        "model": model,
+        "scaler": scaler,
+        "columns": columns,
+        "threshold": threshold,
+        "metrics": {"test": test_metrics, "cross_validation": cv_results, "threshold_sweep": sweep,
+                    "source": source, "rows": int(len(y))},
+    }
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    joblib.dump(assets, output)
+    print(f"Saved pipeline assets to '{output}'.")
+    return assets
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Train the loan approval model out of core.")
+    parser.add_argument("--source", choices=["csv", "sql"], default="csv")
+    parser.add_argument("--path", help=f"CSV file or SQLite database (default {CSV_FILE_PATH} / {DATABASE_PATH}).")
+    parser.add_argument("--output", default=OUTPUT_PATH)
+    parser.add_argument("--incremental", action="store_true", help="Fit with SGD block by block (data larger than RAM).")
+    parser.add_argument("--epochs", type=int, default=EPOCHS)
+    parser.add_argument("--folds", type=int, default=CV_FOLDS, help="Cross-validation folds (0 or 1 skips it).")
+    parser.add_argument("--test-size", type=float, default=TEST_SIZE)
+    parser.add_argument("--threshold", type=float, help=f"Decision threshold to save (default {DECISION_THRESHOLD}).")
+    parser.add_argument("--select-threshold", choices=["f1", "accuracy", "precision", "recall"],
+                        help="Save the threshold that maximizes this metric on the test set instead.")
+    parser.add_argument("--n-jobs", type=int, default=-1)
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    parser.add_argument("--cache-dir", default=CACHE_DIR)
+    parser.add_argument("--rebuild-cache", action="store_true")
+    parser.add_argument("--seed", type=int, default=SEED)
+    parser.add_argument("--register", action="store_true", help="Also register the result in the model registry.")
+    args = parser.parse_args()
+
+    path = args.path or (CSV_FILE_PATH if args.source == "csv" else DATABASE_PATH)
+    assets = train(args.source, path, args.output, args.incremental, args.epochs, args.folds, args.test_size,
+                   args.threshold, args.select_threshold, args.n_jobs, args.chunk_size, args.cache_dir,
+                   args.rebuild_cache, args.seed)
+    if args.register:
+        from app.ml import model_registry
+        metadata = model_registry.register(assets, threshold=assets["threshold"], source=path)
+        print(f"Registered model version {metadata['version']}.")
+
+
+if __name__ == "__main__":
+    main()
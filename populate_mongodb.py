@@ -1,9 +1,11 @@
+import argparse
 import pandas as pd
 from pymongo import MongoClient
 from datetime import datetime
-import numpy as np
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
 import os
 from dotenv import load_dotenv
+from app.crud import analytics_crud, document_layout
 
 # Load environment variables from .env file
 load_dotenv()
@@ -12,73 +14,128 @@ load_dotenv()
 MONGO_URI = os.getenv("MONGO_URI")
 DB_NAME = 'loan_prediction_db'
 COLLECTION_NAME = 'loanApplications'
-CSV_FILE_PATH = 'data/Phase2.csv' 
+CSV_FILE_PATH = 'data/Phase2.csv'
+CHUNK_SIZE = 20000  # rows read from the CSV at a time
+BATCH_SIZE = 2000   # documents per insert_many
+WORKERS = 1         # concurrent insert_many calls
+
+# --- Document building ---
+def build_documents(df, ingested_at):
+    """
+    Builds loanApplications documents from a CSV chunk.
+    Columns are converted to Python lists once and zipped, instead of iterating rows.
+    """
+    columns = {name: df[name].tolist() for name in df.columns}
+    return [
+        {
+            "personDetails": {
+                "age": age,
+                "gender": gender,
+                "education": education,
+                "income": income,
+                "employmentExperienceYears": emp_exp,
+                "homeOwnership": home_ownership
+            },
+            "loanDetails": {
+                "amount": amount,
+                "intent": intent,
+                "interestRate": interest_rate,
+                "percentIncome": percent_income
+            },
+            "creditDetails": {
+                "creditHistoryLengthYears": history_length,
+                "creditScore": credit_score,
+                "previousLoanDefaults": previous_defaults
+            },
+            "loanStatus": status,
+            "ingestionTimestamp": ingested_at
+        }
+        for (age, gender, education, income, emp_exp, home_ownership, amount, intent,
+             interest_rate, percent_income, history_length, credit_score, previous_defaults, status)
+        in zip(
+            columns['person_age'], columns['person_gender'], columns['person_education'],
+            columns['person_income'], columns['person_emp_exp'], columns['person_home_ownership'],
+            columns['loan_amnt'], columns['loan_intent'], columns['loan_int_rate'],
+            columns['loan_percent_income'], columns['cb_person_cred_hist_length'],
+            columns['credit_score'], columns['previous_loan_defaults_on_file'], columns['loan_status']
+        )
+    ]
+
+def iter_document_batches(csv_path, chunk_size=CHUNK_SIZE, batch_size=BATCH_SIZE):
+    """
+    Streams the CSV in chunks and yields bounded lists of documents in the stored layout
+    (or of bucket documents with MONGO_BUCKET_PERIOD set). Only one chunk is held in memory at a time.
+    """
+    ingested_at = datetime.now()
+    for chunk in pd.read_csv(csv_path, chunksize=chunk_size):
+        documents = build_documents(chunk, ingested_at)
+        if document_layout.BUCKET_PERIOD:
+            documents = document_layout.bucket_documents(documents)
+        else:
+            documents = [document_layout.to_stored(document) for document in documents]
+        for start in range(0, len(documents), batch_size):
+            yield documents[start:start + batch_size]
+
+def insert_batches(collection, batches, workers=WORKERS):
+    """
+    Inserts each batch with an unordered insert_many, keeping at most `workers`
+    batches in flight so memory stays bounded. Returns the number of inserted documents.
+    """
+    if workers <= 1:
+        return sum(len(collection.insert_many(batch, ordered=False).inserted_ids) for batch in batches)
+
+    inserted = 0
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        pending = set()
+        for batch in batches:
+            if len(pending) >= workers:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                inserted += sum(len(future.result().inserted_ids) for future in done)
+            pending.add(executor.submit(collection.insert_many, batch, ordered=False))
+        inserted += sum(len(future.result().inserted_ids) for future in pending)
+    return inserted
 
 # --- Main Script ---
-def populate_mongodb_from_csv(csv_path, mongo_uri, db_name, collection_name):
+def populate_mongodb_from_csv(csv_path, mongo_uri, db_name, collection_name, chunk_size=CHUNK_SIZE, batch_size=BATCH_SIZE, workers=WORKERS):
     if not mongo_uri:
         print("Error: MONGO_URI not found. Make sure you have a .env file with the MONGO_URI variable.")
         return
 
     try:
-        # 1. Load the CSV dataset
-        df = pd.read_csv(csv_path)
-        print(f"Successfully loaded '{csv_path}' with {len(df)} rows and {len(df.columns)} columns.")
-        
-        # 2. Connect to MongoDB
-        client = MongoClient(mongo_uri)
+        # 1. Connect to MongoDB
+        client = MongoClient(mongo_uri, maxPoolSize=max(workers, 1) + 1)
         db = client[db_name]
         collection = db[collection_name]
-        
+
         # --- THE FIX: Clear the collection before inserting ---
         print(f"Clearing existing documents from '{collection_name}'...")
         collection.delete_many({})
+        db[document_layout.BUCKET_COLLECTION].delete_many({})
         print("Collection cleared.")
         # ----------------------------------------------------
 
-        # 3. Prepare documents for insertion
-        documents = []
-        for index, row in df.iterrows():
-            doc = {
-                "personDetails": {
-                    "age": row['person_age'],
-                    "gender": row['person_gender'],
-                    "education": row['person_education'],
-                    "income": row['person_income'],
-                    "employmentExperienceYears": row['person_emp_exp'],
-                    "homeOwnership": row['person_home_ownership']
-                },
-                "loanDetails": {
-                    "amount": row['loan_amnt'],
-                    "intent": row['loan_intent'],
-                    "interestRate": row['loan_int_rate'],
-                    "percentIncome": row['loan_percent_income']
-                },
-                "creditDetails": {
-                    "creditHistoryLengthYears": row['cb_person_cred_hist_length'],
-                    "creditScore": row['credit_score'],
-                    "previousLoanDefaults": row['previous_loan_defaults_on_file']
-                },
-                "loanStatus": row['loan_status'],
-                "ingestionTimestamp": datetime.now()
-            }
-            documents.append(doc)
-
-        # 4. Insert documents into the collection
-        if documents:
-            result = collection.insert_many(documents)
-            print(f"Successfully inserted {len(result.inserted_ids)} documents into '{collection_name}'.")
+        # 2. Stream the CSV and insert documents batch by batch
+        # (with MONGO_BUCKET_PERIOD set, as time-bucket documents of up to BUCKET_SIZE applications)
+        if document_layout.BUCKET_PERIOD:
+            collection_name = document_layout.BUCKET_COLLECTION
+            collection = db[collection_name]
+        print(f"Loading '{csv_path}' in chunks of {chunk_size} rows ({workers} worker(s))...")
+        inserted = insert_batches(collection, iter_document_batches(csv_path, chunk_size, batch_size), workers)
+        if inserted:
+            print(f"Successfully inserted {inserted} documents into '{collection_name}'.")
         else:
             print("No documents to insert.")
 
+        # The bulk load bypasses the incremental rollup updates, so recompute them once
+        if analytics_crud.ROLLUPS_ENABLED:
+            print(f"Rebuilt {analytics_crud.rebuild_rollups(client)} analytics rollups.")
+
     except FileNotFoundError:
         print(f"Error: CSV file not found at '{csv_path}'. Please ensure the path is correct.")
     except pd.errors.EmptyDataError:
         print(f"Error: CSV file '{csv_path}' is empty.")
     except KeyError as e:
         print(f"Error: Missing expected column in CSV: {e}. Please ensure column names in CSV match the script's expectations.")
-        if 'df' in locals():
-            print(f"Columns found in CSV: {df.columns.tolist()}")
     except Exception as e:
         print(f"An unexpected error occurred: {e}")
     finally:
@@ -87,5 +144,12 @@ def populate_mongodb_from_csv(csv_path, mongo_uri, db_name, collection_name):
             print("MongoDB connection closed.")
 
 if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Load the loan CSV into MongoDB.")
+    parser.add_argument("--csv", default=CSV_FILE_PATH)
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    parser.add_argument("--workers", type=int, default=WORKERS)
+    args = parser.parse_args()
+
     print("Starting MongoDB population script...")
-    populate_mongodb_from_csv(CSV_FILE_PATH, MONGO_URI, DB_NAME, COLLECTION_NAME)
\ No newline at end of file
+    populate_mongodb_from_csv(args.csv, MONGO_URI, DB_NAME, COLLECTION_NAME, args.chunk_size, args.batch_size, args.workers)
@@ -0,0 +1,146 @@
+import argparse
+import re
+import sqlite3
+import pandas as pd
+import numpy as np
+
+from app.ml.feature_encoder import normalize_category
+
+# --- Configuration ---
+DB_PATH = 'loan_database.db'
+SCHEMA_PATH = 'sql/schema.sql'
+CSV_FILE_PATH = 'data/Phase2.csv'
+CHUNK_SIZE = 20000  # rows read from the CSV (and committed) at a time
+
+# Lookup tables from sql/schema.sql: (table, id column, name column, category field, CSV column)
+LOOKUPS = [
+    ("gender", "gender_id", "gender", "gender", "person_gender"),
+    ("education", "education_id", "level", "education", "person_education"),
+    ("home_ownership", "home_ownership_id", "type", "home_ownership", "person_home_ownership"),
+    ("loan_intent", "intent_id", "purpose", "loan_intent", "loan_intent"),
+]
+
+PERSON_INSERT = """
+    INSERT INTO person (person_id, age, gender_id, education_id, income, employment_experience,
+                        home_ownership_id, credit_score, credit_history_length)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+LOAN_INSERT = """
+    INSERT INTO loan (person_id, loan_amount, loan_intent_id, loan_interest_rate,
+                      loan_percent_income, loan_status, previous_loan_defaults)
+    VALUES (?, ?, ?, ?, ?, ?, ?)
+"""
+
+
+def ensure_tables(conn, schema_path=SCHEMA_PATH):
+    """
+    Creates any missing table from sql/schema.sql (without re-running its seed inserts).
+    """
+    with open(schema_path, encoding="utf-8") as f:
+        schema = f.read()
+    for statement in re.findall(r"CREATE TABLE \w+ \(.*?\);", schema, flags=re.S):
+        conn.execute(statement.replace("CREATE TABLE", "CREATE TABLE IF NOT EXISTS", 1))
+
+
+class LookupResolver:
+    """
+    Maps category strings to lookup-table ids, creating unknown categories with one
+    executemany per chunk. Existing rows such as 'Bachelor’s' match CSV values like 'bachelor'.
+    """
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.ids = {}
+        for table, id_column, name_column, field, _ in LOOKUPS:
+            rows = conn.execute(f"SELECT {id_column}, {name_column} FROM {table} ORDER BY {id_column}").fetchall()
+            self.ids[field] = {}
+            for row_id, name in rows:
+                self.ids[field].setdefault(normalize_category(field, name), row_id)
+
+    def resolve(self, table, id_column, name_column, field, values):
+        """
+        Returns {value: id} for the given values, inserting the missing ones.
+        """
+        known = self.ids[field]
+        missing = {}
+        for v in values:
+            key = normalize_category(field, v)
+            if key not in known:
+                missing.setdefault(key, v)
+        missing = sorted(missing.values())
+        if missing:
+            self.conn.executemany(f"INSERT INTO {table} ({name_column}) VALUES (?)", [(v,) for v in missing])
+            placeholders = ",".join("?" * len(missing))
+            for row_id, name in self.conn.execute(
+                f"SELECT {id_column}, {name_column} FROM {table} WHERE {name_column} IN ({placeholders})", missing
+            ):
+                known.setdefault(normalize_category(field, name), row_id)
+        return {v: known[normalize_category(field, v)] for v in values}
+
+
+def load_chunk(conn, resolver, chunk):
+    """
+    Inserts one CSV chunk into person and loan inside a single transaction.
+    """
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        lookup_ids = {}
+        for table, id_column, name_column, field, csv_column in LOOKUPS:
+            mapping = resolver.resolve(table, id_column, name_column, field, chunk[csv_column].unique().tolist())
+            lookup_ids[field] = chunk[csv_column].map(mapping).tolist()
+
+        # Person ids are assigned up front (we hold the write lock) so loans can reference them
+        first_id = conn.execute("SELECT COALESCE(MAX(person_id), 0) + 1 FROM person").fetchone()[0]
+        person_ids = np.arange(first_id, first_id + len(chunk)).tolist()
+
+        conn.executemany(PERSON_INSERT, zip(
+            person_ids,
+            chunk['person_age'].tolist(),
+            lookup_ids['gender'],
+            lookup_ids['education'],
+            chunk['person_income'].tolist(),
+            chunk['person_emp_exp'].tolist(),
+            lookup_ids['home_ownership'],
+            chunk['credit_score'].tolist(),
+            chunk['cb_person_cred_hist_length'].astype(int).tolist(),
+        ))
+        conn.executemany(LOAN_INSERT, zip(
+            person_ids,
+            chunk['loan_amnt'].tolist(),
+            lookup_ids['loan_intent'],
+            chunk['loan_int_rate'].tolist(),
+            chunk['loan_percent_income'].tolist(),
+            np.where(chunk['loan_status'] == 1, "Approved", "Rejected").tolist(),
+            (chunk['previous_loan_defaults_on_file'].str.lower() == "yes").astype(int).tolist(),
+        ))
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+    return len(chunk)
+
+
+def populate_sqlite_from_csv(csv_path=CSV_FILE_PATH, db_path=DB_PATH, chunk_size=CHUNK_SIZE):
+    conn = sqlite3.connect(db_path, isolation_level=None)
+    try:
+        ensure_tables(conn)
+        resolver = LookupResolver(conn)
+
+        total = 0
+        for chunk in pd.read_csv(csv_path, chunksize=chunk_size):
+            total += load_chunk(conn, resolver, chunk)
+            print(f"Inserted {total} person/loan rows...")
+        print(f"Successfully loaded {total} rows from '{csv_path}' into '{db_path}'.")
+    finally:
+        conn.close()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Load the loan CSV into the SQLite database.")
+    parser.add_argument("--csv", default=CSV_FILE_PATH)
+    parser.add_argument("--db", default=DB_PATH)
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    args = parser.parse_args()
+
+    print("Starting SQLite population script...")
+    populate_sqlite_from_csv(args.csv, args.db, args.chunk_size)
@@ -1,6 +1,7 @@
 import os
 from pymongo import MongoClient
 from dotenv import load_dotenv
+from app.crud.mongo_crud import find_applications, count_applications
 
 # Load environment variables from .env file
 load_dotenv()
@@ -34,64 +35,65 @@ try:
     # 1. Find All Documents (Limit to a few for display)
     print("\n1. Finding all documents (first 5):")
     # .find({}) means no filter, get all. .limit(5) restricts results.
-    for doc in collection.find({}).limit(5):
+    # find_applications returns the readable shape whatever MONGO_DOCUMENT_LAYOUT stores
+    for doc in find_applications(client, limit=5):
         print(doc)
     print("...") # Indicate more documents exist
 
     # 2. Count All Documents
-    print(f"\n2. Total number of documents: {collection.count_documents({})}")
+    print(f"\n2. Total number of documents: {count_applications(client)}")
 
     # 3. Find Documents with Specific Criteria (Equality)
     # Find all applications where loan_status is 1 (approved)
     print("\n3. Finding approved loan applications (loanStatus = 1, first 3):")
-    for doc in collection.find({"loanStatus": 1}).limit(3):
+    for doc in find_applications(client, {"loanStatus": 1}, limit=3):
         print(doc)
 
     # 4. Find Documents with Nested Field Criteria
     # Find applications for females (personDetails.gender = "female")
     print("\n4. Finding applications from females (first 3):")
-    for doc in collection.find({"personDetails.gender": "female"}).limit(3):
+    for doc in find_applications(client, {"personDetails.gender": "female"}, limit=3):
         print(doc)
 
     # 5. Find Documents Using Comparison Operators ($gt, $lt, $gte, $lte)
     # Find applications with income > 100000 and age < 30
     print("\n5. Finding applications with income > 100000 and age < 30 (first 3):")
-    for doc in collection.find({
+    for doc in find_applications(client, {
         "personDetails.income": {"$gt": 100000},
         "personDetails.age": {"$lt": 30}
-    }).limit(3):
+    }, limit=3):
         print(doc)
 
     # 6. Find Documents with "OR" Logic ($or operator)
     # Find applications with loan_intent = "education" OR "small_business"
     print("\n6. Finding applications for 'education' OR 'small_business' intent (first 3):")
-    for doc in collection.find({
+    for doc in find_applications(client, {
         "$or": [
             {"loanDetails.intent": "education"},
             {"loanDetails.intent": "small_business"}
         ]
-    }).limit(3):
+    }, limit=3):
         print(doc)
 
     # 7. Projection (Selecting Specific Fields)
     # Get only loan_amount and loan_intent for approved loans
     print("\n7. Projecting 'loan_amount' and 'loan_intent' for approved loans (first 3):")
-    for doc in collection.find(
+    for doc in find_applications(client,
         {"loanStatus": 1},
-        {"loanDetails.amount": 1, "loanDetails.intent": 1, "_id": 0} # 1 to include, 0 to exclude
-    ).limit(3):
+        {"loanDetails.amount": 1, "loanDetails.intent": 1, "_id": 0}, # 1 to include, 0 to exclude
+        limit=3):
         print(doc)
 
     # 8. Sorting Results (.sort())
     # Find applications sorted by person_age (ascending)
     print("\n8. Finding applications sorted by person_age (ascending, first 3):")
-    for doc in collection.find({}).sort("personDetails.age", 1).limit(3): # 1 for ascending, -1 for descending
+    for doc in find_applications(client, sort=[("personDetails.age", 1)], limit=3): # 1 for ascending, -1 for descending
         print(doc)
 
     # 9. Combining Filters, Projections, and Sorting
     # Find applications from males with income > 50000, show only age, income, and loan_status, sorted by income descending
     print("\n9. Combined Query (Male, Income > 50000, specific fields, sorted by income DESC, first 3):")
-    for doc in collection.find(
+    for doc in find_applications(client,
         {
             "personDetails.gender": "male",
             "personDetails.income": {"$gt": 50000}
@@ -101,8 +103,8 @@ try:
             "personDetails.income": 1,
             "loanStatus": 1,
             "_id": 0
-        }
-    ).sort("personDetails.income", -1).limit(3):
+        },
+        sort=[("personDetails.income", -1)], limit=3):
         print(doc)
 
 except Exception as e:
@@ -66,18 +66,21 @@ CREATE TABLE loan_status_log (
 );
 
 -- Create Trigger: Log loan status changes
+-- (also created by the API at startup, see LOAN_STATUS_TRIGGER in app/db/sql_models.py;
+-- app/workers/cdc_tailer.py applies the logged changes to MongoDB)
 -- NOTE: SQLite trigger syntax does not use DELIMITER
 CREATE TRIGGER trg_log_loan_status
 AFTER UPDATE ON loan
 FOR EACH ROW
-WHEN OLD.loan_status <> NEW.loan_status
+WHEN OLD.loan_status IS NOT NEW.loan_status
 BEGIN
     INSERT INTO loan_status_log (loan_id, old_status, new_status)
     VALUES (OLD.loan_id, OLD.loan_status, NEW.loan_status);
 END;
 
 -- NOTE: Stored Procedures are not supported in SQLite.
--- The logic for 'auto_approve_loans' must be handled in the Python application code.
+-- The logic for 'auto_approve_loans' must be handled in the Python application code
+-- (app/ml/approval_rules.py, applied by app/workers/auto_approve.py).
 
 -- Insert Lookup Table Data
 INSERT INTO gender (gender) VALUES ('Male'), ('Female'), ('Other');
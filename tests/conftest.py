@@ -0,0 +1,87 @@
+"""
+Shared fixtures. The app reads its configuration at import, so the environment is set here,
+before any test imports it: a scratch SQLite file that starts empty, mongomock for MongoDB,
+inline MongoDB writes, an empty model registry and no prediction cache.
+
+Run from the project root:
+    python -m pytest
+"""
+import os
+import tempfile
+
+import pytest
+
+WORK_DIR = tempfile.mkdtemp(prefix="loan-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(WORK_DIR, 'test.db')}"
+os.environ.setdefault("MONGO_URI", "mongodb://localhost:27017")
+os.environ["MONGO_SYNC_MODE"] = "inline"
+os.environ["MODEL_REGISTRY_DIR"] = os.path.join(WORK_DIR, "registry")
+os.environ["PREDICTION_CACHE_SIZE"] = "0"
+for name in ("ASYNC_DATABASE_URL", "API_MODE", "TRAFFIC_CAPTURE_DIR", "MONGO_DOCUMENT_LAYOUT", "MONGO_BUCKET_PERIOD"):
+    os.environ.pop(name, None)
+
+APPLICATION = {
+    "age": 30, "income": 50000, "employment_experience": 3, "credit_score": 700,
+    "credit_history_length": 5, "home_ownership_id": 2, "gender": "Female", "education": "Master's",
+    "loan_amount": 5000, "loan_interest_rate": 11.0, "loan_intent": "MEDICAL",
+}
+
+
+@pytest.fixture(scope="session")
+def mongo():
+    import mongomock
+    from app.db import database
+
+    client = mongomock.MongoClient()
+    database.mongo_client = client
+    return client
+
+@pytest.fixture(scope="session")
+def client(mongo):
+    """
+    The API, started (lifespan included) against the empty scratch database.
+    """
+    from fastapi.testclient import TestClient
+    from app.main import app
+    from app.db.database import get_mongo_client
+
+    app.dependency_overrides[get_mongo_client] = lambda: mongo
+    with TestClient(app) as test_client:
+        yield test_client
+    app.dependency_overrides.clear()
+
+@pytest.fixture
+def db(client):
+    from app.db.database import SessionLocal
+
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+
+@pytest.fixture
+def empty_mongo(client, mongo):
+    """
+    The mongomock client, with no applications or rollups left by other tests.
+    """
+    from app.crud import analytics_crud, document_layout
+
+    database = mongo['loan_prediction_db']
+    for name in ('loanApplications', document_layout.BUCKET_COLLECTION, analytics_crud.ROLLUP_COLLECTION):
+        database[name].delete_many({})
+    return mongo
+
+@pytest.fixture
+def served(client):
+    """
+    The scoring_engine module; afterwards the loose assets file is served again, as at startup.
+    """
+    from app.ml import model_registry, scoring_engine
+
+    yield scoring_engine
+    for name in (model_registry.ACTIVE_FILE, model_registry.SHADOW_FILE):
+        path = os.path.join(model_registry.REGISTRY_DIR, name)
+        if os.path.exists(path):
+            os.remove(path)
+    scoring_engine.load_engine()
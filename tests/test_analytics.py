@@ -0,0 +1,113 @@
+import os
+from datetime import datetime
+
+import pandas as pd
+import pytest
+from pymongo import MongoClient
+
+import populate_mongodb
+from app.crud import analytics_crud, document_layout, mongo_crud
+from app.models.pydantic_schemas import ApplicationCreate
+from conftest import APPLICATION
+
+CSV_ROW = {
+    "person_age": 22, "person_gender": "female", "person_education": "master", "person_income": 71948.0,
+    "person_emp_exp": 0, "person_home_ownership": "rent", "loan_amnt": 35000.0, "loan_intent": "MEDICAL",
+    "loan_int_rate": 16.02, "loan_percent_income": 0.49, "cb_person_cred_hist_length": 3.0,
+    "credit_score": 561, "previous_loan_defaults_on_file": "no", "loan_status": 1,
+}
+
+
+def _rollups(mongo) -> dict:
+    return {(r["dimension"], r["value"]): (r.get("total", 0), r.get("approved", 0), r.get("pending", 0))
+            for r in analytics_crud.get_rollups(mongo)}
+
+
+def _insert_api_and_csv_applications(mongo):
+    # The API sends "Master's" and home_ownership_id 2 (Rent), the CSV "master" and "rent"
+    mongo_crud.create_application_document(mongo, ApplicationCreate(**APPLICATION), "Pending", 1)
+    [document] = populate_mongodb.build_documents(pd.DataFrame([CSV_ROW]), datetime.now())
+    mongo['loan_prediction_db']['loanApplications'].insert_one(dict(document))
+    delta = analytics_crud.RollupDelta()
+    delta.add(document)
+    analytics_crud.apply_delta(mongo, delta)
+
+def _evaluate(expression, variables: dict):
+    """
+    The aggregation operators _value_expression uses (mongomock has no $replaceAll or $merge).
+    """
+    if isinstance(expression, str) and expression.startswith("$$"):
+        return variables[expression[2:]]
+    if isinstance(expression, str) and expression.startswith("$"):
+        return variables["CURRENT"].get(expression[1:])
+    if not isinstance(expression, dict):
+        return expression
+    [(operator, argument)] = expression.items()
+    if operator == "$ifNull":
+        value = _evaluate(argument[0], variables)
+        return _evaluate(argument[1], variables) if value is None else value
+    if operator == "$toString":
+        return str(_evaluate(argument, variables))
+    if operator == "$toLower":
+        return _evaluate(argument, variables).lower()
+    if operator == "$trim":
+        return _evaluate(argument["input"], variables).strip()
+    if operator == "$replaceAll":
+        return _evaluate(argument["input"], variables).replace(argument["find"], argument["replacement"])
+    if operator == "$eq":
+        return _evaluate(argument[0], variables) == _evaluate(argument[1], variables)
+    if operator == "$switch":
+        for branch in argument["branches"]:
+            if _evaluate(branch["case"], variables):
+                return _evaluate(branch["then"], variables)
+        return _evaluate(argument["default"], variables)
+    if operator == "$let":
+        bound = {name: _evaluate(value, variables) for name, value in argument["vars"].items()}
+        return _evaluate(argument["in"], {**variables, **bound})
+    raise NotImplementedError(operator)
+
+
+def test_api_and_csv_values_share_a_bucket(empty_mongo):
+    _insert_api_and_csv_applications(empty_mongo)
+
+    rollups = _rollups(empty_mongo)
+    assert rollups[("education", "master")] == (2, 1, 1)
+    assert rollups[("homeOwnership", "rent")] == (2, 1, 1)
+    assert rollups[("intent", "medical")] == (2, 1, 1)
+    assert not any(value in ("master's", "2") for _, value in rollups)
+
+@pytest.mark.parametrize("dimension, value", [
+    ("education", "Master's"), ("education", "master"), ("education", " High School "), ("education", None),
+    ("intent", "HOME_IMPROVEMENT"), ("intent", "home improvement"), ("intent", "Business"), ("intent", "VENTURE"),
+    ("homeOwnership", "2"), ("homeOwnership", 2), ("homeOwnership", " Rent "), ("homeOwnership", "999"),
+])
+def test_rebuild_keys_values_like_the_incremental_path(dimension, value):
+    path = analytics_crud.DIMENSIONS[dimension]
+    expression = analytics_crud._value_expression(dimension, path)
+    key = _evaluate(expression, {"CURRENT": {path: value}})
+    assert key == analytics_crud.dimension_value(dimension, value)
+
+@pytest.mark.skipif(not os.getenv("MONGO_TEST_URI"), reason="needs a scratch MongoDB server in MONGO_TEST_URI")
+def test_rebuild_matches_incremental_rollups():
+    server = MongoClient(os.environ["MONGO_TEST_URI"])
+    database = server['loan_prediction_db']
+    for name in ("loanApplications", document_layout.BUCKET_COLLECTION, analytics_crud.ROLLUP_COLLECTION):
+        database.drop_collection(name)
+    try:
+        _insert_api_and_csv_applications(server)
+        database[analytics_crud.ROLLUP_COLLECTION].insert_one({"_id": "intent|stale", "dimension": "intent",
+                                                               "value": "stale", "total": 1,
+                                                               "updatedAt": datetime(2000, 1, 1)})
+        incremental = _rollups(server)
+        incremental.pop(("intent", "stale"))
+
+        analytics_crud.rebuild_rollups(server)
+        assert _rollups(server) == incremental
+    finally:
+        for name in ("loanApplications", document_layout.BUCKET_COLLECTION, analytics_crud.ROLLUP_COLLECTION):
+            database.drop_collection(name)
+        server.close()
+
+def test_unknown_home_ownership_id_keeps_its_own_bucket():
+    assert analytics_crud.dimension_value("homeOwnership", "999") == "999"
+    assert analytics_crud.dimension_value("education", None) == ""
@@ -0,0 +1,58 @@
+import pytest
+from sqlalchemy import select
+
+from app.crud import sql_crud
+from app.db import sql_models
+from app.ml import approval_rules
+
+Person, Loan = sql_models.Person, sql_models.Loan
+
+LOW_RATIO_RULE = {"name": "low_ratio", "decision": "Approved", "all": [["loan_percent_income", "<", 0.5]]}
+
+
+@pytest.fixture
+def no_income_loan(db):
+    """
+    A Pending loan whose person has no income and whose loan has no stored percentage.
+    """
+    person = Person(age=30, income=None, employment_experience=3, credit_score=700, credit_history_length=5,
+                    home_ownership_id=2, gender_id=1, education_id=1)
+    db.add(person)
+    db.flush()
+    loan = Loan(person_id=person.person_id, loan_amount=5000, loan_interest_rate=11.0, loan_status="Pending",
+                loan_percent_income=None, previous_loan_defaults=0, loan_intent_id=1)
+    db.add(loan)
+    db.commit()
+    yield loan.loan_id
+    db.delete(loan)
+    db.delete(person)
+    db.commit()
+
+def _sql_decision(db, loan_id: int, rules: list):
+    query = (
+        select(approval_rules.sql_case(rules), approval_rules.sql_rule_name(rules))
+        .select_from(Loan)
+        .join(Person, Person.person_id == Loan.person_id)
+        .where(Loan.loan_id == loan_id)
+    )
+    decision, name = db.execute(query).one()
+    return (decision, name) if decision is not None else None
+
+def _numpy_decision(db, loan_id: int, rules: list):
+    records = sql_crud.get_pending_loan_records(db, after_loan_id=loan_id - 1, limit=1)
+    assert records[0]["loan_id"] == loan_id
+    return approval_rules.decide(records, rules)[0]
+
+
+@pytest.mark.parametrize("rules, expected", [
+    (approval_rules.DEFAULT_RULES, ("Rejected", "no_income")),
+    ([LOW_RATIO_RULE], None),
+])
+def test_null_income_is_decided_the_same_in_sql_and_numpy(db, no_income_loan, rules, expected):
+    assert _sql_decision(db, no_income_loan, rules) == expected
+    assert _numpy_decision(db, no_income_loan, rules) == expected
+
+def test_null_fields_in_a_raw_record_read_as_in_sql():
+    record = {"income": None, "loan_amount": 5000, "loan_percent_income": None, "previous_loan_defaults": None}
+    assert approval_rules.decide([record], approval_rules.DEFAULT_RULES) == [("Rejected", "no_income")]
+    assert approval_rules.decide([record], [LOW_RATIO_RULE]) == [None]
@@ -0,0 +1,39 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+
+from app.crud import async_mongo_crud
+from app.db.database import AsyncSessionLocal
+from app.models.pydantic_schemas import LoanUpdate
+from app.routes import async_loan_routes
+from conftest import APPLICATION
+
+
+@pytest.fixture
+def mongo_updates(monkeypatch):
+    updates = []
+
+    async def update_document_status(mongo, loan_id, status):
+        updates.append((loan_id, status))
+
+    monkeypatch.setattr(async_mongo_crud, "update_document_status", update_document_status)
+    return updates
+
+def _put(loan_id: int, status: str):
+    async def put():
+        async with AsyncSessionLocal() as db:
+            return await async_loan_routes.update_loan_status_in_both_dbs(loan_id, LoanUpdate(loan_status=status), db=db, mongo=None)
+    return asyncio.run(put())
+
+
+def test_missing_loan_does_not_touch_mongodb(client, mongo_updates):
+    with pytest.raises(HTTPException) as error:
+        _put(10 ** 9, "Approved")
+    assert error.value.status_code == 404
+    assert mongo_updates == []
+
+def test_mongodb_follows_the_sql_update(client, mongo_updates):
+    loan_id = client.post("/applications/", json=APPLICATION).json()["loans"][0]["loan_id"]
+    assert _put(loan_id, "Rejected").loan_status == "Rejected"
+    assert mongo_updates == [(loan_id, "Rejected")]
@@ -0,0 +1,51 @@
+from sqlalchemy import update
+
+from app.crud import analytics_crud, mongo_crud, sql_crud
+from app.db import sql_models
+from app.workers import cdc_tailer
+from conftest import APPLICATION
+
+
+def _create_loan(client) -> int:
+    return client.post("/applications/", json=APPLICATION).json()["loans"][0]["loan_id"]
+
+def _set_status(db, loan_id: int, status: str):
+    db.execute(update(sql_models.Loan).where(sql_models.Loan.loan_id == loan_id).values(loan_status=status))
+    db.commit()
+
+def _status(mongo, loan_id: int):
+    [document] = mongo_crud.find_applications(mongo, {"sql_loan_id": loan_id})
+    return document["loanStatus"]
+
+
+def test_tailer_applies_the_log_in_batches_and_resumes_from_its_mark(client, db, empty_mongo):
+    first, second = _create_loan(client), _create_loan(client)
+    start = sql_crud.last_status_change_id(db)
+    mongo_crud.set_sync_position(empty_mongo, cdc_tailer.SYNC_POSITION, start)
+    _set_status(db, first, "Approved")
+    _set_status(db, second, "Approved")
+    _set_status(db, first, "Rejected")
+
+    # A full batch stores its last log_id as the high-water mark
+    assert cdc_tailer.tail_once(db, empty_mongo, start, batch_size=2) == (2, start + 2)
+    assert mongo_crud.get_sync_position(empty_mongo, cdc_tailer.SYNC_POSITION) == start + 2
+    assert (_status(empty_mongo, first), _status(empty_mongo, second)) == ("Approved", "Approved")
+
+    # A restarted tailer continues after the stored mark
+    assert cdc_tailer.CdcTailer(empty_mongo, batch_size=2).run(once=True) == start + 3
+    assert mongo_crud.get_sync_position(empty_mongo, cdc_tailer.SYNC_POSITION) == start + 3
+    assert _status(empty_mongo, first) == "Rejected"
+
+    # Caught up: nothing to apply and the mark stays
+    assert cdc_tailer.tail_once(db, empty_mongo, start + 3) == (0, start + 3)
+
+def test_replaying_a_batch_sets_the_same_statuses(client, db, empty_mongo):
+    loan_id = _create_loan(client)
+    start = sql_crud.last_status_change_id(db)
+    _set_status(db, loan_id, "Approved")
+
+    assert cdc_tailer.tail_once(db, empty_mongo, start) == (1, start + 1)
+    rollups = analytics_crud.get_rollups(empty_mongo)
+    assert cdc_tailer.tail_once(db, empty_mongo, start) == (1, start + 1)
+    assert _status(empty_mongo, loan_id) == "Approved"
+    assert analytics_crud.get_rollups(empty_mongo) == rollups
@@ -0,0 +1,35 @@
+import joblib
+import numpy as np
+import pytest
+
+from app.ml.compiled_scorer import CompiledScorer, check_parity, probe_matrix
+from app.ml.scoring_engine import ASSETS_PATH, WARMUP_RECORD, ScoringEngine
+
+
+@pytest.fixture(scope="module")
+def assets():
+    return joblib.load(ASSETS_PATH)
+
+
+def test_folded_weights_match_predict_proba(assets):
+    model, scaler = assets["model"], assets["scaler"]
+    scorer = CompiledScorer.from_pipeline(model, scaler)
+    assert scorer.weights.dtype == np.float32 and scorer.weights.flags["C_CONTIGUOUS"]
+    assert check_parity(scorer, model, scaler, probe_matrix(scaler)) <= 1e-4
+
+def test_parity_check_rejects_wrong_weights(assets):
+    model, scaler = assets["model"], assets["scaler"]
+    scorer = CompiledScorer.from_pipeline(model, scaler)
+    broken = CompiledScorer(scorer.weights, scorer.bias + 1.0)
+    with pytest.raises(ValueError, match="differs from predict_proba"):
+        check_parity(broken, model, scaler, probe_matrix(scaler))
+
+def test_compiled_engine_decides_like_sklearn(assets):
+    records = [WARMUP_RECORD, {**WARMUP_RECORD, "credit_score": 800, "income": 150000},
+               {**WARMUP_RECORD, "loan_amount": 40000, "loan_intent": "medical"}]
+    engines = [ScoringEngine(assets["model"], assets["scaler"], assets["columns"], compiled=compiled)
+               for compiled in (False, True)]
+    sklearn_results, compiled_results = (engine.score(records) for engine in engines)
+    assert engines[1].build_feature_matrix(records).dtype == np.float32
+    assert [status for _, status in compiled_results] == [status for _, status in sklearn_results]
+    assert np.allclose([p for p, _ in compiled_results], [p for p, _ in sklearn_results], atol=1e-4)
@@ -0,0 +1,68 @@
+import pytest
+
+from app.crud import document_layout, lookup_cache, mongo_crud
+from app.models.pydantic_schemas import ApplicationCreate
+from conftest import APPLICATION
+
+
+@pytest.fixture
+def compact(empty_mongo, monkeypatch):
+    monkeypatch.setattr(document_layout, "COMPACT", True)
+    return empty_mongo
+
+def _stored(mongo) -> list:
+    return list(mongo['loan_prediction_db']['loanApplications'].find({}, {"_id": 0}))
+
+
+def test_new_category_is_stored_as_one_id(compact):
+    assert "debtconsolidation" not in lookup_cache.ids("loan_intent")
+    for loan_id in (1, 2):
+        mongo_crud.create_application_document(compact, ApplicationCreate(**{**APPLICATION, "loan_intent": "DEBT_CONSOLIDATION"}), "Pending", loan_id)
+
+    intent_id = lookup_cache.ids("loan_intent")["debtconsolidation"]
+    assert [document["n"] for document in _stored(compact)] == [intent_id, intent_id]
+    found = mongo_crud.find_applications(compact, {"loanDetails.intent": "DEBT_CONSOLIDATION"})
+    assert sorted(document["sql_loan_id"] for document in found) == [1, 2]
+
+def test_category_stored_by_name_still_matches(compact):
+    # Written before the category had an id
+    mongo_crud.create_application_document(compact, ApplicationCreate(**{**APPLICATION, "loan_intent": "PERSONAL"}), "Pending", 1)
+    collection = compact['loan_prediction_db']['loanApplications']
+    collection.update_one({"sql_loan_id": 1}, {"$set": {"n": "personal"}})
+    mongo_crud.create_application_document(compact, ApplicationCreate(**{**APPLICATION, "loan_intent": "PERSONAL"}), "Approved", 2)
+
+    for condition in ("PERSONAL", {"$eq": "personal"}, {"$in": ["Personal", "MEDICAL"]}):
+        found = mongo_crud.find_applications(compact, {"loanDetails.intent": condition})
+        assert sorted(document["sql_loan_id"] for document in found) == [1, 2]
+    assert mongo_crud.find_applications(compact, {"loanDetails.intent": {"$ne": "PERSONAL"}}) == []
+
+def test_documents_round_trip_through_the_compact_layout(compact):
+    mongo_crud.create_application_document(compact, ApplicationCreate(**APPLICATION), "Pending", 1)
+    [stored] = _stored(compact)
+    assert set(stored) <= set(document_layout.FIELDS.values())
+    assert stored["s"] == 1 and stored["h"] == APPLICATION["home_ownership_id"]
+    assert all(isinstance(stored[field], int) for field in ("g", "e", "n"))
+
+    [document] = mongo_crud.find_applications(compact, {"sql_loan_id": 1}, {"_id": 0})
+    written = mongo_crud._build_application_document(ApplicationCreate(**APPLICATION), "Pending", 1, document["ingestionTimestamp"])
+    assert document == document_layout.normalized(written)
+    assert (document["loanStatus"], document["personDetails"]["education"], document["loanDetails"]["intent"]) == ("Pending", "master", "medical")
+
+def test_compact_documents_are_queried_updated_and_aggregated_by_readable_paths(compact):
+    for loan_id, income in ((1, 20000), (2, 50000), (3, 90000)):
+        mongo_crud.create_application_document(compact, ApplicationCreate(**{**APPLICATION, "income": income}), "Pending", loan_id)
+    mongo_crud.update_document_status(compact, 2, "Approved")
+
+    found = mongo_crud.find_applications(
+        compact, {"loanStatus": {"$in": ["Pending", "Approved"]}, "personDetails.income": {"$gte": 50000}},
+        projection={"personDetails": 1, "loanStatus": 1}, sort=[("personDetails.income", -1)],
+    )
+    assert [(d["personDetails"]["income"], d["loanStatus"]) for d in found] == [(90000, "Pending"), (50000, "Approved")]
+    assert "loanDetails" not in found[0]
+    assert [d["sql_loan_id"] for d in mongo_crud.find_applications(compact, {"loanStatus": "Approved"})] == [2]
+
+    pipeline = [*document_layout.readable_stages(["loanStatus", "loanDetails.intent"]),
+                {"$group": {"_id": {"status": "$loanStatus", "intent": "$loanDetails.intent"}, "count": {"$sum": 1}}}]
+    groups = {(g["_id"]["status"], g["_id"]["intent"]): g["count"]
+              for g in compact['loan_prediction_db']['loanApplications'].aggregate(pipeline)}
+    assert groups == {("Pending", "medical"): 2, ("Approved", "medical"): 1}
@@ -0,0 +1,48 @@
+from sqlalchemy import select
+
+from app.crud import lookup_cache
+from app.db import sql_models
+from app.models.pydantic_schemas import ApplicationCreate
+from conftest import APPLICATION
+
+
+def test_app_starts_on_an_empty_database(client):
+    ready = client.get("/ready").json()
+    assert ready["status"] == "ready"
+    assert "lookup_data" in ready["startup_ms"]
+    # Seeded like sql/schema.sql
+    assert lookup_cache.ids("home_ownership") == {"own": 1, "rent": 2, "mortgage": 3}
+    assert lookup_cache.name("education", 3) == "master"
+
+def test_application_stores_lookup_ids(client, db):
+    response = client.post("/applications/", json=APPLICATION)
+    assert response.status_code == 200
+    loan_id = response.json()["loans"][0]["loan_id"]
+    person, loan = db.execute(
+        select(sql_models.Person, sql_models.Loan).join(sql_models.Loan).where(sql_models.Loan.loan_id == loan_id)
+    ).one()
+    assert (person.gender_id, person.education_id, loan.loan_intent_id) == (2, 3, 3)
+
+def test_unknown_categories_are_created_once(client, db):
+    applications = [
+        ApplicationCreate(**{**APPLICATION, "education": "Doctorate", "loan_intent": "HOME_IMPROVEMENT"}),
+        ApplicationCreate(**{**APPLICATION, "education": "doctorate", "loan_intent": "home improvement"}),
+    ]
+    first, second = lookup_cache.application_ids(applications)
+    assert first == second
+    assert lookup_cache.name("education", first["education_id"]) == "doctorate"
+    assert db.query(sql_models.Education).filter(sql_models.Education.education_id == first["education_id"]).count() == 1
+    # Known now: resolved from memory
+    assert lookup_cache.cached_application_ids(applications) == [first, second]
+
+def test_home_ownership_id_is_scored_by_its_table_name(client):
+    from app.ml.scoring_engine import get_scoring_engine
+
+    engine = get_scoring_engine()
+    record = {key: value for key, value in APPLICATION.items() if key != "home_ownership_id"}
+    by_id = engine.build_feature_matrix([{**record, "home_ownership_id": lookup_cache.ids("home_ownership")["mortgage"]}])
+    by_name = engine.build_feature_matrix([{**record, "home_ownership": "mortgage"}])
+    assert (by_id == by_name).all()
+    # An id the table does not have encodes like a missing category
+    unknown = engine.build_feature_matrix([{**record, "home_ownership_id": 999}])
+    assert (unknown == engine.build_feature_matrix([record])).all()
@@ -0,0 +1,66 @@
+import os
+
+import joblib
+import pytest
+
+from app.ml import model_registry, scoring_engine
+
+
+@pytest.fixture(scope="module")
+def assets():
+    return joblib.load(scoring_engine.ASSETS_PATH)
+
+
+def test_registered_version_loads_with_its_metadata(assets):
+    metadata = model_registry.register(assets, "registry-load", threshold=0.6)
+    assert metadata["checksum"] == model_registry.file_checksum(
+        os.path.join(model_registry.REGISTRY_DIR, "registry-load", model_registry.PIPELINE_FILE))
+    assert "registry-load" in [m["version"] for m in model_registry.list_versions()]
+
+    loaded, loaded_metadata = model_registry.load("registry-load")
+    assert loaded_metadata == metadata
+    assert list(loaded["columns"]) == list(assets["columns"])
+    assert (loaded["model"].coef_ == assets["model"].coef_).all()
+
+    with pytest.raises(ValueError, match="already exists"):
+        model_registry.register(assets, "registry-load")
+    with pytest.raises(KeyError):
+        model_registry.set_active("registry-missing")
+
+def test_tampered_version_is_refused(assets, served, client):
+    model_registry.register(assets, "registry-tampered")
+    with open(os.path.join(model_registry.REGISTRY_DIR, "registry-tampered", model_registry.PIPELINE_FILE), "ab") as f:
+        f.write(b"\0")
+    with pytest.raises(ValueError, match="Checksum mismatch"):
+        model_registry.load("registry-tampered")
+
+    serving = served.get_scoring_engine().version
+    response = client.post("/models/registry-tampered/activate")
+    assert response.status_code == 409
+    assert served.get_scoring_engine().version == serving
+    assert model_registry.active_version() is None
+    assert client.post("/models/registry-missing/activate").status_code == 404
+
+def test_activation_swaps_the_served_engine(assets, served, client):
+    model_registry.register(assets, "registry-swap", threshold=0.9)
+    status = client.post("/models/registry-swap/activate").json()
+    assert status["active_version"] == "registry-swap"
+    assert model_registry.active_version() == "registry-swap"
+
+    engine = served.get_scoring_engine()
+    assert engine.version == "registry-swap" and engine.threshold == 0.9
+    assert engine.cache is served.prediction_cache
+
+def test_shadow_version_is_compared_on_live_traffic(assets, served, client):
+    model_registry.register(assets, "registry-shadow", threshold=0.0)
+    assert client.post("/models/registry-shadow/shadow").json()["shadow_version"] == "registry-shadow"
+
+    records = [scoring_engine.WARMUP_RECORD] * 3
+    served.shadow_score(records, served.get_scoring_engine().score(records))
+    stats = client.get("/models/shadow/stats").json()
+    assert stats["shadow_version"] == "registry-shadow" and stats["rows"] == 3
+    # Same weights, so only the threshold can make them disagree
+    assert stats["mean_abs_probability_diff"] == 0.0
+
+    assert client.delete("/models/shadow").json()["shadow_version"] is None
+    assert model_registry.shadow_version() is None
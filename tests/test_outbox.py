@@ -0,0 +1,86 @@
+import pytest
+from pymongo.errors import BulkWriteError
+
+from app.crud import mongo_crud, outbox_crud
+from app.db import sql_models
+from app.models.pydantic_schemas import ApplicationCreate
+from app.workers import outbox_dispatcher
+from conftest import APPLICATION
+
+
+@pytest.fixture
+def outbox(db, empty_mongo):
+    db.query(sql_models.MongoOutbox).delete()
+    db.commit()
+    yield db
+    db.query(sql_models.MongoOutbox).delete()
+    db.commit()
+
+def _queue(db, *entries, attempts: int = 0) -> list:
+    rows = [sql_models.MongoOutbox(**entry, attempts=attempts) for entry in entries]
+    db.add_all(rows)
+    db.commit()
+    return [row.outbox_id for row in rows]
+
+def _create(loan_id: int) -> dict:
+    return outbox_crud.application_entry(ApplicationCreate(**APPLICATION), "Pending", loan_id)
+
+def _dispatch(db, mongo) -> int:
+    return outbox_dispatcher.dispatch_once(db, mongo, max_delay=0)
+
+def _status(mongo, loan_id: int):
+    [document] = mongo_crud.find_applications(mongo, {"sql_loan_id": loan_id})
+    return document["loanStatus"]
+
+
+def test_entries_are_applied_in_commit_order(outbox, empty_mongo):
+    _queue(outbox, _create(1), outbox_crud.status_entry(1, "Approved"), outbox_crud.status_entry(1, "Rejected"))
+    assert _dispatch(outbox, empty_mongo) == 3
+    assert _status(empty_mongo, 1) == "Rejected"
+    assert outbox.query(sql_models.MongoOutbox).count() == 0
+
+def test_failed_entry_is_retried_before_later_ones(outbox, empty_mongo, monkeypatch):
+    _queue(outbox, _create(1), _create(2), outbox_crud.status_entry(2, "Approved"))
+    apply_operations = mongo_crud.apply_operations
+
+    def fail_second(mongo, operations):
+        apply_operations(mongo, operations[:1])
+        raise BulkWriteError({"writeErrors": [{"index": 1, "errmsg": "simulated"}]})
+
+    monkeypatch.setattr(mongo_crud, "apply_operations", fail_second)
+    assert _dispatch(outbox, empty_mongo) == 1
+    [failed, update] = outbox.query(sql_models.MongoOutbox).order_by(sql_models.MongoOutbox.outbox_id).all()
+    assert (failed.loan_id, failed.attempts, failed.last_error) == (2, 1, "simulated")
+    assert update.attempts == 0
+
+    monkeypatch.setattr(mongo_crud, "apply_operations", apply_operations)
+    assert _dispatch(outbox, empty_mongo) == 2
+    assert _status(empty_mongo, 2) == "Approved"
+
+def test_stuck_entry_holds_back_its_loan_only(outbox, empty_mongo, monkeypatch):
+    monkeypatch.setattr(outbox_dispatcher, "USE_OUTBOX", True)
+    [stuck] = _queue(outbox, _create(1), attempts=outbox_dispatcher.MAX_ATTEMPTS)
+    _queue(outbox, outbox_crud.status_entry(1, "Approved"), _create(2))
+
+    batch = outbox_crud.get_batch(outbox, 100, outbox_dispatcher.MAX_ATTEMPTS)
+    assert [entry.loan_id for entry in batch] == [2]
+    assert _dispatch(outbox, empty_mongo) == 1
+    assert mongo_crud.find_applications(empty_mongo, {"sql_loan_id": 1}) == []
+    assert "mongo_outbox_stuck_entries 1" in outbox_dispatcher.metrics.render_all()
+
+    # Once the stuck entry is dealt with, the held-back update follows
+    outbox.query(sql_models.MongoOutbox).filter(sql_models.MongoOutbox.outbox_id == stuck).update({"attempts": 0})
+    outbox.commit()
+    assert _dispatch(outbox, empty_mongo) == 2
+    assert _status(empty_mongo, 1) == "Approved"
+
+def test_last_failure_is_logged(outbox, empty_mongo, monkeypatch, capsys):
+    _queue(outbox, _create(1), attempts=outbox_dispatcher.MAX_ATTEMPTS - 1)
+
+    def fail(mongo, operations):
+        raise BulkWriteError({"writeErrors": [{"index": 0, "errmsg": "simulated"}]})
+
+    monkeypatch.setattr(mongo_crud, "apply_operations", fail)
+    assert _dispatch(outbox, empty_mongo) == 0
+    assert "later entries for loan 1 are held back" in capsys.readouterr().out
+    assert outbox_crud.count_stuck(outbox, outbox_dispatcher.MAX_ATTEMPTS) == 1
@@ -0,0 +1,47 @@
+from sqlalchemy import update
+
+from app.crud import person_cache
+from app.db import sql_models
+from conftest import APPLICATION
+
+
+def _create_person(client) -> tuple:
+    person = client.post("/applications/", json=APPLICATION).json()
+    return person["person_id"], person["loans"][0]["loan_id"]
+
+def _change_status(db, loan_id: int) -> str:
+    """
+    Changes a loan's status the way a batch worker would: nothing in this process hears about it.
+    """
+    loan = db.get(sql_models.Loan, loan_id)
+    new_status = "Approved" if loan.loan_status != "Approved" else "Rejected"
+    db.execute(update(sql_models.Loan).where(sql_models.Loan.loan_id == loan_id).values(loan_status=new_status))
+    db.commit()
+    return new_status
+
+
+def test_unchanged_person_is_served_from_the_cache(client):
+    person_id, _ = _create_person(client)
+    first = client.get(f"/persons/{person_id}")
+    assert person_cache.get(person_id).body == first.content
+    assert client.get(f"/persons/{person_id}").content == first.content
+
+def test_status_change_from_another_process_is_seen(client, db):
+    person_id, loan_id = _create_person(client)
+    client.get(f"/persons/{person_id}")
+    assert person_cache.get(person_id) is not None
+
+    new_status = _change_status(db, loan_id)
+    assert client.get(f"/persons/{person_id}").json()["loans"][0]["loan_status"] == new_status
+
+def test_other_persons_changes_keep_the_entry(client, db):
+    person_id, _ = _create_person(client)
+    _, other_loan_id = _create_person(client)
+    client.get(f"/persons/{person_id}")
+    entry = person_cache.get(person_id)
+
+    _change_status(db, other_loan_id)
+    client.get(f"/persons/{person_id}")
+    # Served from the cache, now checked from the newer log position
+    assert person_cache.get(person_id).body == entry.body
+    assert person_cache.get(person_id).log_id > entry.log_id
@@ -0,0 +1,73 @@
+import os
+import sqlite3
+
+import mongomock
+import pandas as pd
+
+import populate_mongodb
+import populate_sqlite
+
+ROWS = [
+    # age, gender, education, income, emp_exp, home, amount, intent, rate, percent, history, score, defaults, status
+    (22, "female", "master", 71948.0, 0, "rent", 35000.0, "personal", 16.02, 0.49, 3.0, 561, "no", 1),
+    (21, "female", "high school", 12282.0, 0, "own", 1000.0, "education", 11.14, 0.08, 2.0, 504, "yes", 0),
+    (25, "male", "bachelor", 12438.0, 3, "mortgage", 5500.0, "venture", 12.87, 0.44, 3.0, 635, "no", 1),
+    (23, "female", "doctorate", 79753.0, 0, "rent", 35000.0, "personal", 15.23, 0.44, 2.0, 675, "no", 0),
+    (24, "male", "bachelor", 95550.0, 1, "other", 35000.0, "medical", 14.27, 0.37, 4.0, 586, "no", 1),
+]
+COLUMNS = ["person_age", "person_gender", "person_education", "person_income", "person_emp_exp",
+           "person_home_ownership", "loan_amnt", "loan_intent", "loan_int_rate", "loan_percent_income",
+           "cb_person_cred_hist_length", "credit_score", "previous_loan_defaults_on_file", "loan_status"]
+
+
+def _write_csv(tmp_path) -> str:
+    path = os.path.join(tmp_path, "loans.csv")
+    pd.DataFrame(ROWS, columns=COLUMNS).to_csv(path, index=False)
+    return path
+
+
+def test_sqlite_loader_reuses_seeded_lookups_across_chunks(tmp_path):
+    db_path = os.path.join(tmp_path, "loans.db")
+    conn = sqlite3.connect(db_path)
+    with open(populate_sqlite.SCHEMA_PATH, encoding="utf-8") as f:
+        conn.executescript(f.read())
+    seeded_persons = conn.execute("SELECT COUNT(*) FROM person").fetchone()[0]
+    conn.close()
+
+    populate_sqlite.populate_sqlite_from_csv(_write_csv(tmp_path), db_path, chunk_size=2)
+
+    conn = sqlite3.connect(db_path)
+    try:
+        # 'bachelor' is the seeded 'Bachelor’s' and 'venture' the seeded 'Business'; new values are added once
+        education = dict(conn.execute("SELECT level, education_id FROM education"))
+        assert len(education) == 4 and "doctorate" in education
+        intents = dict(conn.execute("SELECT purpose, intent_id FROM loan_intent"))
+        assert sorted(intents) == ["Business", "Education", "Medical", "personal"]
+        homes = dict(conn.execute("SELECT type, home_ownership_id FROM home_ownership"))
+        assert sorted(homes) == ["Mortgage", "Own", "Rent", "other"]
+
+        loaded = conn.execute("""
+            SELECT p.age, e.level, i.purpose, l.loan_status, l.previous_loan_defaults
+            FROM person p JOIN loan l ON l.person_id = p.person_id
+            JOIN education e ON e.education_id = p.education_id
+            JOIN loan_intent i ON i.intent_id = l.loan_intent_id
+            WHERE p.person_id > ? ORDER BY p.person_id
+        """, (seeded_persons,)).fetchall()
+        assert loaded == [
+            (22, "Master’s", "personal", "Approved", 0),
+            (21, "High School", "Education", "Rejected", 1),
+            (25, "Bachelor’s", "Business", "Approved", 0),
+            (23, "doctorate", "personal", "Rejected", 0),
+            (24, "Bachelor’s", "Medical", "Approved", 0),
+        ]
+    finally:
+        conn.close()
+
+def test_mongo_loader_streams_bounded_batches(tmp_path):
+    batches = list(populate_mongodb.iter_document_batches(_write_csv(tmp_path), chunk_size=2, batch_size=3))
+    assert [len(batch) for batch in batches] == [2, 2, 1]
+    assert len({document["ingestionTimestamp"] for batch in batches for document in batch}) == 1
+
+    collection = mongomock.MongoClient()['loan_prediction_db']['loanApplications']
+    assert populate_mongodb.insert_batches(collection, iter(batches), workers=2) == len(ROWS)
+    assert sorted(d["personDetails"]["age"] for d in collection.find()) == sorted(row[0] for row in ROWS)
@@ -0,0 +1,40 @@
+import joblib
+import numpy as np
+
+from app.ml import model_registry
+from app.ml.prediction_cache import PredictionCache
+from app.ml.scoring_engine import WARMUP_RECORD
+
+X = np.array([[1.0, 2.0], [3.0, 4.0], [5.0, 6.0]])
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = PredictionCache(maxsize=2, ttl=60)
+    keys = cache.keys_for(X, "v1")
+    cache.put_many(keys[:2], [0.1, 0.2])
+    assert cache.get_many(keys[:1]) == [0.1]   # keys[0] is now the most recently used
+    cache.put_many(keys[2:], [0.3])
+    assert cache.get_many(keys) == [0.1, None, 0.3]
+    assert cache.stats()["size"] == 2
+
+def test_expired_entries_and_other_models_miss():
+    cache = PredictionCache(maxsize=10, ttl=0)
+    keys = cache.keys_for(X, "v1")
+    cache.put_many(keys, [0.1, 0.2, 0.3])
+    assert cache.get_many(keys) == [None, None, None]
+    assert cache.stats()["size"] == 0
+
+    assert set(PredictionCache.keys_for(X, "v1")).isdisjoint(PredictionCache.keys_for(X, "v2"))
+
+def test_engine_scores_only_misses_and_swap_clears_the_cache(served, monkeypatch):
+    monkeypatch.setattr(served, "prediction_cache", PredictionCache(maxsize=100, ttl=60))
+    engine = served.load_engine()
+    records = [WARMUP_RECORD, {**WARMUP_RECORD, "income": 90000}]
+    first = engine.score(records)
+    assert engine.score(records) == first
+    assert served.prediction_cache.stats()["hits"] == 2
+
+    model_registry.register(joblib.load(served.ASSETS_PATH), "cache-swap")
+    swapped = served.swap_engine("cache-swap")
+    assert served.prediction_cache.stats()["size"] == 0
+    assert swapped.cache is served.prediction_cache
@@ -0,0 +1,73 @@
+from collections import Counter
+
+from app.crud import analytics_crud, mongo_crud, reconcile_crud
+from app.workers import reconcile
+from conftest import APPLICATION
+
+
+def _create_loan(client) -> int:
+    return client.post("/applications/", json=APPLICATION).json()["loans"][0]["loan_id"]
+
+def _write_behind_sql(mongo, document: dict, sign: int = 1):
+    """
+    Inserts (or with sign=-1 deletes) a document without going through SQLite, keeping the rollups in step.
+    """
+    collection = mongo['loan_prediction_db']['loanApplications']
+    if sign > 0:
+        collection.insert_one(document)
+    else:
+        collection.delete_one({"_id": document["_id"]})
+    delta = analytics_crud.RollupDelta()
+    delta.add(document, sign=sign)
+    analytics_crud.apply_delta(mongo, delta)
+
+def _reconcile(db, mongo) -> tuple:
+    repairs = []
+    stats = reconcile.reconcile(db, mongo, repairs.extend, fanout=4, leaf_size=2)
+    return stats, repairs
+
+def _rollup_total(mongo) -> int:
+    return sum(r["total"] for r in analytics_crud.get_rollups(mongo, "intent"))
+
+
+def test_drift_is_found_and_repaired(client, db, empty_mongo):
+    collection = empty_mongo['loan_prediction_db']['loanApplications']
+    changed, removed, duplicated = (_create_loan(client) for _ in range(3))
+    collection.update_one({"sql_loan_id": changed}, {"$set": {"loanStatus": "Approved", "loanDetails.amount": 1}})
+    [lost] = mongo_crud.find_applications(empty_mongo, {"sql_loan_id": removed})
+    _write_behind_sql(empty_mongo, lost, sign=-1)
+    [original] = mongo_crud.find_applications(empty_mongo, {"sql_loan_id": duplicated})
+    _write_behind_sql(empty_mongo, {key: value for key, value in original.items() if key != "_id"})
+    _write_behind_sql(empty_mongo, {**original, "_id": "orphan", "sql_loan_id": duplicated + 1000})
+    _write_behind_sql(empty_mongo, {key: value for key, value in original.items() if key not in ("_id", "sql_loan_id")})
+
+    stats, repairs = _reconcile(db, empty_mongo)
+    assert stats["unlinked_documents"] == 1
+    assert {"op": "update", "loan_id": changed, "set": {
+        "loanStatus": "Pending", "loanDetails.amount": APPLICATION["loan_amount"],
+        "loanDetails.interestRate": APPLICATION["loan_interest_rate"]}} in repairs
+    assert removed in [r["loan_id"] for r in repairs if r["op"] == "insert"]
+    assert {"op": "delete", "_id": "orphan"} in repairs
+    assert stats["duplicate"] == 1 and stats["orphaned"] == 1
+
+    reconcile_crud.apply_repairs(empty_mongo, repairs)
+    [restored] = mongo_crud.find_applications(empty_mongo, {"sql_loan_id": removed})
+    assert restored["loanStatus"] == "Pending"
+    assert mongo_crud.find_applications(empty_mongo, {"sql_loan_id": changed})[0]["loanDetails"]["amount"] == 5000
+    assert len(mongo_crud.find_applications(empty_mongo, {"sql_loan_id": duplicated})) == 1
+    # The rollups count the documents left, the unlinked one included
+    assert _rollup_total(empty_mongo) == collection.count_documents({})
+
+    stats, repairs = _reconcile(db, empty_mongo)
+    assert repairs == [] and stats["unlinked_documents"] == 1
+
+def test_agreeing_stores_compare_only_digests(client, db, empty_mongo):
+    # Documents for this test's loans and for any left by other tests
+    last_loan_id = [_create_loan(client) for _ in range(3)][-1]
+    for loan_id in reconcile_crud.sql_range_rows(db, 0, last_loan_id + 1):
+        if not mongo_crud.find_applications(empty_mongo, {"sql_loan_id": loan_id}):
+            reconcile_crud.apply_repairs(empty_mongo, reconcile.diff_leaf(db, empty_mongo, loan_id, loan_id + 1, Counter()))
+
+    stats, repairs = _reconcile(db, empty_mongo)
+    assert repairs == []
+    assert stats["leaves"] == 0 and stats["rows_compared"] == 0
@@ -0,0 +1,21 @@
+from app.crud import lookup_cache
+from app.ml.feature_encoder import normalize_category
+from app.workers.score_pending import to_scoring_record
+from conftest import APPLICATION
+
+
+def test_seeded_business_intent_is_scored_as_venture(client):
+    from app.ml.scoring_engine import get_scoring_engine
+
+    assert normalize_category("loan_intent", "Business") == "venture"
+    business_id = lookup_cache.ids("loan_intent")["venture"]
+    assert lookup_cache.name("loan_intent", business_id) == "venture"
+
+    row = {key: value for key, value in APPLICATION.items() if key not in ("gender", "education", "loan_intent")}
+    record = to_scoring_record({**row, "gender_id": 2, "education_id": 3, "loan_intent_id": business_id})
+    assert record["loan_intent"] == "venture"
+
+    engine = get_scoring_engine()
+    assert "venture" in engine.encoder.category_index["loan_intent"]
+    without_intent = {key: value for key, value in record.items() if key != "loan_intent"}
+    assert (engine.build_feature_matrix([record]) != engine.build_feature_matrix([without_intent])).any()
@@ -0,0 +1,32 @@
+import os
+
+import joblib
+import numpy as np
+from sqlalchemy import text
+
+from app.db import database
+from app.ml import model_registry
+from app.ml.scoring_engine import ASSETS_PATH, WARMUP_RECORD, ScoringEngine
+
+
+def test_registry_versions_are_memory_mapped_read_only():
+    model_registry.register(joblib.load(ASSETS_PATH), "serve-mmap")
+    pipeline_path = os.path.join(model_registry.REGISTRY_DIR, "serve-mmap", model_registry.PIPELINE_FILE)
+
+    engine = ScoringEngine.from_registry("serve-mmap")
+    for array in (engine.model.coef_, engine.scaler.mean_, engine.scaler.scale_):
+        # Pages of the pipeline file, shared by every process that loads this version
+        assert isinstance(array, np.memmap) and os.path.samefile(array.filename, pipeline_path)
+        assert not array.flags.writeable
+    assert engine.score([WARMUP_RECORD])[0][1] in ("Approved", "Rejected")
+
+def test_reset_after_fork_drops_inherited_connections(client, mongo):
+    inherited_pool, async_client = database.engine.pool, database.async_mongo_client
+    try:
+        database.reset_after_fork()
+        assert database.mongo_client is None and database.async_mongo_client is None
+        assert database.engine.pool is not inherited_pool
+        with database.SessionLocal() as session:
+            assert session.execute(text("SELECT 1")).scalar() == 1
+    finally:
+        database.mongo_client, database.async_mongo_client = mongo, async_client
@@ -0,0 +1,48 @@
+import asyncio
+
+from sqlalchemy import delete
+
+from app.crud import async_sql_crud, sql_crud
+from app.db import sql_models
+from app.db.database import AsyncSessionLocal
+from app.models.pydantic_schemas import ApplicationCreate
+from conftest import APPLICATION
+
+
+def _applications(count: int, first_age: int) -> list:
+    return [
+        ApplicationCreate(**{**APPLICATION, "age": first_age + i, "loan_amount": 1000 + i, "gender": ("Male", "Female")[i % 2]})
+        for i in range(count)
+    ]
+
+def _assert_ids_match(db, applications, ids):
+    assert len(ids) == len(applications)
+    for application, (person_id, loan_id) in zip(applications, ids):
+        person = db.get(sql_models.Person, person_id)
+        loan = db.get(sql_models.Loan, loan_id)
+        assert person.age == application.age
+        assert loan.person_id == person_id
+        assert loan.loan_amount == application.loan_amount
+
+
+def test_batch_ids_follow_the_input_order(db):
+    # Free the highest ids first: without AUTOINCREMENT SQLite hands them out again
+    created = sql_crud.create_persons_and_loans(db, _applications(5, 20), "Pending")
+    db.execute(delete(sql_models.Loan).where(sql_models.Loan.loan_id.in_([loan_id for _, loan_id in created[2:]])))
+    db.execute(delete(sql_models.Person).where(sql_models.Person.person_id.in_([person_id for person_id, _ in created[2:]])))
+    db.commit()
+
+    applications = _applications(300, 40)
+    ids = sql_crud.create_persons_and_loans(db, applications, "Pending")
+    db.expire_all()
+    _assert_ids_match(db, applications, ids)
+
+def test_async_batch_ids_follow_the_input_order(db):
+    applications = _applications(50, 400)
+
+    async def create():
+        async with AsyncSessionLocal() as session:
+            return await async_sql_crud.create_persons_and_loans(session, applications, "Pending")
+
+    ids = asyncio.run(create())
+    _assert_ids_match(db, applications, ids)
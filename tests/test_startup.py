@@ -0,0 +1,18 @@
+import os
+import subprocess
+import sys
+
+from conftest import WORK_DIR
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_importing_the_app_does_not_load_the_model_stack():
+    env = {**os.environ, "DATABASE_URL": f"sqlite:///{os.path.join(WORK_DIR, 'import.db')}"}
+    code = "import sys, app.main; print(sorted(m for m in ('joblib', 'numpy', 'sklearn', 'pandas') if m in sys.modules))"
+    result = subprocess.run([sys.executable, "-c", code], cwd=ROOT, env=env, capture_output=True, text=True, check=True)
+    assert result.stdout.strip() == "[]"
+
+def test_model_is_loaded_by_startup(client):
+    assert "model" in client.get("/ready").json()["startup_ms"]
+    assert client.get("/models").json()["active_version"]